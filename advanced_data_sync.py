@@ -14,6 +14,14 @@ from concurrent.futures import ThreadPoolExecutor
 import zlib
 import msgpack
 
+from correlation_cache import CorrelationCache
+from correlation_engine import (
+    SlidingCoMoments, align_windows, complete_rows, pearson_matrix, spearman_matrix
+)
+from dynamic_time_warping import dtw_distance
+from preprocessing import preprocess_matrix
+from stream_buffer import BufferSizeTracker, batch_points, to_epoch_ns
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +42,7 @@ class TimeSeriesPoint:
     value: float
     confidence: float
     metadata: Dict[str, Any]
+    timestamp_ns: Optional[int] = None
 
 @dataclass
 class SynchronizedDataPoint:
@@ -55,8 +64,11 @@ class AdvancedDataSynchronizer:
         self.optimization_config = optimization_config or {
             'use_caching': True,
             'cache_size': 1000,
+            'cache_ttl_seconds': 3600,
+            'cache_max_bytes': 16 * 1024 * 1024,
             'parallel_processing': True,
             'batch_size': 100,
+            'dtw_window_ratio': 0.1,
             'compression': {
                 'enabled': True,
                 'level': 6,
@@ -66,47 +78,80 @@ class AdvancedDataSynchronizer:
         
         self.data_buffer: Dict[str, List[Dict[str, Any]]] = {}
         self.time_series_data: Dict[str, List[TimeSeriesPoint]] = {}
-        self.correlation_cache: Dict[str, Dict] = {}
+        # Combined scores keyed by (pair, extent of every stream's window)
+        self.correlation_cache = CorrelationCache(
+            'advanced_sync',
+            max_entries=self.optimization_config['cache_size'],
+            ttl_seconds=self.optimization_config.get('cache_ttl_seconds'),
+            max_bytes=self.optimization_config.get('cache_max_bytes')
+        )
+        self.size_tracker = BufferSizeTracker()
+        
+        # Online co-moments over the aligned raw samples of every stream pair,
+        # fed by the latest point of each stream as it arrives (O(1) Pearson)
+        self.comoments: Dict[Tuple[str, str], SlidingCoMoments] = {}
+        self.latest_points: Dict[str, Tuple[int, float, set]] = {}
+        self.comoment_lock = threading.Lock()
+        
+        # ``lock`` only guards the stream registry; each stream's buffers are
+        # guarded by their own lock so producers never wait on synchronization
         self.lock = threading.Lock()
+        self.stream_locks: Dict[str, threading.Lock] = {}
         
         # Initialize metrics
         STREAM_COUNT.set(0)
         BUFFER_SIZE.set(0)
         
+    def _stream_lock(self, stream_name: str) -> threading.Lock:
+        """Get a stream's lock, registering the stream on first use."""
+        lock = self.stream_locks.get(stream_name)
+        if lock is None:
+            with self.lock:
+                lock = self.stream_locks.get(stream_name)
+                if lock is None:
+                    # Publish the lock before the buffers so readers always find it
+                    lock = threading.Lock()
+                    self.stream_locks[stream_name] = lock
+                    self.time_series_data[stream_name] = []
+                    self.data_buffer[stream_name] = []
+                    STREAM_COUNT.inc()
+        return lock
+    
     def add_data_stream(self, stream_name: str, data: Dict[str, Any], timestamp: str) -> bool:
         """Add a new data stream with enhanced time series support."""
         start_time = time.time()
         try:
-            with self.lock:
-                if stream_name not in self.data_buffer:
-                    self.data_buffer[stream_name] = []
-                    self.time_series_data[stream_name] = []
-                    STREAM_COUNT.inc()
-                
-                # Create time series point
-                time_series_point = TimeSeriesPoint(
-                    timestamp=timestamp,
-                    value=self._extract_numeric_value(data),
-                    confidence=self._calculate_confidence(data),
-                    metadata=self._extract_metadata(data)
-                )
-                
+            # Create time series point
+            time_series_point = TimeSeriesPoint(
+                timestamp=timestamp,
+                value=self._extract_numeric_value(data),
+                confidence=self._calculate_confidence(data),
+                metadata=self._extract_metadata(data),
+                timestamp_ns=to_epoch_ns(timestamp)
+            )
+            
+            with self._stream_lock(stream_name):
                 # Add to buffers
                 self.data_buffer[stream_name].append({
                     'data': data,
                     'timestamp': timestamp
                 })
                 self.time_series_data[stream_name].append(time_series_point)
+                self.size_tracker.record(stream_name, data, timestamp)
                 
                 # Maintain buffer size
-                if len(self.data_buffer[stream_name]) > self.max_buffer_size:
+                overflow = len(self.data_buffer[stream_name]) - self.max_buffer_size
+                if overflow > 0:
                     self.data_buffer[stream_name] = self.data_buffer[stream_name][-self.max_buffer_size:]
                     self.time_series_data[stream_name] = self.time_series_data[stream_name][-self.max_buffer_size:]
-                
-                # Update metrics
-                BUFFER_SIZE.set(self._calculate_buffer_size())
-                
-                return True
+                    self.size_tracker.evict(stream_name, overflow)
+            
+            self._update_comoments(stream_name, time_series_point.timestamp_ns, time_series_point.value)
+            
+            # Update metrics
+            BUFFER_SIZE.set(self._calculate_buffer_size())
+            
+            return True
         except Exception as e:
             logger.error(f"Error adding data stream: {str(e)}")
             return False
@@ -114,50 +159,155 @@ class AdvancedDataSynchronizer:
             duration = time.time() - start_time
             SYNC_DURATION.observe(duration)
     
+    def add_data_batch(self, stream_name: str, records: Any,
+                       timestamps: Optional[List[Any]] = None,
+                       fields: Optional[List[str]] = None) -> int:
+        """Add a burst of points to a stream under a single lock acquisition.
+        
+        ``records`` is a list of ``{'data': ..., 'timestamp': ...}`` points or a
+        2-D NumPy block (see ``batch_points``). Returns the number of points added.
+        """
+        start_time = time.time()
+        try:
+            points = batch_points(records, timestamps, fields)
+            time_series_points = [
+                TimeSeriesPoint(
+                    timestamp=timestamp,
+                    value=self._extract_numeric_value(data),
+                    confidence=self._calculate_confidence(data),
+                    metadata=self._extract_metadata(data),
+                    timestamp_ns=to_epoch_ns(timestamp)
+                )
+                for data, timestamp in points
+            ]
+            
+            with self._stream_lock(stream_name):
+                self.data_buffer[stream_name].extend(
+                    {'data': data, 'timestamp': timestamp} for data, timestamp in points
+                )
+                self.time_series_data[stream_name].extend(time_series_points)
+                for data, timestamp in points:
+                    self.size_tracker.record(stream_name, data, timestamp)
+                
+                # Trim once for the whole batch
+                overflow = len(self.data_buffer[stream_name]) - self.max_buffer_size
+                if overflow > 0:
+                    del self.data_buffer[stream_name][:overflow]
+                    del self.time_series_data[stream_name][:overflow]
+                    self.size_tracker.evict(stream_name, overflow)
+            
+            for point in time_series_points:
+                self._update_comoments(stream_name, point.timestamp_ns, point.value)
+            
+            BUFFER_SIZE.set(self._calculate_buffer_size())
+            
+            logger.info(f"Added {len(points)} points to stream: {stream_name}")
+            return len(points)
+        except Exception as e:
+            logger.error(f"Error adding data batch: {str(e)}")
+            return 0
+        finally:
+            duration = time.time() - start_time
+            SYNC_DURATION.observe(duration)
+    
+    def _update_comoments(self, stream_name: str, timestamp_ns: int, value: float):
+        """Pair a new point with the latest fresh point of every other stream.
+        
+        A point is paired at most once per stream pair, with the other
+        stream's most recent point if it lies within the sync window, so each
+        aligned sample updates its pair's co-moments exactly once.
+        """
+        window_ns = self.sync_window_ms * 1_000_000
+        with self.comoment_lock:
+            paired = set()
+            for other, (other_ns, other_value, other_paired) in self.latest_points.items():
+                if other == stream_name or stream_name in other_paired:
+                    continue
+                if abs(timestamp_ns - other_ns) > window_ns:
+                    continue
+                pair = tuple(sorted((stream_name, other)))
+                tracker = self.comoments.get(pair)
+                if tracker is None:
+                    tracker = SlidingCoMoments(self.correlation_window * 1_000_000_000)
+                    self.comoments[pair] = tracker
+                x, y = (value, other_value) if pair[0] == stream_name else (other_value, value)
+                tracker.add(max(timestamp_ns, other_ns), x, y)
+                other_paired.add(stream_name)
+                paired.add(other)
+            self.latest_points[stream_name] = (timestamp_ns, value, paired)
+    
+    def live_correlations(self, sync_ns: Optional[int] = None) -> Dict[str, float]:
+        """Pearson correlation of each pair's raw aligned samples, read in O(1).
+        
+        Unlike the combined scores these come straight from the co-moment
+        trackers, without preprocessing, so they are cheap enough to read on
+        every sync. With ``sync_ns`` the windows are first slid up to it.
+        """
+        with self.comoment_lock:
+            correlations = {}
+            for pair, tracker in self.comoments.items():
+                if sync_ns is not None:
+                    tracker.evict_before(sync_ns - tracker.window_ns)
+                correlations[f"{pair[0]}_{pair[1]}"] = tracker.correlation
+            return correlations
+    
     def synchronize_data(self) -> Optional[SynchronizedDataPoint]:
         """Synchronize data streams with advanced correlation."""
         start_time = time.time()
         try:
-            with self.lock:
-                if not self.data_buffer:
-                    return None
-                
-                # Get latest timestamps
-                latest_timestamps = {
-                    stream: max(p['timestamp'] for p in points)
-                    for stream, points in self.data_buffer.items()
-                }
-                
-                # Find synchronization point
-                sync_timestamp = min(latest_timestamps.values())
-                
-                # Collect synchronized data
-                synced_data = {}
-                for stream, points in self.data_buffer.items():
-                    # Find closest point to sync timestamp
-                    closest_point = min(
-                        points,
-                        key=lambda p: abs(
-                            datetime.fromisoformat(p['timestamp']) - 
-                            datetime.fromisoformat(sync_timestamp)
-                        )
+            # Snapshot every stream under its own lock; the buffers are only
+            # copied by reference, and all the work below runs unlocked
+            snapshot = {}
+            series_snapshot = {}
+            for stream in list(self.data_buffer):
+                with self.stream_locks[stream]:
+                    snapshot[stream] = list(self.data_buffer[stream])
+                    series_snapshot[stream] = list(self.time_series_data[stream])
+            snapshot = {stream: points for stream, points in snapshot.items() if points}
+            if not snapshot:
+                return None
+            
+            # Get latest timestamps
+            latest_timestamps = {
+                stream: max(p['timestamp'] for p in points)
+                for stream, points in snapshot.items()
+            }
+            
+            # Find synchronization point
+            sync_timestamp = min(latest_timestamps.values())
+            
+            # Collect synchronized data
+            synced_data = {}
+            for stream, points in snapshot.items():
+                # Find closest point to sync timestamp
+                closest_point = min(
+                    points,
+                    key=lambda p: abs(
+                        datetime.fromisoformat(p['timestamp']) - 
+                        datetime.fromisoformat(sync_timestamp)
                     )
-                    synced_data[stream] = closest_point['data']
-                
-                # Calculate correlations
-                correlations = self._calculate_correlations(synced_data)
-                
-                # Create synchronized data point
-                synchronized_point = SynchronizedDataPoint(
-                    timestamp=sync_timestamp,
-                    data_streams=synced_data,
-                    correlations=correlations,
-                    metadata=self._generate_metadata(),
-                    performance_metrics=self._calculate_performance_metrics()
                 )
-                
-                SYNC_OPERATIONS.inc()
-                return synchronized_point
+                synced_data[stream] = closest_point['data']
+            
+            # Calculate correlations over each stream's window up to the sync point
+            sync_ns = to_epoch_ns(sync_timestamp)
+            correlations = self._calculate_correlations(
+                {stream: series_snapshot[stream] for stream in synced_data}, sync_ns
+            )
+            metadata = self._generate_metadata()
+            metadata['live_correlations'] = self.live_correlations(sync_ns)
+            
+            # Create synchronized data point
+            synchronized_point = SynchronizedDataPoint(
+                timestamp=sync_timestamp,
+                data_streams=synced_data,
+                correlations=correlations,
+                metadata=metadata,
+                performance_metrics=self._calculate_performance_metrics()
+            )
+            
+            SYNC_OPERATIONS.inc()
+            return synchronized_point
         except Exception as e:
             logger.error(f"Error synchronizing data: {str(e)}")
             return None
@@ -165,48 +315,87 @@ class AdvancedDataSynchronizer:
             duration = time.time() - start_time
             SYNC_DURATION.observe(duration)
     
-    def _calculate_correlations(self, synced_data: Dict[str, Any]) -> Dict[str, float]:
-        """Calculate correlations between data streams with optimization."""
+    def _correlation_windows(self, series: Dict[str, List[TimeSeriesPoint]],
+                             sync_ns: int) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """Each stream's (timestamps, values) over the correlation window ending at ``sync_ns``."""
+        window_start_ns = sync_ns - self.correlation_window * 1_000_000_000
+        windows = {}
+        for stream, points in series.items():
+            timestamps = np.array([
+                point.timestamp_ns if point.timestamp_ns is not None else to_epoch_ns(point.timestamp)
+                for point in points
+            ], dtype=np.int64)
+            values = np.array([point.value for point in points], dtype=np.float64)
+            order = np.argsort(timestamps, kind='stable')
+            timestamps, values = timestamps[order], values[order]
+            lo = int(np.searchsorted(timestamps, window_start_ns, side='left'))
+            hi = int(np.searchsorted(timestamps, sync_ns, side='right'))
+            windows[stream] = (timestamps[lo:hi], values[lo:hi])
+        return windows
+    
+    def _calculate_correlations(self, series: Dict[str, List[TimeSeriesPoint]],
+                                sync_ns: int) -> Dict[str, float]:
+        """Calculate correlations between stream windows with optimization.
+        
+        The windows are aligned into one matrix, so every pair's score depends
+        on all of them; results are cached under the extent (length, first and
+        last timestamp) of every stream's window and recomputed as soon as any
+        window gains, loses or trims a point. Missed pairs are preprocessed
+        column-wise and every term is computed from that same preprocessed
+        input: the Pearson and Spearman matrices in a single pass each, and
+        only the DTW and cross-correlation terms per pair.
+        """
         start_time = time.time()
         try:
             correlations = {}
+            streams = list(series)
+            windows = self._correlation_windows(series, sync_ns)
+            extent = tuple(
+                (stream, len(timestamps),
+                 int(timestamps[0]) if len(timestamps) else None,
+                 int(timestamps[-1]) if len(timestamps) else None)
+                for stream, (timestamps, _) in sorted(windows.items())
+            )
             
-            # Convert data to numeric arrays
-            numeric_data = {}
-            for stream, data in synced_data.items():
-                numeric_values = [v for v in data.values() if isinstance(v, (int, float))]
-                if numeric_values:
-                    numeric_data[stream] = np.array(numeric_values)
-            
-            # Calculate correlations between streams
-            streams = list(numeric_data.keys())
+            pending = []
             for i in range(len(streams)):
                 for j in range(i + 1, len(streams)):
-                    stream1, stream2 = streams[i], streams[j]
+                    cache_key = f"{streams[i]}_{streams[j]}"
                     
                     # Check cache
-                    cache_key = f"{stream1}_{stream2}"
-                    if self.optimization_config['use_caching'] and cache_key in self.correlation_cache:
-                        correlations[cache_key] = self.correlation_cache[cache_key]
-                        continue
-                    
-                    # Calculate correlation
-                    series1 = numeric_data[stream1]
-                    series2 = numeric_data[stream2]
-                    
-                    # Preprocess data
-                    series1 = self._preprocess_data(series1)
-                    series2 = self._preprocess_data(series2)
-                    
-                    # Calculate correlation
-                    correlation = self._calculate_advanced_correlation(series1, series2)
-                    correlations[cache_key] = correlation
-                    
-                    # Update cache
                     if self.optimization_config['use_caching']:
-                        self.correlation_cache[cache_key] = correlation
-                        if len(self.correlation_cache) > self.optimization_config['cache_size']:
-                            self.correlation_cache.pop(next(iter(self.correlation_cache)))
+                        cached = self.correlation_cache.get((cache_key, extent))
+                        if cached is not None:
+                            correlations[cache_key] = cached
+                            continue
+                    pending.append((i, j, cache_key))
+            if not pending:
+                return correlations
+            
+            # Align the windows point by point and drop incomplete rows
+            names, matrix = align_windows(windows, self.sync_window_ms * 1_000_000)
+            matrix = complete_rows(matrix)
+            if len(names) < 2 or len(matrix) < 2:
+                return correlations
+            columns = {name: index for index, name in enumerate(names)}
+            
+            # Preprocess every stream, then correlate and rank all of them at once
+            matrix = self._preprocess_data(matrix)
+            pearson = pearson_matrix(matrix)
+            spearman = spearman_matrix(matrix)
+            
+            for i, j, cache_key in pending:
+                if streams[i] not in columns or streams[j] not in columns:
+                    continue
+                i, j = columns[streams[i]], columns[streams[j]]
+                correlation = self._calculate_advanced_correlation(
+                    matrix[:, i], matrix[:, j], pearson[i, j], spearman[i, j]
+                )
+                correlations[cache_key] = correlation
+                
+                # Update cache
+                if self.optimization_config['use_caching']:
+                    self.correlation_cache.put((cache_key, extent), correlation)
             
             return correlations
         except Exception as e:
@@ -216,16 +405,16 @@ class AdvancedDataSynchronizer:
             duration = time.time() - start_time
             CORRELATION_TIME.observe(duration)
     
-    def _calculate_advanced_correlation(self, series1: np.ndarray, series2: np.ndarray) -> float:
-        """Calculate advanced correlation between two time series."""
+    def _calculate_advanced_correlation(self, series1: np.ndarray, series2: np.ndarray,
+                                        pearson: float, spearman: float) -> float:
+        """Combine precomputed Pearson/Spearman with DTW and cross-correlation terms."""
         try:
-            # Calculate multiple correlation metrics
-            pearson = np.corrcoef(series1, series2)[0, 1]
-            spearman = pd.Series(series1).corr(pd.Series(series2), method='spearman')
             
-            # Calculate dynamic time warping distance
-            from dtw import dtw
-            dtw_distance = dtw(series1, series2).distance
+            # Calculate dynamic time warping distance within a Sakoe-Chiba band
+            length = max(len(series1), len(series2))
+            window_ratio = self.optimization_config.get('dtw_window_ratio', 0.1)
+            window = max(1, int(window_ratio * length)) if window_ratio is not None else None
+            warping_distance = dtw_distance(series1, series2, window=window)
             
             # Calculate cross-correlation
             cross_corr = signal.correlate(series1, series2, mode='full')
@@ -242,7 +431,7 @@ class AdvancedDataSynchronizer:
             combined_score = (
                 weights['pearson'] * pearson +
                 weights['spearman'] * spearman +
-                weights['dtw'] * (1 - dtw_distance / max(len(series1), len(series2))) +
+                weights['dtw'] * (1 - warping_distance / length) +
                 weights['cross_corr'] * (max_cross_corr / (np.std(series1) * np.std(series2) * len(series1)))
             )
             
@@ -252,23 +441,12 @@ class AdvancedDataSynchronizer:
             return 0.0
     
     def _preprocess_data(self, series: np.ndarray) -> np.ndarray:
-        """Preprocess time series data for correlation analysis."""
+        """Preprocess time series data for correlation analysis.
+        
+        A 2-D array is treated as one series per column.
+        """
         try:
-            # Normalize
-            series = (series - np.mean(series)) / np.std(series)
-            
-            # Detrend
-            series = signal.detrend(series)
-            
-            # Remove outliers
-            q1 = np.percentile(series, 25)
-            q3 = np.percentile(series, 75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            series = np.clip(series, lower_bound, upper_bound)
-            
-            return series
+            return preprocess_matrix(series)
         except Exception as e:
             logger.error(f"Error preprocessing data: {str(e)}")
             return series
@@ -322,16 +500,8 @@ class AdvancedDataSynchronizer:
         }
     
     def _calculate_buffer_size(self) -> int:
-        """Calculate total buffer size in bytes."""
-        try:
-            total_size = 0
-            for stream_data in self.data_buffer.values():
-                for point in stream_data:
-                    total_size += len(json.dumps(point).encode('utf-8'))
-            return total_size
-        except Exception as e:
-            logger.error(f"Error calculating buffer size: {str(e)}")
-            return 0
+        """Calculate total buffer size in bytes from the running size ledger."""
+        return self.size_tracker.total_bytes
     
     def export_data(self, 
                    filename: str,
@@ -0,0 +1,227 @@
+from collections import deque
+from typing import Deque, List, Sequence
+import logging
+import math
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ANOMALY_METHODS = ('zscore', 'iqr', 'rolling')
+
+
+def batch_anomaly_indices(values: Sequence[float], method: str = 'zscore',
+                          threshold: float = 3.0, window_size: int = 10) -> List[int]:
+    """Detect anomalies over a complete series.
+
+    This is the historical (batch) counterpart of ``OnlineAnomalyDetector`` and
+    the implementation behind ``TimeSeriesData.detect_anomalies``. A series
+    shorter than ``window_size`` is treated as a single rolling window.
+    """
+    values = np.asarray(values, dtype=np.float64)
+
+    if method == 'zscore':
+        z_scores = np.abs((values - np.mean(values)) / np.std(values))
+        return np.where(z_scores > threshold)[0].tolist()
+    elif method == 'iqr':
+        q1 = np.percentile(values, 25)
+        q3 = np.percentile(values, 75)
+        iqr = q3 - q1
+        lower_bound = q1 - 1.5 * iqr
+        upper_bound = q3 + 1.5 * iqr
+        return np.where((values < lower_bound) | (values > upper_bound))[0].tolist()
+    elif method == 'rolling':
+        window_size = min(window_size, len(values))
+        rolling_mean = pd.Series(values).rolling(window=window_size).mean()
+        rolling_std = pd.Series(values).rolling(window=window_size).std()
+        return np.where(
+            np.abs(values - rolling_mean) > threshold * rolling_std
+        )[0].tolist()
+    raise ValueError(f"Unsupported anomaly detection method: {method}")
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+
+    Keeps five markers regardless of how many values have been seen, so each
+    update is O(1). The estimate is exact until five values have arrived.
+    NaN and infinite values are ignored.
+    """
+
+    def __init__(self, quantile: float):
+        if not 0 < quantile < 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        self.quantile = quantile
+        self.count = 0
+        self._initial: List[float] = []
+        self._heights: List[float] = []
+        self._positions: List[float] = []
+        self._desired: List[float] = []
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def update(self, value: float):
+        if not math.isfinite(value):
+            return
+        self.count += 1
+        if len(self._initial) < 5:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                p = self.quantile
+                self._heights = sorted(self._initial)
+                self._positions = [1.0, 2.0, 3.0, 4.0, 5.0]
+                self._desired = [1.0, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5.0]
+            return
+
+        q, n = self._heights, self._positions
+        if value < q[0]:
+            q[0] = value
+            cell = 0
+        elif value >= q[4]:
+            q[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if q[i] <= value < q[i + 1])
+
+        for i in range(cell + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Adjust the three middle markers towards their desired positions
+        for i in range(1, 4):
+            offset = self._desired[i] - n[i]
+            if (offset >= 1 and n[i + 1] - n[i] > 1) or (offset <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if offset > 0 else -1
+                candidate = q[i] + step / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+                    (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = candidate
+                n[i] += step
+
+    @property
+    def value(self) -> float:
+        if not self._initial:
+            return float('nan')
+        if len(self._initial) < 5:
+            return float(np.percentile(self._initial, self.quantile * 100))
+        return self._heights[2]
+
+
+class OnlineAnomalyDetector:
+    """Per-point anomaly detection for a live stream.
+
+    Supports the same methods as ``batch_anomaly_indices``, but judges each
+    point as it arrives rather than against the whole series (see
+    ``detect_batch`` for the batch path):
+
+    - ``zscore``: Welford running mean/variance over everything seen so far
+    - ``iqr``: P-square estimates of the first and third quartiles
+    - ``rolling``: Welford mean/variance over the last ``window_size`` points,
+      updated as each point enters and leaves the window; nothing is flagged
+      until the window is full
+
+    Each ``update`` is O(1) and flags the point against statistics that include
+    it, the way the batch methods do. NaN and infinite values are never
+    flagged and leave the statistics untouched, though they still take an
+    index. The indices of the last ``history_size`` flagged points are kept
+    in ``anomalies``.
+    """
+
+    def __init__(self, method: str = 'zscore', threshold: float = 3.0, window_size: int = 10,
+                 history_size: int = 1000):
+        if method not in ANOMALY_METHODS:
+            raise ValueError(f"Unsupported anomaly detection method: {method}")
+        self.method = method
+        self.threshold = threshold
+        self.window_size = window_size
+        self.count = 0
+        self.samples = 0  # finite values included in the statistics
+        self.anomalies: Deque[int] = deque(maxlen=history_size)
+
+        # Welford accumulators
+        self.mean = 0.0
+        self._m2 = 0.0
+
+        # Rolling window accumulators
+        self._window: Deque[float] = deque()
+        self._window_mean = 0.0
+        self._window_m2 = 0.0
+
+        # Quartile sketches
+        self._q1 = P2Quantile(0.25)
+        self._q3 = P2Quantile(0.75)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of all values seen so far."""
+        return float(np.sqrt(self._m2 / self.samples)) if self.samples else float('nan')
+
+    def update(self, value: float) -> bool:
+        """Add a value and return True if it is anomalous."""
+        value = float(value)
+        index = self.count
+        self.count += 1
+        if not math.isfinite(value):
+            return False
+        self.samples += 1
+
+        if self.method == 'zscore':
+            delta = value - self.mean
+            self.mean += delta / self.samples
+            self._m2 += delta * (value - self.mean)
+            std = self.std
+            is_anomaly = std > 0 and abs(value - self.mean) / std > self.threshold
+        elif self.method == 'iqr':
+            self._q1.update(value)
+            self._q3.update(value)
+            q1, q3 = self._q1.value, self._q3.value
+            iqr = q3 - q1
+            is_anomaly = value < q1 - 1.5 * iqr or value > q3 + 1.5 * iqr
+        else:
+            self._window.append(value)
+            if len(self._window) > self.window_size:
+                # Replace the oldest value in one Welford step
+                dropped = self._window.popleft()
+                mean = self._window_mean + (value - dropped) / self.window_size
+                self._window_m2 += (value - dropped) * (value - mean + dropped - self._window_mean)
+                self._window_mean = mean
+            else:
+                delta = value - self._window_mean
+                self._window_mean += delta / len(self._window)
+                self._window_m2 += delta * (value - self._window_mean)
+            self._window_m2 = max(self._window_m2, 0.0)
+            is_anomaly = False
+            if len(self._window) == self.window_size and self.window_size > 1:
+                std = np.sqrt(self._window_m2 / (self.window_size - 1))
+                is_anomaly = abs(value - self._window_mean) > self.threshold * std
+
+        if is_anomaly:
+            self.anomalies.append(index)
+        return bool(is_anomaly)
+
+    def replay(self, values: Sequence[float]) -> List[int]:
+        """Feed a series through the detector and return the indices it flagged."""
+        offset = self.count
+        return [offset + i for i, value in enumerate(values) if self.update(value)]
+
+    @staticmethod
+    def detect_batch(values: Sequence[float], method: str = 'zscore',
+                     threshold: float = 3.0, window_size: int = 10) -> List[int]:
+        """Batch detection over historical data.
+
+        This is the batch path, returning the indices
+        ``TimeSeriesData.detect_anomalies`` reports; it does not reproduce
+        ``replay``. The batch methods use statistics of the whole series, while
+        the online ones only know the values seen so far (and estimated
+        quartiles), and a series shorter than ``window_size`` is one rolling
+        window in batch but never fills the online window.
+        """
+        return batch_anomaly_indices(values, method, threshold, window_size)
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+import hashlib
+import logging
+import sys
+import threading
+import time
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Prometheus metrics
+CACHE_HITS = Counter('correlation_cache_hits_total', 'Correlation cache hits', ['cache'])
+CACHE_MISSES = Counter('correlation_cache_misses_total', 'Correlation cache misses', ['cache'])
+CACHE_EVICTIONS = Counter(
+    'correlation_cache_evictions_total', 'Correlation cache evictions', ['cache', 'reason']
+)
+CACHE_BYTES = Gauge('correlation_cache_size_bytes', 'Estimated size of cached correlation results', ['cache'])
+
+
+def array_digest(*arrays: Any) -> str:
+    """Fast content digest of aligned input arrays, for use as a cache key.
+
+    Hashes each array's dtype, shape and raw buffer with xxh3 when
+    ``xxhash`` is installed and BLAKE2b otherwise; nothing is stringified.
+    """
+    digest = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape}".encode())
+        if array.dtype.hasobject:
+            # Object arrays hold pointers; hash their values instead
+            digest.update(repr(array.tolist()).encode())
+        else:
+            digest.update(memoryview(array.reshape(-1)).cast('B'))
+    return digest.hexdigest()
+
+
+def estimate_size(value: Any) -> int:
+    """Rough in-memory size of a cached result in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class CorrelationCache:
+    """Thread-safe LRU cache for correlation results with TTL and size bounds.
+
+    Entries expire ``ttl_seconds`` after they were stored, and the least
+    recently used entries are evicted once there are more than
+    ``max_entries`` of them or their estimated size exceeds ``max_bytes``.
+    Hits, misses and evictions (by reason) are exported to Prometheus under
+    the cache's ``name``.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000,
+                 ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, float, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry)
+
+    def _expired(self, entry: Tuple[Any, float, int]) -> bool:
+        return self.ttl_seconds is not None and self.clock() - entry[1] > self.ttl_seconds
+
+    def _remove(self, key: Hashable, reason: Optional[str] = None):
+        _, _, size = self._entries.pop(key)
+        self.nbytes -= size
+        if reason is not None:
+            self.evictions += 1
+            CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached result and mark it recently used, or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key, 'ttl')
+                entry = None
+            if entry is None:
+                self.misses += 1
+                CACHE_MISSES.labels(cache=self.name).inc()
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            CACHE_HITS.labels(cache=self.name).inc()
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None):
+        """Store a result, evicting expired and least recently used entries as needed."""
+        size = estimate_size(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                logger.warning(f"Result of {size} bytes exceeds the {self.name} cache limit; not cached")
+                CACHE_BYTES.labels(cache=self.name).set(self.nbytes)
+                return
+            self._entries[key] = (value, self.clock(), size)
+            self.nbytes += size
+            self._evict()
+            CACHE_BYTES.labels(cache=self.name).set(self.nbytes)
+
+    def _evict(self):
+        if self.ttl_seconds is not None:
+            # Sweep expired entries from the least recently used end; any
+            # left behind a live entry are dropped when next looked up
+            while self._entries:
+                key = next(iter(self._entries))
+                if not self._expired(self._entries[key]):
+                    break
+                self._remove(key, 'ttl')
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)), 'lru')
+        while self.max_bytes is not None and self.nbytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)), 'bytes')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            CACHE_BYTES.labels(cache=self.name).set(0)
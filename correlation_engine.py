@@ -0,0 +1,410 @@
+from collections import deque
+from dataclasses import dataclass
+from functools import reduce
+from multiprocessing import shared_memory
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import logging
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.special import erf
+from scipy.stats import rankdata
+
+from stream_buffer import asof_indices
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CORRELATION_METHODS = ('pearson', 'spearman')
+
+# Direct lagged dot products beat the FFT below this many multiply-adds
+# per pair, relative to the transform size
+DIRECT_CROSS_CORRELATION_FACTOR = 4
+
+
+def stack_streams(streams: Dict[str, Sequence[float]]) -> Tuple[List[str], np.ndarray]:
+    """Stack equally long, already aligned stream windows into a (rows, streams) matrix."""
+    names = list(streams)
+    if not names:
+        return names, np.empty((0, 0))
+    columns = [np.asarray(streams[name], dtype=np.float64).ravel() for name in names]
+    if len({len(column) for column in columns}) > 1:
+        raise ValueError("Stream windows must be aligned to the same length")
+    return names, np.column_stack(columns)
+
+
+def align_windows(streams: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                  tolerance_ns: Optional[int] = None) -> Tuple[List[str], np.ndarray]:
+    """Align per-stream ``(timestamps_ns, values)`` windows into one matrix.
+
+    The stream with the fewest points drives the timeline and every other
+    stream contributes its nearest point within ``tolerance_ns`` (NaN when
+    there is none), so each row holds one observation per stream.
+    """
+    streams = {name: window for name, window in streams.items() if len(window[0])}
+    names = list(streams)
+    if not names:
+        return names, np.empty((0, 0))
+    timeline = min((window[0] for window in streams.values()), key=len)
+    matrix = np.full((len(timeline), len(names)), np.nan)
+    for column, name in enumerate(names):
+        timestamps, values = streams[name]
+        indices = asof_indices(timeline, timestamps, tolerance_ns)
+        matched = indices >= 0
+        matrix[matched, column] = np.asarray(values, dtype=np.float64)[indices[matched]]
+    return names, matrix
+
+
+def complete_rows(matrix: np.ndarray) -> np.ndarray:
+    """Drop every row with a missing value (listwise deletion)."""
+    return matrix[~np.isnan(matrix).any(axis=1)]
+
+
+def rank_columns(matrix: np.ndarray) -> np.ndarray:
+    """Rank every column at once, averaging ties."""
+    return rankdata(matrix, axis=0)
+
+
+def pearson_matrix(matrix: np.ndarray) -> np.ndarray:
+    """Pearson correlation between all columns in a single matrix product.
+
+    Columns without variance correlate as NaN.
+    """
+    rows, count = matrix.shape
+    if rows < 2:
+        return np.full((count, count), np.nan)
+    centered = matrix - matrix.mean(axis=0)
+    norms = np.sqrt(np.einsum('ij,ij->j', centered, centered))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = centered / norms
+        correlation = scaled.T @ scaled
+    correlation[:, norms == 0] = np.nan
+    correlation[norms == 0, :] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def spearman_matrix(matrix: np.ndarray) -> np.ndarray:
+    """Spearman correlation between all columns, ranking each column once."""
+    return pearson_matrix(rank_columns(matrix))
+
+
+def correlation_matrices(matrix: np.ndarray,
+                         methods: Sequence[str] = CORRELATION_METHODS) -> Dict[str, np.ndarray]:
+    """Compute the requested correlation matrices over the complete rows of a matrix."""
+    matrix = complete_rows(matrix)
+    matrices = {}
+    for method in methods:
+        if method == 'pearson':
+            matrices[method] = pearson_matrix(matrix)
+        elif method == 'spearman':
+            matrices[method] = spearman_matrix(matrix)
+        else:
+            raise ValueError(f"Unsupported correlation method: {method}")
+    return matrices
+
+
+def pair_correlations(names: List[str], matrix: np.ndarray) -> Dict[str, float]:
+    """Flatten the upper triangle of a correlation matrix into ``{'a_b': r}``.
+
+    Pairs whose correlation is undefined are left out.
+    """
+    correlations = {}
+    rows, cols = np.triu_indices(len(names), k=1)
+    for i, j in zip(rows.tolist(), cols.tolist()):
+        value = matrix[i, j]
+        if not np.isnan(value):
+            correlations[f"{names[i]}_{names[j]}"] = float(value)
+    return correlations
+
+
+@dataclass
+class ColumnMoments:
+    """Mergeable first and second moments of a block of matrix rows."""
+    count: int
+    mean: np.ndarray
+    comoment: np.ndarray  # sum of centred cross-products between columns
+
+
+def column_moments(matrix: np.ndarray) -> ColumnMoments:
+    """Moments of all columns of a (rows, streams) matrix."""
+    count = len(matrix)
+    if not count:
+        width = matrix.shape[1]
+        return ColumnMoments(0, np.zeros(width), np.zeros((width, width)))
+    mean = matrix.mean(axis=0)
+    centered = matrix - mean
+    return ColumnMoments(count, mean, centered.T @ centered)
+
+
+def merge_moments(first: ColumnMoments, second: ColumnMoments) -> ColumnMoments:
+    """Combine the moments of two disjoint row blocks (Chan et al. pairwise update)."""
+    if not first.count:
+        return second
+    if not second.count:
+        return first
+    count = first.count + second.count
+    delta = second.mean - first.mean
+    return ColumnMoments(
+        count,
+        first.mean + delta * (second.count / count),
+        first.comoment + second.comoment + np.outer(delta, delta) * (first.count * second.count / count)
+    )
+
+
+def moments_correlation(moments: ColumnMoments) -> np.ndarray:
+    """Pearson correlation matrix from merged moments; columns without variance are NaN."""
+    width = len(moments.mean)
+    if moments.count < 2:
+        return np.full((width, width), np.nan)
+    deviations = np.sqrt(np.diag(moments.comoment))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = moments.comoment / np.outer(deviations, deviations)
+    correlation[:, deviations == 0] = np.nan
+    correlation[deviations == 0, :] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def shared_column_moments(name: str, shape: Tuple[int, int], start: int, stop: int) -> ColumnMoments:
+    """Moments of rows ``[start, stop)`` of a float64 matrix held in shared memory.
+
+    Runs in worker processes; only the block name and the row range cross
+    the process boundary, and only the small moments come back. The
+    creating process owns the block and unlinks it.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        moments = column_moments(np.ndarray(shape, dtype=np.float64, buffer=block.buf)[start:stop])
+    finally:
+        block.close()
+    return moments
+
+
+def shared_rank_columns(name: str, shape: Tuple[int, int], first: int, last: int):
+    """Rank value columns ``[first, last)`` of a shared values-then-ranks block in place.
+
+    The block holds the stream values in its left half and their ranks in
+    its right half; this fills the ranks of the given streams.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        width = shape[1] // 2
+        matrix[:, width + first:width + last] = rank_columns(matrix[:, first:last])
+        del matrix
+    finally:
+        block.close()
+
+
+def chunked_correlation_matrices(matrix: np.ndarray, bounds: Sequence[Tuple[int, int]],
+                                 executor: Optional[Any] = None) -> Dict[str, np.ndarray]:
+    """Pearson and Spearman matrices from per-chunk moments.
+
+    Every column is ranked over all rows, so Spearman uses global ranks.
+    With an ``executor``, the values are copied once into a shared-memory
+    block, the workers rank groups of columns into the same block, and then
+    reduce each ``[start, stop)`` chunk of rows to its moments; only block
+    names, ranges and moments are pickled. The moments are merged in chunk
+    order, so the result does not depend on scheduling.
+    """
+    rows, width = matrix.shape
+    shape = (rows, 2 * width)
+    if executor is None or len(bounds) < 2 or not rows:
+        combined = np.hstack([matrix, rank_columns(matrix)]) if rows else np.empty(shape)
+        chunks = [column_moments(combined[start:stop]) for start, stop in bounds]
+    else:
+        block = shared_memory.SharedMemory(create=True, size=rows * 2 * width * 8)
+        try:
+            np.ndarray(shape, dtype=np.float64, buffer=block.buf)[:, :width] = matrix
+
+            groups = np.array_split(np.arange(width), min(len(bounds), width))
+            for future in [
+                executor.submit(shared_rank_columns, block.name, shape, int(group[0]), int(group[-1]) + 1)
+                for group in groups
+            ]:
+                future.result()
+
+            futures = [
+                executor.submit(shared_column_moments, block.name, shape, start, stop)
+                for start, stop in bounds
+            ]
+            chunks = [future.result() for future in futures]
+        finally:
+            block.close()
+            block.unlink()
+
+    empty = ColumnMoments(0, np.zeros(2 * width), np.zeros((2 * width, 2 * width)))
+    moments = reduce(merge_moments, chunks, empty)
+    correlation = moments_correlation(moments)
+    return {
+        'pearson': correlation[:width, :width],
+        'spearman': correlation[width:, width:]
+    }
+
+
+def _lag_overlap(lags: np.ndarray, length1: int, length2: int) -> np.ndarray:
+    """Number of overlapping samples of two series at each lag."""
+    return np.where(lags >= 0, np.minimum(length1 - lags, length2), np.minimum(length1, length2 + lags))
+
+
+def _direct_products(x: np.ndarray, y: np.ndarray, lags: np.ndarray) -> np.ndarray:
+    """Lagged products ``sum(x[n + lag] * y[n])``, one dot product per lag."""
+    products = np.empty(len(lags))
+    for index, lag in enumerate(lags.tolist()):
+        if lag >= 0:
+            count = min(len(x) - lag, len(y))
+            products[index] = np.dot(x[lag:lag + count], y[:count]) if count > 0 else 0.0
+        else:
+            count = min(len(x), len(y) + lag)
+            products[index] = np.dot(x[:count], y[-lag:-lag + count]) if count > 0 else 0.0
+    return products
+
+
+def cross_correlation_batch(series: Sequence[Sequence[float]], pairs: Sequence[Tuple[int, int]],
+                            max_lag: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Normalised cross-correlation curves for many series pairs.
+
+    Lags run from ``-max_lag`` to ``max_lag`` (every overlapping lag when
+    None), a positive lag meaning the first series trails the second, as in
+    ``scipy.signal.correlation_lags``. Each series is centred and, for long
+    series, transformed once with a real FFT padded just enough that the
+    lags of interest do not wrap around; short series with few lags use
+    direct dot products instead.
+
+    Each result holds the ``lags``, the ``curve`` of correlations in
+    [-1, 1], the ``peak_lag`` and ``peak_correlation`` with the largest
+    magnitude, the unnormalised ``peak_product``, and the ``confidence``
+    that the peak is not noise. The confidence is the two-sided normal
+    significance ``erf(|r| * sqrt(n / 2))`` of a correlation over ``n``
+    overlapping white-noise samples, raised to the number of lags searched
+    so that picking the largest of many lags is not rewarded.
+    """
+    centred = {}
+    for index in {index for pair in pairs for index in pair}:
+        values = np.asarray(series[index], dtype=np.float64)
+        centred[index] = values - values.mean() if len(values) else values
+
+    longest = max((len(values) for values in centred.values()), default=0)
+    max_lag = longest - 1 if max_lag is None else min(max_lag, max(longest - 1, 0))
+    transform_size = next_fast_len(longest + max_lag, real=True) if longest else 0
+    use_fft = longest * (2 * max_lag + 1) > \
+        DIRECT_CROSS_CORRELATION_FACTOR * transform_size * np.log2(max(transform_size, 2))
+    spectra = {index: rfft(values, transform_size) for index, values in centred.items()} if use_fft else {}
+
+    results = []
+    for i, j in pairs:
+        x, y = centred[i], centred[j]
+        # Only lags where the series overlap
+        lags = np.arange(max(-max_lag, 1 - len(y)), min(max_lag, len(x) - 1) + 1)
+        if use_fft:
+            products = irfft(spectra[i] * np.conj(spectra[j]), transform_size)[lags]
+        else:
+            products = _direct_products(x, y, lags)
+
+        norm = np.sqrt(np.dot(x, x) * np.dot(y, y))
+        if not len(x) or not len(y) or norm == 0:
+            curve = np.full(len(lags), np.nan)
+            results.append({
+                'lags': lags, 'curve': curve, 'peak_lag': 0, 'peak_correlation': float('nan'),
+                'peak_product': float('nan'), 'confidence': float('nan')
+            })
+            continue
+
+        curve = np.clip(products / norm, -1.0, 1.0)
+        peak = int(np.argmax(np.abs(curve)))
+        overlap = _lag_overlap(lags[peak:peak + 1], len(x), len(y))[0]
+        results.append({
+            'lags': lags,
+            'curve': curve,
+            'peak_lag': int(lags[peak]),
+            'peak_correlation': float(curve[peak]),
+            'peak_product': float(products[peak]),
+            'confidence': float(erf(abs(curve[peak]) * np.sqrt(max(overlap, 0) / 2)) ** len(lags))
+        })
+    return results
+
+
+def cross_correlation(series1: Sequence[float], series2: Sequence[float],
+                      max_lag: Optional[int] = None) -> Dict[str, Any]:
+    """Normalised cross-correlation of two series; see ``cross_correlation_batch``."""
+    return cross_correlation_batch([series1, series2], [(0, 1)], max_lag)[0]
+
+
+class SlidingCoMoments:
+    """Running co-moments of a paired sample window for O(1) Pearson updates.
+
+    Keeps the paired samples of the last ``window_ns`` nanoseconds with their
+    sums, sums of squares and cross-product, adjusting them as samples are
+    added and evicted. Values are shifted by the first sample of the window to
+    limit cancellation. ``version`` changes whenever the window does, so it
+    can key cached results.
+    """
+
+    def __init__(self, window_ns: int):
+        self.window_ns = window_ns
+        self.samples: Deque[Tuple[int, float, float]] = deque()
+        self.version = 0
+        self._shift: Optional[Tuple[float, float]] = None
+        self._reset()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def _reset(self):
+        self._sx = self._sy = self._sxx = self._syy = self._sxy = 0.0
+
+    def _accumulate(self, x: float, y: float, sign: float):
+        dx = x - self._shift[0]
+        dy = y - self._shift[1]
+        self._sx += sign * dx
+        self._sy += sign * dy
+        self._sxx += sign * dx * dx
+        self._syy += sign * dy * dy
+        self._sxy += sign * dx * dy
+
+    def add(self, timestamp_ns: int, x: float, y: float):
+        """Add a paired sample and slide the window up to it."""
+        if self._shift is None:
+            self._shift = (x, y)
+        self.samples.append((timestamp_ns, x, y))
+        self._accumulate(x, y, 1.0)
+        self.version += 1
+        self.evict_before(timestamp_ns - self.window_ns)
+
+    def evict_before(self, timestamp_ns: int) -> int:
+        """Drop samples older than ``timestamp_ns`` and return how many were dropped."""
+        count = 0
+        while self.samples and self.samples[0][0] < timestamp_ns:
+            _, x, y = self.samples.popleft()
+            self._accumulate(x, y, -1.0)
+            count += 1
+        if count:
+            self.version += 1
+            if not self.samples:
+                # Start the next window from exact zeros
+                self._shift = None
+                self._reset()
+        return count
+
+    @property
+    def correlation(self) -> float:
+        """Pearson correlation of the window, NaN when undefined."""
+        n = len(self.samples)
+        if n < 2:
+            return float('nan')
+        covariance = self._sxy - self._sx * self._sy / n
+        variance_x = self._sxx - self._sx * self._sx / n
+        variance_y = self._syy - self._sy * self._sy / n
+        # Variance lost to rounding against the shifted moments counts as none
+        if variance_x <= 1e-10 * self._sxx or variance_y <= 1e-10 * self._syy:
+            return float('nan')
+        return float(np.clip(covariance / np.sqrt(variance_x * variance_y), -1.0, 1.0))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """The window's timestamps and paired values as arrays."""
+        if not self.samples:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        timestamps, x, y = zip(*self.samples)
+        return np.array(timestamps, dtype=np.int64), np.array(x), np.array(y)
@@ -0,0 +1,126 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import sqlite3
+import threading
+
+from stream_buffer import from_epoch_ns, to_epoch_ns
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+STORE_FILE = 'correlations.db'
+LEGACY_PATTERN = 'correlation_*.json'
+IMPORTED_SUFFIX = '.imported'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp);
+CREATE TABLE IF NOT EXISTS results (
+    analysis TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    result TEXT NOT NULL,
+    PRIMARY KEY (analysis, run_id)
+) WITHOUT ROWID;
+"""
+
+
+class CorrelationStore:
+    """SQLite store for correlation results.
+
+    Every run is a row of ``runs`` indexed by timestamp (nanoseconds since
+    the epoch), and each top-level analysis of the run is a compact JSON row
+    of ``results`` keyed by (analysis, run). The latest run is one index
+    lookup, and the history of one analysis reads only that analysis' rows.
+
+    Per-run ``correlation_<YYYYmmdd_HHMMSS>.json`` files from earlier versions
+    are imported once, when the store is opened, and renamed with an
+    ``.imported`` suffix so they are kept but never imported twice. Queries
+    never touch the directory.
+    """
+
+    def __init__(self, directory: str, filename: str = STORE_FILE):
+        self.directory = Path(directory)
+        self.path = self.directory / filename
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(SCHEMA)
+        self.import_legacy()
+
+    def append(self, correlations: Dict[str, Any], timestamp: Optional[datetime] = None) -> int:
+        """Store the results of one run and return its id."""
+        timestamp_ns = to_epoch_ns(timestamp or datetime.now())
+        rows = [(analysis, json.dumps(result, separators=(',', ':')))
+                for analysis, result in correlations.items()]
+        with self._lock, self._connection:
+            run_id = self._connection.execute(
+                'INSERT INTO runs (timestamp) VALUES (?)', (timestamp_ns,)
+            ).lastrowid
+            self._connection.executemany(
+                'INSERT INTO results (analysis, run_id, result) VALUES (?, ?, ?)',
+                [(analysis, run_id, result) for analysis, result in rows]
+            )
+        return run_id
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        """Results of the most recent run, or None when nothing is stored."""
+        with self._lock:
+            run = self._connection.execute(
+                'SELECT id FROM runs ORDER BY timestamp DESC, id DESC LIMIT 1'
+            ).fetchone()
+            if run is None:
+                return None
+            rows = self._connection.execute(
+                'SELECT analysis, result FROM results WHERE run_id = ?', run
+            ).fetchall()
+        return {analysis: json.loads(result) for analysis, result in rows}
+
+    def history(self, analysis: str, start_time: Optional[datetime] = None,
+                end_time: Optional[datetime] = None) -> List[Tuple[datetime, Any]]:
+        """``(timestamp, result)`` of one analysis for runs within a time range, oldest first."""
+        start_ns = to_epoch_ns(start_time) if start_time is not None else -2 ** 63
+        end_ns = to_epoch_ns(end_time) if end_time is not None else 2 ** 63 - 1
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT runs.timestamp, results.result FROM runs '
+                'JOIN results ON results.run_id = runs.id AND results.analysis = ? '
+                'WHERE runs.timestamp BETWEEN ? AND ? ORDER BY runs.timestamp, runs.id',
+                (analysis, start_ns, end_ns)
+            ).fetchall()
+        return [(from_epoch_ns(timestamp_ns), json.loads(result)) for timestamp_ns, result in rows]
+
+    def import_legacy(self) -> int:
+        """Copy per-run JSON result files into the store; return how many were imported.
+
+        Runs when the store is opened. Each imported file is renamed to
+        ``<name>.imported`` rather than deleted, so it no longer matches and
+        can be restored by renaming it back.
+        """
+        imported = 0
+        for file_path in sorted(self.directory.glob(LEGACY_PATTERN)):
+            try:
+                timestamp = datetime.strptime(file_path.stem[len('correlation_'):], '%Y%m%d_%H%M%S')
+                with open(file_path, 'r') as f:
+                    correlations = json.load(f)
+                self.append(correlations, timestamp)
+                file_path.rename(file_path.with_name(file_path.name + IMPORTED_SUFFIX))
+                imported += 1
+            except Exception as e:
+                logger.error(f"Error importing correlation results from {file_path}: {e}")
+        if imported:
+            logger.info(f"Imported {imported} correlation result files into {self.path}")
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
@@ -4,8 +4,25 @@ import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
-from typing import Dict, List, Optional, Any
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict
+from scipy.stats import kendalltau
+
+from correlation_cache import CorrelationCache, array_digest
+from correlation_engine import (
+    chunked_correlation_matrices, complete_rows, correlation_matrices, cross_correlation,
+    cross_correlation_batch, stack_streams
+)
+from correlation_store import CorrelationStore
+from dynamic_time_warping import dtw_batch, dtw_distance
+from file_catalog import FileCatalog
+from preprocessing import preprocess_matrix
+from record_decoder import HID_FIELDS, WEBCAM_FIELDS, RecordDecoder, resample_minutes
 
 # Configure logging
 logging.basicConfig(
@@ -14,14 +31,103 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+GRANGER_MAX_LAG = 5
+EXPENSIVE_METRICS = ('mutual_information', 'granger_causality')
+_MISSING = object()
+
+def mutual_information(series1: np.ndarray, series2: np.ndarray) -> float:
+    """Calculate mutual information between two time series."""
+    try:
+        from sklearn.feature_selection import mutual_info_regression
+        mi = mutual_info_regression(
+            series1.reshape(-1, 1),
+            series2,
+            random_state=42
+        )
+        return float(mi[0])
+    except Exception as e:
+        logger.error(f"Error calculating mutual information: {str(e)}")
+        return np.nan
+
+def granger_causality(series1: np.ndarray, series2: np.ndarray) -> Dict[str, float]:
+    """Calculate Granger causality p-values for lags 1..GRANGER_MAX_LAG."""
+    try:
+        from statsmodels.tsa.stattools import grangercausalitytests
+        data = np.column_stack((series1, series2))
+        results = grangercausalitytests(data, maxlag=GRANGER_MAX_LAG, verbose=False)
+        
+        causality = {}
+        for lag in results:
+            f_test = results[lag][0]['ssr_chi2test']
+            causality[f'lag_{lag}'] = float(f_test[1])  # p-value
+        
+        return causality
+    except Exception as e:
+        logger.error(f"Error calculating Granger causality: {str(e)}")
+        return {'error': np.nan}
+
+class MinuteResampler:
+    """Minute means of time-indexed rows inside a sliding window.
+    
+    Keeps the rows inside the window; each update drops the rows before the
+    new start, appends the new rows and resamples only the minutes they
+    touch, so ``minutes`` always equals ``rows.resample('1min').mean()``.
+    """
+    
+    def __init__(self):
+        self.rows: Optional[pd.DataFrame] = None
+        self.minutes: Optional[pd.DataFrame] = None
+    
+    @property
+    def empty(self) -> bool:
+        return self.rows is None or self.rows.empty
+    
+    def update(self, start_time: datetime, new_rows: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Slide the window to ``start_time`` and add rows that follow the current ones."""
+        rows, head, tail = self.rows, None, None
+        if rows is not None:
+            position = rows.index.searchsorted(pd.Timestamp(start_time))
+            if position:
+                # The minute of the last evicted row may still hold later rows
+                head = rows.index[position - 1].floor('min')
+                rows = rows.iloc[position:]
+        if not new_rows.empty:
+            tail = new_rows.index[0].floor('min')
+            rows = new_rows if rows is None or rows.empty else pd.concat([rows, new_rows])
+        self.rows = rows
+        
+        if self.empty:
+            self.minutes = None
+            return None
+        
+        parts = [] if self.minutes is None else [self.minutes]
+        if head is not None:
+            parts.append(self._resample(rows.iloc[:rows.index.searchsorted(head + pd.Timedelta(minutes=1))]))
+        if tail is not None:
+            parts.append(self._resample(rows.iloc[rows.index.searchsorted(tail):]))
+        minutes = pd.concat(parts)
+        minutes = minutes[~minutes.index.duplicated(keep='last')]
+        
+        # Minutes before the first row drop out and empty minutes read as NaN
+        first, last = rows.index[0].floor('min'), rows.index[-1].floor('min')
+        self.minutes = minutes.reindex(pd.date_range(first, last, freq='min', name=rows.index.name))
+        return self.minutes
+    
+    @staticmethod
+    def _resample(rows: pd.DataFrame) -> pd.DataFrame:
+        return resample_minutes(rows)
+
 class DataCorrelator:
     def __init__(self, config: Dict = None):
-        self.config = config or {
+        defaults = {
             'webcam_data_dir': 'webcam_data',
             'hid_data_dir': 'hid_system_data',
             'correlation_data_dir': 'correlation_data',
             'time_window': 300,  # 5 minutes in seconds
             'correlation_interval': 3600,  # 1 hour in seconds
+            'cross_correlation_max_lag': 5,  # in samples (minutes once resampled), None for every lag
+            'loader_threads': 4,  # threads reading data files in parallel
+            'compact_after_hours': None,  # age in hours for compact_data_files(), which deletes raw files; None keeps them
             'correlation_methods': [
                 'pearson',
                 'spearman',
@@ -34,9 +140,15 @@ class DataCorrelator:
             'optimization': {
                 'use_caching': True,
                 'cache_size': 1000,
+                'cache_ttl_seconds': 3600,
+                'cache_max_bytes': 64 * 1024 * 1024,
                 'parallel_processing': True,
                 'batch_size': 100,
                 'use_gpu': False,
+                'process_workers': None,  # process pool size, None for one per CPU
+                'expensive_metrics_every': 1,  # cheap mode: refresh MI/Granger every N cycles
+                'dtw_window_ratio': 0.1,  # DTW band radius as a fraction of the window, None for unconstrained
+                'incremental': False,  # keep minute-level data between correlate_data runs
                 'preprocessing': {
                     'normalize': True,
                     'detrend': True,
@@ -45,16 +157,55 @@ class DataCorrelator:
             }
         }
         
+        # Fill in any settings a partial config leaves out
+        self.config = {**defaults, **(config or {})}
+        self.config['optimization'] = {
+            **defaults['optimization'],
+            **self.config['optimization'],
+            'preprocessing': {
+                **defaults['optimization']['preprocessing'],
+                **self.config['optimization'].get('preprocessing', {})
+            }
+        }
+        
         # Create directories
         self.webcam_dir = Path(self.config['webcam_data_dir'])
         self.hid_dir = Path(self.config['hid_data_dir'])
         self.correlation_dir = Path(self.config['correlation_data_dir'])
         self.correlation_dir.mkdir(exist_ok=True)
+        self.correlation_store = CorrelationStore(self.correlation_dir)
+        
+        # Time-partitioned indexes over the data files
+        compact_after = self.config['compact_after_hours']
+        compact_after = timedelta(hours=compact_after) if compact_after is not None else None
+        self.webcam_catalog = FileCatalog(
+            self.webcam_dir, 'analysis_*.json', compact_after, self.config['loader_threads']
+        )
+        self.hid_catalog = FileCatalog(
+            self.hid_dir, 'metrics_*.json', compact_after, self.config['loader_threads']
+        )
         
         # Initialize correlation cache
-        self.correlation_cache = {}
-        self.cache_hits = 0
-        self.cache_misses = 0
+        self.correlation_cache = self._create_cache('data_correlator')
+        
+        # Chunked correlation moments, mutual information and Granger
+        # causality run on a process pool; the latter two are memoised by
+        # the content of their input windows
+        self.metric_cache = self._create_cache('correlation_metrics')
+        self.last_expensive_metrics: Dict[str, Dict[str, Any]] = {}
+        self.correlation_cycles = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        # Incremental mode: the window covered by the last run and the
+        # minute means of each source inside it
+        self._window: Optional[Tuple[datetime, datetime]] = None
+        self._webcam_minutes = MinuteResampler()
+        self._hid_minutes = MinuteResampler()
+        
+        # Typed decoders from loaded records to column arrays
+        self.webcam_decoder = RecordDecoder(WEBCAM_FIELDS, required='posture')
+        self.hid_decoder = RecordDecoder(HID_FIELDS)
         
         # Initialize GPU if available
         self.gpu_available = False
@@ -66,166 +217,283 @@ class DataCorrelator:
             except ImportError:
                 logger.warning("CuPy not available. Falling back to CPU processing.")
         
+    def _create_cache(self, name: str) -> CorrelationCache:
+        optimization = self.config['optimization']
+        return CorrelationCache(
+            name,
+            max_entries=optimization['cache_size'],
+            ttl_seconds=optimization['cache_ttl_seconds'],
+            max_bytes=optimization['cache_max_bytes']
+        )
+    
+    @property
+    def cache_hits(self) -> int:
+        return self.correlation_cache.hits
+    
+    @property
+    def cache_misses(self) -> int:
+        return self.correlation_cache.misses
+    
     def load_webcam_data(self, start_time: datetime, end_time: datetime) -> List[Dict]:
         """Load webcam analysis data within the specified time range."""
-        data = []
-        
-        # Load analysis files
-        for file_path in self.webcam_dir.glob('analysis_*.json'):
-            file_time = datetime.strptime(
-                file_path.stem.split('_')[1],
-                '%Y%m%d_%H%M%S'
-            )
-            
-            if start_time <= file_time <= end_time:
-                try:
-                    with open(file_path, 'r') as f:
-                        file_data = json.load(f)
-                        data.append(file_data)
-                except Exception as e:
-                    logger.error(f"Error loading webcam data from {file_path}: {e}")
-        
-        return sorted(data, key=lambda x: x['timestamp'])
+        return self.webcam_catalog.load(start_time, end_time)
     
     def load_hid_data(self, start_time: datetime, end_time: datetime) -> List[Dict]:
         """Load HID metrics data within the specified time range."""
-        data = []
-        
-        # Load metrics files
-        for file_path in self.hid_dir.glob('metrics_*.json'):
-            file_time = datetime.strptime(
-                file_path.stem.split('_')[1],
-                '%Y%m%d_%H%M%S'
-            )
-            
-            if start_time <= file_time <= end_time:
-                try:
-                    with open(file_path, 'r') as f:
-                        file_data = json.load(f)
-                        if isinstance(file_data, list):
-                            data.extend(file_data)
-                        else:
-                            data.append(file_data)
-                except Exception as e:
-                    logger.error(f"Error loading HID data from {file_path}: {e}")
-        
-        return sorted(data, key=lambda x: x['timestamp'])
+        return self.hid_catalog.load(start_time, end_time)
+    
+    def _dtw_window(self, length: int) -> Optional[int]:
+        """Sakoe-Chiba band radius for series of the given length."""
+        window_ratio = self.config['optimization']['dtw_window_ratio']
+        if window_ratio is None:
+            return None
+        return max(1, int(window_ratio * length))
     
     def _calculate_dynamic_time_warping(self, series1: np.ndarray, series2: np.ndarray) -> float:
         """Calculate Dynamic Time Warping distance between two time series."""
-        try:
-            from dtw import dtw
-            alignment = dtw(series1, series2)
-            return alignment.distance
-        except ImportError:
-            logger.warning("DTW package not installed. Using Euclidean distance instead.")
-            return np.linalg.norm(series1 - series2)
+        return dtw_distance(series1, series2, window=self._dtw_window(max(len(series1), len(series2))))
     
     def _preprocess_data(self, series: np.ndarray) -> np.ndarray:
-        """Preprocess time series data for correlation analysis."""
-        if self.config['optimization']['preprocessing']['normalize']:
-            series = (series - np.mean(series)) / np.std(series)
-        
-        if self.config['optimization']['preprocessing']['detrend']:
-            from scipy import signal
-            series = signal.detrend(series)
-        
-        if self.config['optimization']['preprocessing']['remove_outliers']:
-            q1 = np.percentile(series, 25)
-            q3 = np.percentile(series, 75)
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            series = np.clip(series, lower_bound, upper_bound)
-        
-        return series
+        """Preprocess time series data for correlation analysis.
+        
+        A 2-D array is treated as one series per column.
+        """
+        preprocessing = self.config['optimization']['preprocessing']
+        return preprocess_matrix(
+            series,
+            normalize=preprocessing['normalize'],
+            detrend=preprocessing['detrend'],
+            remove_outliers=preprocessing['remove_outliers']
+        )
     
     def _calculate_mutual_information(self, series1: np.ndarray, series2: np.ndarray) -> float:
         """Calculate mutual information between two time series."""
-        try:
-            from sklearn.feature_selection import mutual_info_regression
-            mi = mutual_info_regression(
-                series1.reshape(-1, 1),
-                series2,
-                random_state=42
-            )
-            return float(mi[0])
-        except Exception as e:
-            logger.error(f"Error calculating mutual information: {str(e)}")
-            return np.nan
+        results = self._calculate_expensive_metrics(
+            {'pair': (series1, series2)}, metrics=('mutual_information',)
+        )
+        return results['pair']['mutual_information']
     
     def _calculate_granger_causality(self, series1: np.ndarray, series2: np.ndarray) -> Dict[str, float]:
         """Calculate Granger causality between two time series."""
-        try:
-            from statsmodels.tsa.stattools import grangercausalitytests
-            data = np.column_stack((series1, series2))
-            results = grangercausalitytests(data, maxlag=5, verbose=False)
-            
-            causality = {}
-            for lag in results:
-                f_test = results[lag][0]['ssr_chi2test']
-                causality[f'lag_{lag}'] = float(f_test[1])  # p-value
-            
-            return causality
-        except Exception as e:
-            logger.error(f"Error calculating Granger causality: {str(e)}")
-            return {'error': np.nan}
+        results = self._calculate_expensive_metrics(
+            {'pair': (series1, series2)}, metrics=('granger_causality',)
+        )
+        return results['pair']['granger_causality']
     
-    def _calculate_cross_correlation(self, series1: np.ndarray, series2: np.ndarray) -> Dict[str, float]:
-        """Calculate cross-correlation between two time series."""
+    def _process_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Persistent process pool for chunked and expensive metrics, started on first use."""
+        if not self.config['optimization']['parallel_processing']:
+            return None
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.config['optimization']['process_workers'],
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+    
+    def _calculate_expensive_metrics(self, windows: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                                     context: str = '',
+                                     metrics: Tuple[str, ...] = EXPENSIVE_METRICS) -> Dict[str, Dict[str, Any]]:
+        """Calculate mutual information and Granger causality for many series pairs.
+        
+        Results are memoised by a content hash of each pair's windows, and
+        misses are fanned out to the process pool (or run inline when
+        parallel processing is off). In cheap mode the metrics are refreshed
+        only every ``expensive_metrics_every`` cycles and the last result for
+        the same ``context`` and pair is served in between.
+        """
+        functions = {
+            'mutual_information': mutual_information,
+            'granger_causality': granger_causality
+        }
+        results = {}
+        
+        every = max(1, self.config['optimization']['expensive_metrics_every'])
+        if self.correlation_cycles % every:
+            for pair in windows:
+                last = self.last_expensive_metrics.get(f"{context}{pair}", {})
+                if all(metric in last for metric in metrics):
+                    results[pair] = last
+        
+        pending = [pair for pair in windows if pair not in results]
+        executor = self._process_executor() if pending else None
+        futures = {}
+        for pair in pending:
+            series1, series2 = windows[pair]
+            digest = array_digest(series1, series2)
+            results[pair] = {}
+            for metric in metrics:
+                function = functions[metric]
+                cached = self.metric_cache.get((metric, digest), _MISSING)
+                if cached is not _MISSING:
+                    results[pair][metric] = cached
+                    continue
+                if executor is not None:
+                    try:
+                        futures[(pair, metric, digest)] = executor.submit(function, series1, series2)
+                        continue
+                    except Exception as e:
+                        logger.warning(f"Process pool unavailable, calculating {metric} inline: {str(e)}")
+                        if isinstance(e, BrokenProcessPool):
+                            # Started again on the next call
+                            self._reset_executor()
+                            executor = None
+                self._store_metric(results, pair, metric, digest, function(series1, series2))
+        
+        for (pair, metric, digest), future in futures.items():
+            try:
+                value = future.result()
+            except Exception as e:
+                logger.error(f"Error calculating {metric} in worker: {str(e)}")
+                if isinstance(e, BrokenProcessPool):
+                    self._reset_executor()
+                value = functions[metric](*windows[pair])
+            self._store_metric(results, pair, metric, digest, value)
+        
+        for pair in pending:
+            self.last_expensive_metrics[f"{context}{pair}"] = results[pair]
+        return results
+    
+    def _store_metric(self, results: Dict[str, Dict[str, Any]], pair: str, metric: str,
+                      digest: str, value: Any):
+        results[pair][metric] = value
+        self.metric_cache.put((metric, digest), value)
+    
+    def _reset_executor(self):
+        """Shut down and drop the process pool; the next use starts a new one."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+    
+    def compact_data_files(self) -> int:
+        """Compact closed hours of webcam and HID files into chunks; return files compacted.
+        
+        Maintenance for when ``compact_after_hours`` is set: the raw
+        ``analysis_*``/``metrics_*`` files are deleted once compacted.
+        """
+        return self.webcam_catalog.compact() + self.hid_catalog.compact()
+    
+    def close(self):
+        """Shut down the process pool and loader threads, and close the result store."""
+        self._reset_executor()
+        self.webcam_catalog.close()
+        self.hid_catalog.close()
+        self.correlation_store.close()
+    
+    def _calculate_cross_correlation(self, series1: np.ndarray, series2: np.ndarray) -> Dict[str, Any]:
+        """Calculate cross-correlation between two time series within the configured lag limit."""
         try:
-            from scipy import signal
-            correlation = signal.correlate(series1, series2, mode='full')
-            lags = signal.correlation_lags(len(series1), len(series2))
-            
-            # Find the lag with maximum correlation
-            max_corr_idx = np.argmax(np.abs(correlation))
-            max_corr = correlation[max_corr_idx]
-            max_lag = lags[max_corr_idx]
-            
-            return {
-                'max_correlation': float(max_corr),
-                'max_lag': int(max_lag),
-                'normalized_correlation': float(max_corr / (np.std(series1) * np.std(series2) * len(series1)))
-            }
+            return self._format_cross_correlation(
+                cross_correlation(series1, series2, self.config['cross_correlation_max_lag'])
+            )
         except Exception as e:
             logger.error(f"Error calculating cross-correlation: {str(e)}")
             return {'error': np.nan}
     
-    def _calculate_correlations(self, synced_data: Dict[str, Any]) -> Dict[str, float]:
-        """Calculate correlations between different data streams with enhanced methods."""
+    def _format_cross_correlation(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a cross-correlation result into JSON-friendly values."""
+        return {
+            'max_correlation': result['peak_product'],
+            'max_lag': result['peak_lag'],
+            'normalized_correlation': result['peak_correlation'],
+            'confidence': result['confidence'],
+            'lags': result['lags'].tolist(),
+            'curve': result['curve'].tolist()
+        }
+    
+    def _stream_series(self, data: Any) -> Optional[np.ndarray]:
+        """Reduce a stream window to one numeric value per row.
+        
+        Multi-column windows (DataFrames, 2-D arrays) are averaged across columns.
+        """
+        if isinstance(data, pd.DataFrame):
+            return data.mean(axis=1, numeric_only=True).to_numpy(dtype=np.float64)
+        if isinstance(data, pd.Series):
+            return pd.to_numeric(data, errors='coerce').to_numpy(dtype=np.float64)
+        if isinstance(data, (np.ndarray, list)):
+            array = np.asarray(data, dtype=np.float64)
+            return np.nanmean(array, axis=1) if array.ndim == 2 else array.ravel()
+        return None
+    
+    def _parallel_correlation_matrices(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """Pearson and Spearman matrices from row chunks reduced on the process pool.
+        
+        Chunks hold at least ``batch_size`` rows, with at most one per worker.
+        If a worker dies, the pool is reset and the matrices are computed inline.
+        """
+        workers = self.config['optimization']['process_workers'] or os.cpu_count() or 1
+        chunk_rows = max(self.config['optimization']['batch_size'], -(-len(matrix) // workers))
+        bounds = [(start, min(start + chunk_rows, len(matrix))) for start in range(0, len(matrix), chunk_rows)]
+        try:
+            return chunked_correlation_matrices(matrix, bounds, self._process_executor())
+        except BrokenProcessPool as e:
+            logger.warning(f"Process pool broken, calculating correlation matrices inline: {str(e)}")
+            self._reset_executor()
+            return correlation_matrices(matrix)
+    
+    def _calculate_correlations(self, synced_data: Dict[str, Any], context: str = '',
+                                parallel: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Calculate correlations between aligned stream windows with enhanced methods.
+        
+        Every stream window must cover the same rows. Rows with a missing value
+        in any stream are dropped, and the Pearson and Spearman matrices for all
+        streams are computed in one vectorised pass.
+        """
         correlations = {}
         
         try:
-            # Convert data to numeric arrays where possible
+            # Convert stream windows to aligned numeric series
             numeric_data = {}
             for stream, data in synced_data.items():
-                if isinstance(data, dict):
-                    # Extract numeric values from dictionaries
-                    numeric_values = [v for v in data.values() if isinstance(v, (int, float))]
-                    if numeric_values:
-                        numeric_data[stream] = np.array(numeric_values)
+                series = self._stream_series(data)
+                if series is not None:
+                    numeric_data[stream] = series
+            
+            streams, matrix = stack_streams(numeric_data)
+            matrix = complete_rows(matrix)
+            if len(streams) < 2 or len(matrix) < 2:
+                return correlations
+            
+            # Preprocess every stream and compute the correlation matrices once,
+            # from chunked moments on the process pool when running in parallel
+            matrix = self._preprocess_data(matrix)
+            if parallel:
+                matrices = self._parallel_correlation_matrices(matrix)
+            else:
+                matrices = correlation_matrices(matrix)
+            
+            # DTW distances and cross-correlations for every pair in one batch,
+            # transforming each stream once
+            pairs = [(i, j) for i in range(len(streams)) for j in range(i + 1, len(streams))]
+            distances = dtw_batch(
+                [(matrix[:, i], matrix[:, j]) for i, j in pairs],
+                window=self._dtw_window(len(matrix))
+            )
+            cross_correlations = cross_correlation_batch(
+                list(matrix.T), pairs, self.config['cross_correlation_max_lag']
+            )
+            
+            # Mutual information and Granger causality for every pair on the process pool
+            expensive = self._calculate_expensive_metrics(
+                {f"{streams[i]}_{streams[j]}": (matrix[:, i], matrix[:, j]) for i, j in pairs},
+                context
+            )
             
-            # Calculate correlations between streams
-            streams = list(numeric_data.keys())
-            for i in range(len(streams)):
-                for j in range(i + 1, len(streams)):
-                    stream1, stream2 = streams[i], streams[j]
-                    
-                    # Preprocess data
-                    series1 = self._preprocess_data(numeric_data[stream1])
-                    series2 = self._preprocess_data(numeric_data[stream2])
-                    
-                    # Calculate various correlation metrics
-                    correlations[f"{stream1}_{stream2}"] = {
-                        'pearson': float(np.corrcoef(series1, series2)[0, 1]),
-                        'spearman': float(spearmanr(series1, series2)[0]),
-                        'kendall': float(kendalltau(series1, series2)[0]),
-                        'dtw': float(self._calculate_dynamic_time_warping(series1, series2)),
-                        'mutual_information': self._calculate_mutual_information(series1, series2),
-                        'granger_causality': self._calculate_granger_causality(series1, series2),
-                        'cross_correlation': self._calculate_cross_correlation(series1, series2)
-                    }
+            # Calculate the remaining pairwise metrics between streams
+            for (i, j), distance, cross in zip(pairs, distances, cross_correlations):
+                series1, series2 = matrix[:, i], matrix[:, j]
+                pair = f"{streams[i]}_{streams[j]}"
+                correlations[pair] = {
+                    'pearson': float(matrices['pearson'][i, j]),
+                    'spearman': float(matrices['spearman'][i, j]),
+                    'kendall': float(kendalltau(series1, series2)[0]),
+                    'dtw': float(distance),
+                    'mutual_information': expensive[pair]['mutual_information'],
+                    'granger_causality': expensive[pair]['granger_causality'],
+                    'cross_correlation': self._format_cross_correlation(cross)
+                }
         
         except Exception as e:
             logger.error(f"Error calculating correlations: {str(e)}")
@@ -234,120 +502,104 @@ class DataCorrelator:
     
     def _optimize_correlation_calculation(self, 
                                         webcam_df: pd.DataFrame, 
-                                        hid_df: pd.DataFrame) -> Dict[str, Any]:
-        """Optimize correlation calculation using caching and parallel processing."""
-        correlations = {}
+                                        hid_df: pd.DataFrame,
+                                        name: str = '') -> Dict[str, Any]:
+        """Optimize correlation calculation using caching and parallel processing.
+        
+        ``name`` identifies the analysis, so cheap mode serves each analysis
+        its own last expensive metrics.
+        """
         cache_key = None
         
         if self.config['optimization']['use_caching']:
-            # Create cache key from dataframes
-            cache_key = hash(str(webcam_df.values.tobytes()) + str(hid_df.values.tobytes()))
-            if cache_key in self.correlation_cache:
-                self.cache_hits += 1
-                return self.correlation_cache[cache_key]
-            self.cache_misses += 1
+            # Key the cache by the content of the aligned input arrays
+            cache_key = array_digest(webcam_df.values, hid_df.values)
+            cached = self.correlation_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
         try:
-            # Process in batches if parallel processing is enabled
-            if self.config['optimization']['parallel_processing']:
-                from concurrent.futures import ThreadPoolExecutor
-                
-                def process_batch(batch):
-                    return self._calculate_correlations(batch)
-                
-                # Split data into batches
-                batch_size = self.config['optimization']['batch_size']
-                batches = []
-                for i in range(0, len(webcam_df), batch_size):
-                    batch = {
-                        'webcam': webcam_df.iloc[i:i+batch_size],
-                        'hid': hid_df.iloc[i:i+batch_size]
-                    }
-                    batches.append(batch)
-                
-                # Process batches in parallel
-                with ThreadPoolExecutor() as executor:
-                    batch_results = list(executor.map(process_batch, batches))
-                
-                # Combine results
-                for result in batch_results:
-                    for method, value in result.items():
-                        if method not in correlations:
-                            correlations[method] = []
-                        correlations[method].append(value)
-                
-                # Average the results
-                correlations = {method: np.nanmean(values) 
-                              for method, values in correlations.items()}
-            else:
-                correlations = self._calculate_correlations(
-                    {
-                        'webcam': webcam_df.values,
-                        'hid': hid_df.values
-                    }
-                )
+            # With parallel processing, Pearson and Spearman are merged from
+            # per-chunk moments computed on the process pool; the remaining
+            # metrics always use the whole aligned window
+            correlations = self._calculate_correlations(
+                {
+                    'webcam': webcam_df.values,
+                    'hid': hid_df.values
+                },
+                f"{name}:",
+                parallel=self.config['optimization']['parallel_processing']
+            )
             
             # Cache results if enabled
             if self.config['optimization']['use_caching']:
-                self.correlation_cache[cache_key] = correlations
-                # Maintain cache size
-                if len(self.correlation_cache) > self.config['optimization']['cache_size']:
-                    self.correlation_cache.pop(next(iter(self.correlation_cache)))
+                self.correlation_cache.put(cache_key, correlations)
             
             return correlations
         except Exception as e:
             logger.error(f"Error in optimized correlation calculation: {str(e)}")
             return {method: np.nan for method in self.config['correlation_methods']}
     
+    def _webcam_frame(self, webcam_data: List[Dict]) -> pd.DataFrame:
+        """Webcam records as a DataFrame indexed by timestamp."""
+        return self.webcam_decoder.frame(webcam_data)
+    
+    def _hid_frame(self, hid_data: List[Dict]) -> pd.DataFrame:
+        """HID records as a DataFrame indexed by timestamp."""
+        return self.hid_decoder.frame(hid_data)
+    
+    def _incremental_minutes(self, start_time: datetime,
+                             end_time: datetime) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
+        """Minute means of both sources, reusing the data of the previous run.
+        
+        When the window only slid forward, just the records after the previous
+        end are loaded and the rows before the new start are evicted; any
+        other window starts over. Records are assumed to arrive in time order:
+        one written after a run with a timestamp before that run's end is only
+        picked up once the window is reset.
+        """
+        if self._window is None or not self._window[0] <= start_time <= self._window[1]:
+            self._webcam_minutes = MinuteResampler()
+            self._hid_minutes = MinuteResampler()
+            load_start = start_time
+        else:
+            # Loads are inclusive, and the previous end was already covered
+            load_start = self._window[1] + timedelta(microseconds=1)
+        self._window = (start_time, end_time)
+        
+        webcam_minutes = self._webcam_minutes.update(
+            start_time, self._webcam_frame(self.load_webcam_data(load_start, end_time))
+        )
+        hid_minutes = self._hid_minutes.update(
+            start_time, self._hid_frame(self.load_hid_data(load_start, end_time))
+        )
+        return webcam_minutes, hid_minutes
+    
     def correlate_data(self, start_time: Optional[datetime] = None) -> Dict:
-        """Correlate webcam and HID data with advanced optimization."""
+        """Correlate webcam and HID data with advanced optimization.
+        
+        With ``incremental`` optimization, minute-level data is carried over
+        from the previous run and only new records are loaded.
+        """
         end_time = datetime.now()
         if start_time is None:
             start_time = end_time - timedelta(seconds=self.config['correlation_interval'])
         
-        # Load data
-        webcam_data = self.load_webcam_data(start_time, end_time)
-        hid_data = self.load_hid_data(start_time, end_time)
-        
-        # Convert to pandas DataFrames
-        webcam_df = pd.DataFrame([
-            {
-                'timestamp': d['timestamp'],
-                'posture_quality': d['posture']['posture_quality'],
-                'shoulder_alignment': d['posture']['shoulder_alignment'],
-                'back_straightness': d['posture']['back_straightness'],
-                'head_position': d['posture']['head_position'],
-                'face_count': len(d['faces'])
-            }
-            for d in webcam_data if 'posture' in d
-        ])
-        
-        hid_df = pd.DataFrame([
-            {
-                'timestamp': d['timestamp'],
-                'cpu_percent': d['system']['cpu_percent'],
-                'memory_percent': d['system']['memory_percent'],
-                'key_presses': d['hid']['keyboard_events']['key_presses'],
-                'mouse_clicks': d['hid']['mouse_events']['clicks'],
-                'active_window': d['hid']['active_window']
-            }
-            for d in hid_data
-        ])
+        if self.config['optimization']['incremental']:
+            webcam_resampled, hid_resampled = self._incremental_minutes(start_time, end_time)
+        else:
+            # Load data
+            webcam_df = self._webcam_frame(self.load_webcam_data(start_time, end_time))
+            hid_df = self._hid_frame(self.load_hid_data(start_time, end_time))
+            
+            # Resample and align data
+            webcam_resampled = None if webcam_df.empty else resample_minutes(webcam_df)
+            hid_resampled = None if hid_df.empty else resample_minutes(hid_df)
         
-        if webcam_df.empty or hid_df.empty:
+        if webcam_resampled is None or hid_resampled is None:
             logger.warning("Insufficient data for correlation analysis")
             return {}
         
-        # Convert timestamps and set index
-        webcam_df['timestamp'] = pd.to_datetime(webcam_df['timestamp'])
-        hid_df['timestamp'] = pd.to_datetime(hid_df['timestamp'])
-        webcam_df.set_index('timestamp', inplace=True)
-        hid_df.set_index('timestamp', inplace=True)
-        
-        # Resample and align data
-        webcam_resampled = webcam_df.resample('1T').mean()
-        hid_resampled = hid_df.resample('1T').mean()
-        
         # Merge dataframes
         merged_df = pd.merge(
             webcam_resampled,
@@ -361,11 +613,13 @@ class DataCorrelator:
         correlations = {
             'posture_vs_activity': self._optimize_correlation_calculation(
                 merged_df[['posture_quality']],
-                merged_df[['key_presses', 'mouse_clicks']].mean(axis=1)
+                merged_df[['key_presses', 'mouse_clicks']].mean(axis=1),
+                'posture_vs_activity'
             ),
             'system_impact': self._optimize_correlation_calculation(
                 merged_df[['posture_quality']],
-                merged_df[['cpu_percent', 'memory_percent']].mean(axis=1)
+                merged_df[['cpu_percent', 'memory_percent']].mean(axis=1),
+                'system_impact'
             ),
             'time_patterns': self._analyze_time_patterns(merged_df),
             'environmental_factors': self._analyze_environmental_factors(merged_df),
@@ -379,6 +633,7 @@ class DataCorrelator:
         
         # Save correlation results
         self._save_correlation_results(correlations)
+        self.correlation_cycles += 1
         
         return correlations
     
@@ -450,26 +705,30 @@ class DataCorrelator:
         return factors
     
     def _save_correlation_results(self, correlations: Dict) -> None:
-        """Save correlation results to file."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_path = self.correlation_dir / f"correlation_{timestamp}.json"
-        
-        with open(file_path, 'w') as f:
-            json.dump(correlations, f, indent=2)
+        """Save correlation results to the result store."""
+        run_id = self.correlation_store.append(correlations)
         
-        logger.info(f"Saved correlation results to {file_path}")
+        logger.info(f"Saved correlation results as run {run_id} in {self.correlation_store.path}")
     
     def get_latest_correlation(self) -> Optional[Dict]:
         """Get the most recent correlation results."""
         try:
-            latest_file = max(self.correlation_dir.glob('correlation_*.json'))
-            with open(latest_file, 'r') as f:
-                return json.load(f)
+            return self.correlation_store.latest()
         except Exception as e:
             logger.error(f"Error loading latest correlation: {e}")
             return None
+    
+    def get_correlation_history(self, analysis: str, start_time: Optional[datetime] = None,
+                                end_time: Optional[datetime] = None) -> List[Tuple[datetime, Any]]:
+        """Get ``(timestamp, result)`` pairs of one analysis (e.g. 'posture_vs_activity') over a time range."""
+        try:
+            return self.correlation_store.history(analysis, start_time, end_time)
+        except Exception as e:
+            logger.error(f"Error loading correlation history: {e}")
+            return []
 
 if __name__ == "__main__":
     correlator = DataCorrelator()
     correlations = correlator.correlate_data()
+    correlator.close()
     print(json.dumps(correlations, indent=2)) 
\ No newline at end of file
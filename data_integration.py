@@ -1,10 +1,19 @@
 import json
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Any, Set, Tuple
 import threading
 from dataclasses import dataclass, asdict
 import logging
+import os
 from pathlib import Path
+import numpy as np
+from prometheus_client import Counter, Gauge
+
+from file_catalog import columns_to_records, records_to_columns
+from segment_log import SegmentLog
+from stream_buffer import encoded_size, to_epoch_ns
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +22,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Prometheus metrics
+HOT_TIER_POINTS = Gauge('integration_hot_tier_points', 'Data points held in memory by the integration engine')
+HOT_TIER_BYTES = Gauge('integration_hot_tier_bytes', 'Encoded size of the data points held in memory')
+SPILLED_POINTS = Counter('integration_spilled_points_total', 'Data points spilled from memory to disk')
+
+SPILL_INDEX = 'chunks.json'
+SPILL_PATTERN = 'chunk_*.json'
+
 @dataclass
 class DataPoint:
     source: str
@@ -21,18 +38,91 @@ class DataPoint:
     timestamp: str
     metadata: Optional[Dict[str, Any]] = None
 
+class PointIndex:
+    """Data points of one (source, type) pair, sorted by timestamp.
+    
+    Timestamps (nanoseconds since the epoch) and insertion sequence numbers
+    are kept in parallel ``array('q')`` columns, so a time range resolves to
+    a slice by bisection.
+    """
+    
+    def __init__(self):
+        self.timestamps = array('q')
+        self.sequence = array('q')
+        self.points: List[DataPoint] = []
+    
+    def add(self, timestamp_ns: int, sequence: int, data_point: DataPoint):
+        if not self.timestamps or timestamp_ns >= self.timestamps[-1]:
+            self.timestamps.append(timestamp_ns)
+            self.sequence.append(sequence)
+            self.points.append(data_point)
+        else:
+            # Out-of-order point, e.g. after a clock adjustment
+            position = bisect_right(self.timestamps, timestamp_ns)
+            self.timestamps.insert(position, timestamp_ns)
+            self.sequence.insert(position, sequence)
+            self.points.insert(position, data_point)
+    
+    def range(self, start_ns: Optional[int], end_ns: Optional[int]) -> Tuple[int, int]:
+        """Slice bounds of the points with ``start_ns <= timestamp <= end_ns``."""
+        lo = bisect_left(self.timestamps, start_ns) if start_ns is not None else 0
+        hi = bisect_right(self.timestamps, end_ns) if end_ns is not None else len(self.points)
+        return lo, hi
+    
+    def evict(self, sequence: int):
+        """Drop the points inserted before ``sequence``."""
+        kept = [position for position, value in enumerate(self.sequence) if value >= sequence]
+        if len(kept) == len(self.points):
+            return
+        if not kept or kept[0] == len(self.points) - len(kept):
+            # The evicted points are a prefix, as they are unless clocks moved
+            del self.timestamps[:len(self.points) - len(kept)]
+            del self.sequence[:len(self.points) - len(kept)]
+            del self.points[:len(self.points) - len(kept)]
+        else:
+            self.timestamps = array('q', (self.timestamps[position] for position in kept))
+            self.sequence = array('q', (self.sequence[position] for position in kept))
+            self.points = [self.points[position] for position in kept]
+
+@dataclass(eq=False)
+class SpilledChunk:
+    """Columnar file of data points spilled from the hot tier.
+    
+    Until the file has been written, ``rows`` holds the chunk's
+    ``(timestamp, sequence, point)`` rows, so queries still find them.
+    """
+    name: str
+    count: int
+    start_ns: int
+    end_ns: int
+    keys: Set[Tuple[str, str]]
+    first_sequence: int
+    rows: Optional[List[Tuple[int, int, DataPoint]]] = None
+
 class DataIntegrationEngine:
     def __init__(self, storage_path: str = "integrated_data"):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
         
+        # Hot tier: the most recent points, in insertion order
         self.data_points: List[DataPoint] = []
+        self.indexes: Dict[Tuple[str, str], PointIndex] = {}
+        self.hot_timestamps = array('q')
+        self.hot_sizes = array('q')
+        self.hot_bytes = 0
         self.lock = threading.Lock()
         self.sources: Dict[str, Any] = {}
         
         # Initialize data storage
         self._initialize_storage()
         
+        # Cold tier: older points spilled to disk, oldest first. Chunks persist
+        # under storage_path/spill and are found again on startup
+        self.spill_path = self.storage_path / "spill"
+        self.spilled_chunks: List[SpilledChunk] = self._load_spilled_chunks()
+        self.sequence = max((chunk.first_sequence + chunk.count for chunk in self.spilled_chunks), default=0)
+        self._spill_lock = threading.Lock()
+        
         # Export configuration
         self.export_config = {
             'formats': ['json', 'csv', 'parquet', 'hdf5'],
@@ -42,7 +132,23 @@ class DataIntegrationEngine:
                 'algorithm': 'gzip'
             },
             'batch_size': 1000,
-            'max_file_size': 100 * 1024 * 1024  # 100MB
+            'max_file_size': 100 * 1024 * 1024,  # 100MB, also the raw log segment size
+            'fsync_interval': 1.0  # seconds between fsyncs of the raw log
+        }
+        
+        # Append-only daily log of raw data points
+        self.raw_log = SegmentLog(
+            self.storage_path / "raw",
+            max_segment_bytes=self.export_config['max_file_size'],
+            fsync_interval=self.export_config['fsync_interval']
+        )
+        
+        # Hot tier limits; None disables a limit
+        self.hot_tier_config = {
+            'max_points': 100_000,
+            'max_bytes': 256 * 1024 * 1024,  # 256MB of encoded points
+            'max_age_seconds': None,
+            'spill_batch': 10_000  # minimum points per spilled chunk
         }
 
     def _initialize_storage(self):
@@ -50,6 +156,88 @@ class DataIntegrationEngine:
         self.storage_path.mkdir(exist_ok=True)
         (self.storage_path / "raw").mkdir(exist_ok=True)
         (self.storage_path / "processed").mkdir(exist_ok=True)
+        (self.storage_path / "spill").mkdir(exist_ok=True)
+
+    def _load_spilled_chunks(self) -> List[SpilledChunk]:
+        """Rediscover the chunks spilled by earlier runs from the spill index.
+        
+        Chunk files missing from the index (written just before a crash) are
+        indexed from their contents, and index entries without a file are dropped.
+        """
+        chunks = {}
+        index_path = self.spill_path / SPILL_INDEX
+        try:
+            with open(index_path, 'r') as f:
+                for entry in json.load(f)['chunks']:
+                    entry['keys'] = {tuple(key) for key in entry['keys']}
+                    chunks[entry['name']] = SpilledChunk(**entry)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable spill index {index_path}: {str(e)}")
+            chunks = {}
+        
+        present = {path.name for path in self.spill_path.glob(SPILL_PATTERN)}
+        for name in set(chunks) - present:
+            del chunks[name]
+        for name in present - set(chunks):
+            try:
+                chunks[name] = self._index_chunk(name)
+            except Exception as e:
+                logger.error(f"Error indexing spilled chunk {name}: {str(e)}")
+        if chunks:
+            logger.info(f"Found {len(chunks)} spilled chunks in {self.spill_path}")
+        return sorted(chunks.values(), key=lambda chunk: chunk.first_sequence)
+
+    def _index_chunk(self, name: str) -> SpilledChunk:
+        with open(self.spill_path / name, 'r') as f:
+            data = json.load(f)
+        sources = data['columns'][json.dumps(['source'])]
+        types = data['columns'][json.dumps(['type'])]
+        return SpilledChunk(
+            name=name,
+            count=len(data['timestamps']),
+            start_ns=data['timestamps'][0],
+            end_ns=data['timestamps'][-1],
+            keys=set(zip(sources, types)),
+            first_sequence=min(data['sequence'])
+        )
+
+    def _write_spill_index(self):
+        """Record the written chunks in the spill index, atomically."""
+        with self._spill_lock:
+            with self.lock:
+                entries = [
+                    {
+                        'name': chunk.name,
+                        'count': chunk.count,
+                        'start_ns': chunk.start_ns,
+                        'end_ns': chunk.end_ns,
+                        'keys': sorted(chunk.keys),
+                        'first_sequence': chunk.first_sequence
+                    }
+                    for chunk in self.spilled_chunks if chunk.rows is None
+                ]
+            index_path = self.spill_path / SPILL_INDEX
+            temporary = index_path.with_suffix('.tmp')
+            with open(temporary, 'w') as f:
+                json.dump({'chunks': entries}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, index_path)
+            self._fsync_spill_directory()
+    
+    def _fsync_spill_directory(self):
+        """Make renames in the spill directory durable."""
+        try:
+            fd = os.open(self.spill_path, os.O_RDONLY)
+        except OSError:
+            # Directories cannot be opened for syncing on every platform
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
 
     def register_source(self, source_name: str, source_handler: Any):
         """Register a new data source with its handler."""
@@ -69,8 +257,7 @@ class DataIntegrationEngine:
                 metadata=metadata
             )
             
-            with self.lock:
-                self.data_points.append(data_point)
+            self._append_point(data_point)
             
             # Save raw data
             self._save_raw_data(data_point)
@@ -81,58 +268,252 @@ class DataIntegrationEngine:
             logger.error(f"Error adding data point: {str(e)}")
             return False
 
+    def _append_point(self, data_point: DataPoint):
+        """Append a data point and add it to the index of its (source, type).
+        
+        When the hot tier goes over a limit, the oldest points are detached
+        under the lock and written to disk after it is released.
+        """
+        timestamp_ns = to_epoch_ns(data_point.timestamp)
+        key = (data_point.source, data_point.type)
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                index = self.indexes[key] = PointIndex()
+            index.add(timestamp_ns, self.sequence, data_point)
+            self.sequence += 1
+            self.data_points.append(data_point)
+            size = encoded_size(asdict(data_point), data_point.timestamp)
+            self.hot_timestamps.append(timestamp_ns)
+            self.hot_sizes.append(size)
+            self.hot_bytes += size
+            
+            count = self._spill_count()
+            chunk = self._detach_spill(count) if count else None
+            self._update_hot_tier_metrics()
+        
+        if chunk is not None:
+            self._write_spilled(chunk)
+
+    def _spill_count(self) -> int:
+        """Number of the oldest hot points to spill to bring the hot tier within its limits."""
+        config = self.hot_tier_config
+        count = 0
+        if config['max_points'] is not None:
+            count = max(count, len(self.data_points) - config['max_points'])
+        if config['max_bytes'] is not None and self.hot_bytes > config['max_bytes']:
+            excess = self.hot_bytes - config['max_bytes']
+            freed = over = 0
+            while freed < excess:
+                freed += self.hot_sizes[over]
+                over += 1
+            count = max(count, over)
+        if config['max_age_seconds'] is not None:
+            cutoff_ns = to_epoch_ns(datetime.now() - timedelta(seconds=config['max_age_seconds']))
+            expired = 0
+            while expired < len(self.data_points) and self.hot_timestamps[expired] < cutoff_ns:
+                expired += 1
+            count = max(count, expired)
+        if not count:
+            return 0
+        # Spill in batches, so chunks are few and spills rare
+        return min(len(self.data_points), max(count, config['spill_batch']))
+
+    def _detach_spill(self, count: int) -> SpilledChunk:
+        """Move the ``count`` oldest hot points into a pending chunk; call with the lock held.
+        
+        The chunk's rows are sorted by timestamp and keep their insertion
+        sequence numbers, so queries can bisect the chunk and merge it with
+        the hot tier.
+        """
+        first = self.sequence - len(self.data_points)
+        points = self.data_points[:count]
+        timestamps = self.hot_timestamps[:count]
+        order = sorted(range(count), key=lambda position: timestamps[position])
+        chunk = SpilledChunk(
+            name=f"chunk_{first:012d}.json",
+            count=count,
+            start_ns=timestamps[order[0]],
+            end_ns=timestamps[order[-1]],
+            keys={(point.source, point.type) for point in points},
+            first_sequence=first,
+            rows=[(timestamps[position], first + position, points[position]) for position in order]
+        )
+        self.spilled_chunks.append(chunk)
+        
+        for key in list(self.indexes):
+            self.indexes[key].evict(first + count)
+            if not self.indexes[key].points:
+                del self.indexes[key]
+        del self.data_points[:count]
+        del self.hot_timestamps[:count]
+        self.hot_bytes -= sum(self.hot_sizes[:count])
+        del self.hot_sizes[:count]
+        return chunk
+
+    def _write_spilled(self, chunk: SpilledChunk):
+        """Write a pending chunk to disk as columns, then drop its rows from memory.
+        
+        Runs without the engine lock, so producers keep ingesting. If the
+        chunk cannot be written its rows stay in memory.
+        """
+        path = self.spill_path / chunk.name
+        try:
+            data = records_to_columns([asdict(point) for _, _, point in chunk.rows])
+            data['sequence'] = [sequence for _, sequence, _ in chunk.rows]
+            temporary = path.with_suffix('.tmp')
+            with open(temporary, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, path)
+            self._fsync_spill_directory()
+        except Exception as e:
+            logger.error(f"Error spilling data points: {str(e)}")
+            return
+        
+        with self.lock:
+            chunk.rows = None
+            cleared = not any(spilled is chunk for spilled in self.spilled_chunks)
+        if cleared:
+            # clear_data() ran while the chunk was being written
+            path.unlink(missing_ok=True)
+            return
+        self._write_spill_index()
+        SPILLED_POINTS.inc(chunk.count)
+        logger.info(f"Spilled {chunk.count} data points to {path}")
+
+    def _update_hot_tier_metrics(self):
+        HOT_TIER_POINTS.set(len(self.data_points))
+        HOT_TIER_BYTES.set(self.hot_bytes)
+
+    def _read_spilled(self, chunks: List[SpilledChunk], source: Optional[str], data_type: Optional[str],
+                      start_ns: Optional[int], end_ns: Optional[int]) -> List[Tuple[List[int], List[int], List[DataPoint]]]:
+        """Matching points of spilled chunks as ``(timestamps, sequence, points)`` per chunk.
+        
+        Chunks are pruned by time range, then by their (source, type) pairs,
+        before any file is opened.
+        """
+        chunks = [
+            chunk for chunk in chunks
+            if (start_ns is None or chunk.end_ns >= start_ns) and (end_ns is None or chunk.start_ns <= end_ns)
+        ]
+        parts = []
+        for chunk in chunks:
+            if not any((not source or point_source == source) and (not data_type or point_type == data_type)
+                       for point_source, point_type in chunk.keys):
+                continue
+            rows = chunk.rows
+            if rows is not None:
+                # Still being written; read the rows held in memory
+                rows = [
+                    row for row in rows
+                    if (start_ns is None or row[0] >= start_ns) and (end_ns is None or row[0] <= end_ns)
+                    and (not source or row[2].source == source) and (not data_type or row[2].type == data_type)
+                ]
+                if rows:
+                    parts.append(tuple(list(column) for column in zip(*rows)))
+                continue
+            try:
+                with open(self.spill_path / chunk.name, 'r') as f:
+                    data = json.load(f)
+            except FileNotFoundError:
+                # Removed by clear_data() since the query started
+                continue
+            timestamps = data['timestamps']
+            lo = bisect_left(timestamps, start_ns) if start_ns is not None else 0
+            hi = bisect_right(timestamps, end_ns) if end_ns is not None else len(timestamps)
+            sources = data['columns'][json.dumps(['source'])]
+            types = data['columns'][json.dumps(['type'])]
+            rows = [
+                row for row in range(lo, hi)
+                if (not source or sources[row] == source) and (not data_type or types[row] == data_type)
+            ]
+            if rows:
+                parts.append((
+                    [timestamps[row] for row in rows],
+                    [data['sequence'][row] for row in rows],
+                    [DataPoint(**record) for record in columns_to_records(data, rows=rows)]
+                ))
+        return parts
+
     def _save_raw_data(self, data_point: DataPoint):
-        """Save raw data to storage."""
+        """Append raw data to the day's segment of the raw log."""
         try:
             timestamp = datetime.fromisoformat(data_point.timestamp)
-            date_str = timestamp.strftime("%Y-%m-%d")
-            
-            # Create daily directory
-            daily_dir = self.storage_path / "raw" / date_str
-            daily_dir.mkdir(exist_ok=True)
-            
-            # Save data point
-            filename = f"{data_point.source}_{data_point.type}_{timestamp.strftime('%H%M%S')}.json"
-            filepath = daily_dir / filename
-            
-            with open(filepath, 'w') as f:
-                json.dump(asdict(data_point), f, indent=2)
+            self.raw_log.append(asdict(data_point), timestamp)
         except Exception as e:
             logger.error(f"Error saving raw data: {str(e)}")
 
+    def replay_raw_data(self, start_date: Optional[date] = None,
+                        end_date: Optional[date] = None) -> Iterator[DataPoint]:
+        """Replay raw data points from the log, day by day in the order they were added."""
+        for record in self.raw_log.replay(start_date, end_date):
+            yield DataPoint(**record)
+
     def get_data_points(self, 
                        source: Optional[str] = None,
                        data_type: Optional[str] = None,
                        start_time: Optional[str] = None,
                        end_time: Optional[str] = None) -> List[DataPoint]:
-        """Retrieve data points with optional filtering."""
+        """Retrieve data points with optional filtering, ordered by timestamp.
+        
+        Filters resolve through the (source, type) indexes, and the time range
+        by bisection within each matching index. Spilled chunks are read only
+        when their time range and (source, type) pairs can match; an
+        unfiltered query returns every point in insertion order.
+        """
+        start_ns = to_epoch_ns(start_time) if start_time else None
+        end_ns = to_epoch_ns(end_time) if end_time else None
+        unfiltered = not (source or data_type or start_ns is not None or end_ns is not None)
+        
         with self.lock:
-            filtered_points = self.data_points.copy()
-            
-            if source:
-                filtered_points = [p for p in filtered_points if p.source == source]
-            
-            if data_type:
-                filtered_points = [p for p in filtered_points if p.type == data_type]
-            
-            if start_time:
-                start_dt = datetime.fromisoformat(start_time)
-                filtered_points = [p for p in filtered_points 
-                                 if datetime.fromisoformat(p.timestamp) >= start_dt]
-            
-            if end_time:
-                end_dt = datetime.fromisoformat(end_time)
-                filtered_points = [p for p in filtered_points 
-                                 if datetime.fromisoformat(p.timestamp) <= end_dt]
-            
-            return filtered_points
+            chunks = list(self.spilled_chunks)
+            if unfiltered:
+                hot_points = self.data_points.copy()
+            else:
+                if source and data_type:
+                    index = self.indexes.get((source, data_type))
+                    candidates = [index] if index is not None else []
+                else:
+                    candidates = [
+                        index for (point_source, point_type), index in self.indexes.items()
+                        if (not source or point_source == source) and (not data_type or point_type == data_type)
+                    ]
+                
+                parts = []
+                for index in candidates:
+                    lo, hi = index.range(start_ns, end_ns)
+                    if hi > lo:
+                        parts.append((index.timestamps[lo:hi], index.sequence[lo:hi], index.points[lo:hi]))
+        
+        # Spilled chunks never change, so they are read outside the lock
+        cold_parts = self._read_spilled(chunks, source, data_type, start_ns, end_ns)
+        if unfiltered:
+            cold = [
+                (sequence, data_point) for timestamps, sequences, points in cold_parts
+                for sequence, data_point in zip(sequences, points)
+            ]
+            cold.sort(key=lambda item: item[0])
+            return [data_point for sequence, data_point in cold] + hot_points
+        
+        parts = cold_parts + parts
+        if not parts:
+            return []
+        if len(parts) == 1:
+            return parts[0][2]
+        
+        # Order the matching slices by timestamp, then insertion order
+        timestamps = np.concatenate([np.asarray(part[0], dtype=np.int64) for part in parts])
+        sequence = np.concatenate([np.asarray(part[1], dtype=np.int64) for part in parts])
+        points = [data_point for part in parts for data_point in part[2]]
+        return [points[position] for position in np.lexsort((sequence, timestamps))]
 
     def process_data(self, processor_func):
         """Process data points using a custom processor function."""
         try:
-            with self.lock:
-                processed_data = processor_func(self.data_points)
-                return processed_data
+            processed_data = processor_func(self.get_data_points())
+            return processed_data
         except Exception as e:
             logger.error(f"Error processing data: {str(e)}")
             return None
@@ -357,10 +738,28 @@ class DataIntegrationEngine:
             return []
 
     def clear_data(self):
-        """Clear all stored data points."""
+        """Clear all stored data points, in memory and spilled."""
         with self.lock:
             self.data_points.clear()
-            logger.info("Cleared all data points")
+            self.indexes.clear()
+            self.hot_timestamps = array('q')
+            self.hot_sizes = array('q')
+            self.hot_bytes = 0
+            for chunk in self.spilled_chunks:
+                if chunk.rows is None:
+                    (self.spill_path / chunk.name).unlink(missing_ok=True)
+            self.spilled_chunks.clear()
+            self._update_hot_tier_metrics()
+        self._write_spill_index()
+        logger.info("Cleared all data points")
+
+    def close(self):
+        """Flush and close the raw data log.
+        
+        Spilled chunks stay on disk for the next engine over the same storage;
+        points still in memory can be recovered with ``replay_raw_data``.
+        """
+        self.raw_log.close()
 
 if __name__ == "__main__":
     # Example usage
@@ -381,4 +780,5 @@ if __name__ == "__main__":
     )
     
     # Export data
-    engine.export_data("exported_data.json") 
\ No newline at end of file
+    engine.export_data("exported_data.json")
+    engine.close() 
\ No newline at end of file
@@ -1,16 +1,25 @@
 import json
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, Iterator, List, Optional, Any, Sequence, Tuple
 import threading
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 import logging
 from pathlib import Path
+from urllib.parse import quote
 import numpy as np
 from scipy import signal
 import pandas as pd
 import time
 from prometheus_client import Counter, Histogram, Gauge
 
+from correlation_engine import align_windows, correlation_matrices, pair_correlations
+from segment_store import SegmentStore
+from anomaly_detection import ANOMALY_METHODS, OnlineAnomalyDetector, batch_anomaly_indices
+from stream_buffer import (
+    ColumnarRingBuffer, LatePointError, asof_indices, batch_points, encoded_size, to_epoch_ns, from_epoch_ns
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -23,6 +32,8 @@ SYNC_OPERATIONS = Counter('data_sync_operations_total', 'Total number of synchro
 SYNC_DURATION = Histogram('data_sync_duration_seconds', 'Time spent synchronizing data')
 STREAM_COUNT = Gauge('active_data_streams', 'Number of active data streams')
 BUFFER_SIZE = Gauge('data_buffer_size', 'Size of data buffer in bytes')
+ANOMALIES_DETECTED = Counter('data_sync_anomalies_total', 'Number of anomalous points flagged on ingest')
+LATE_POINTS = Counter('data_sync_late_points_total', 'Number of points dropped for arriving too far out of order')
 
 @dataclass
 class SynchronizedDataPoint:
@@ -40,60 +51,105 @@ class TimeSeriesData:
     metadata: Dict[str, Any]
     interpolation_method: str = 'linear'
     time_unit: str = 'milliseconds'
-    quality_metrics: Dict[str, float] = None
+    _quality_metrics: Optional[Dict[str, float]] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         self._validate_data()
-        if self.quality_metrics is None:
-            self.quality_metrics = self._calculate_quality_metrics()
+    
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        # Replacing the data invalidates the cached quality metrics
+        if name in ('timestamps', 'values'):
+            super().__setattr__('_quality_metrics', None)
+    
+    @property
+    def quality_metrics(self) -> Dict[str, float]:
+        """Quality metrics, computed on first access and cached until the data changes."""
+        if self._quality_metrics is None:
+            self._quality_metrics = self._calculate_quality_metrics()
+        return self._quality_metrics
+    
+    @quality_metrics.setter
+    def quality_metrics(self, metrics: Optional[Dict[str, float]]):
+        self._quality_metrics = metrics
+    
+    def invalidate_quality_metrics(self):
+        """Drop cached quality metrics after the value arrays were modified in place."""
+        self._quality_metrics = None
+    
+    def _timestamps_ns(self) -> np.ndarray:
+        """Timestamps as int64 epoch nanoseconds (zero-copy for datetime64[ns] input)."""
+        return np.asarray(self.timestamps, dtype='datetime64[ns]').view(np.int64)
+    
+    def _value_matrix(self) -> np.ndarray:
+        """All value columns stacked into a 2-D (points x keys) float array."""
+        return np.column_stack([np.asarray(v, dtype=np.float64) for v in self.values.values()])
     
     def _validate_data(self):
         """Validate the time series data structure."""
-        if not self.timestamps or not self.values:
+        if len(self.timestamps) == 0 or not self.values:
             raise ValueError("Timestamps and values cannot be empty")
         
         if len(self.timestamps) != len(next(iter(self.values.values()))):
             raise ValueError("Timestamps and values must have the same length")
         
         # Check for monotonic timestamps
-        if not all(self.timestamps[i] <= self.timestamps[i+1] for i in range(len(self.timestamps)-1)):
+        if np.any(np.diff(self._timestamps_ns()) < 0):
             raise ValueError("Timestamps must be monotonically increasing")
     
     def _calculate_quality_metrics(self) -> Dict[str, float]:
-        """Calculate quality metrics for the time series."""
+        """Calculate quality metrics for the time series in one vectorised pass."""
         metrics = {}
         
         try:
             # Calculate sampling rate consistency
-            time_diffs = np.diff([t.timestamp() for t in self.timestamps])
+            time_diffs = np.diff(self._timestamps_ns()) / 1e9
             metrics['sampling_rate_std'] = float(np.std(time_diffs))
             metrics['sampling_rate_mean'] = float(np.mean(time_diffs))
             
             # Calculate data completeness
-            total_points = len(self.timestamps)
             metrics['completeness'] = 1.0  # Will be updated if missing values are found
             
-            # Calculate value statistics
-            for key, values in self.values.items():
-                metrics[f'{key}_mean'] = float(np.mean(values))
-                metrics[f'{key}_std'] = float(np.std(values))
-                metrics[f'{key}_min'] = float(np.min(values))
-                metrics[f'{key}_max'] = float(np.max(values))
-                
-                # Detect outliers using IQR
-                q1 = np.percentile(values, 25)
-                q3 = np.percentile(values, 75)
-                iqr = q3 - q1
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                outliers = np.sum((values < lower_bound) | (values > upper_bound))
-                metrics[f'{key}_outlier_ratio'] = float(outliers / len(values))
+            # Calculate value statistics over all columns at once
+            matrix = self._value_matrix()
+            means = matrix.mean(axis=0)
+            stds = matrix.std(axis=0)
+            mins = matrix.min(axis=0)
+            maxs = matrix.max(axis=0)
+            
+            # Detect outliers using IQR
+            q1, q3 = np.percentile(matrix, [25, 75], axis=0)
+            iqr = q3 - q1
+            outliers = ((matrix < q1 - 1.5 * iqr) | (matrix > q3 + 1.5 * iqr)).sum(axis=0)
+            outlier_ratios = outliers / len(matrix)
+            
+            for i, key in enumerate(self.values):
+                metrics[f'{key}_mean'] = float(means[i])
+                metrics[f'{key}_std'] = float(stds[i])
+                metrics[f'{key}_min'] = float(mins[i])
+                metrics[f'{key}_max'] = float(maxs[i])
+                metrics[f'{key}_outlier_ratio'] = float(outlier_ratios[i])
             
             return metrics
         except Exception as e:
             logger.error(f"Error calculating quality metrics: {str(e)}")
             return {}
     
+    @classmethod
+    def from_segment_store(cls, store: SegmentStore, start_ns: Optional[int] = None,
+                           end_ns: Optional[int] = None,
+                           metadata: Optional[Dict[str, Any]] = None) -> 'TimeSeriesData':
+        """Open a time series over on-disk history without loading it into memory.
+        
+        Ranges within one segment are backed directly by memory-mapped files.
+        """
+        timestamps, values = store.read(start_ns, end_ns)
+        return cls(
+            timestamps=timestamps.view('datetime64[ns]'),
+            values=values,
+            metadata=metadata or {}
+        )
+    
     def resample(self, target_frequency: str, method: str = 'mean') -> 'TimeSeriesData':
         """Resample the time series to a target frequency with multiple methods."""
         df = pd.DataFrame(self.values, index=self.timestamps)
@@ -142,83 +198,84 @@ class TimeSeriesData:
         
         return new_series
     
+    @classmethod
+    def align_many(cls, series: Sequence['TimeSeriesData'], tolerance: Optional[timedelta] = None,
+                   direction: str = 'nearest') -> 'TimeSeriesData':
+        """Align N series onto the first series' timeline in one sorted merge.
+        
+        Without a tolerance only exactly matching timestamps are kept; with one,
+        every other series is matched as-of each timeline point (see
+        ``asof_indices``). Timeline points without a match in every series are
+        dropped. The result is a single wide series whose columns are named
+        ``<stream>.<key>``; ``metadata['aligned_columns']`` maps each stream to
+        its ``{key: column}`` names.
+        """
+        if not series:
+            raise ValueError("At least one series is required for alignment")
+        
+        tolerance_ns = 0 if tolerance is None else (tolerance // timedelta(microseconds=1)) * 1000
+        timeline = series[0]._timestamps_ns()
+        indices = [np.arange(len(timeline))] + [
+            asof_indices(timeline, other._timestamps_ns(), tolerance_ns, direction)
+            for other in series[1:]
+        ]
+        keep = np.all(np.stack(indices) >= 0, axis=0)
+        
+        values: Dict[str, np.ndarray] = {}
+        aligned_columns: Dict[str, Dict[str, str]] = {}
+        for i, (other, rows) in enumerate(zip(series, indices)):
+            name = other.metadata.get('stream_name') or f"series_{i}"
+            if name in aligned_columns:
+                name = f"{name}_{i}"
+            rows = rows[keep]
+            aligned_columns[name] = {}
+            for key, column in other.values.items():
+                aligned_columns[name][key] = f"{name}.{key}"
+                values[f"{name}.{key}"] = np.asarray(column, dtype=np.float64)[rows]
+        
+        return cls(
+            timestamps=timeline[keep].view('datetime64[ns]'),
+            values=values,
+            metadata={
+                'aligned_columns': aligned_columns,
+                'tolerance_ms': None if tolerance is None else tolerance / timedelta(milliseconds=1),
+                'direction': direction
+            },
+            interpolation_method=series[0].interpolation_method,
+            time_unit=series[0].time_unit
+        )
+    
     def align_with(self, other: 'TimeSeriesData', tolerance: Optional[timedelta] = None) -> Tuple['TimeSeriesData', 'TimeSeriesData']:
         """Align two time series to common timestamps with configurable tolerance."""
-        df1 = pd.DataFrame(self.values, index=self.timestamps)
-        df2 = pd.DataFrame(other.values, index=other.timestamps)
-        
-        if tolerance is not None:
-            # Use pandas merge_asof for approximate matching
-            df1_reset = df1.reset_index()
-            df2_reset = df2.reset_index()
-            
-            merged = pd.merge_asof(
-                df1_reset,
-                df2_reset,
-                on='index',
-                tolerance=tolerance.total_seconds(),
-                direction='nearest'
-            )
-            
-            aligned1 = TimeSeriesData(
-                timestamps=merged['index'].to_list(),
-                values=df1.loc[merged['index']].to_dict('list'),
-                metadata=self.metadata,
-                interpolation_method=self.interpolation_method,
-                time_unit=self.time_unit
-            )
-            
-            aligned2 = TimeSeriesData(
-                timestamps=merged['index'].to_list(),
-                values=df2.loc[merged['index']].to_dict('list'),
-                metadata=other.metadata,
-                interpolation_method=other.interpolation_method,
-                time_unit=other.time_unit
-            )
-        else:
-            # Exact matching as before
-            common_index = df1.index.intersection(df2.index)
-            
-            aligned1 = TimeSeriesData(
-                timestamps=common_index.to_list(),
-                values=df1.loc[common_index].to_dict('list'),
-                metadata=self.metadata,
-                interpolation_method=self.interpolation_method,
-                time_unit=self.time_unit
-            )
-            
-            aligned2 = TimeSeriesData(
-                timestamps=common_index.to_list(),
-                values=df2.loc[common_index].to_dict('list'),
-                metadata=other.metadata,
-                interpolation_method=other.interpolation_method,
-                time_unit=other.time_unit
-            )
+        aligned = TimeSeriesData.align_many([self, other], tolerance=tolerance)
+        (_, columns1), (_, columns2) = aligned.metadata['aligned_columns'].items()
+        
+        aligned1 = TimeSeriesData(
+            timestamps=aligned.timestamps,
+            values={key: aligned.values[column] for key, column in columns1.items()},
+            metadata=self.metadata,
+            interpolation_method=self.interpolation_method,
+            time_unit=self.time_unit
+        )
+        
+        aligned2 = TimeSeriesData(
+            timestamps=aligned.timestamps,
+            values={key: aligned.values[column] for key, column in columns2.items()},
+            metadata=other.metadata,
+            interpolation_method=other.interpolation_method,
+            time_unit=other.time_unit
+        )
         
         return aligned1, aligned2
     
     def detect_anomalies(self, method: str = 'zscore', threshold: float = 3.0) -> Dict[str, List[int]]:
         """Detect anomalies in the time series using various methods."""
         anomalies = {}
+        if method not in ANOMALY_METHODS:
+            return anomalies
         
         for key, values in self.values.items():
-            if method == 'zscore':
-                z_scores = np.abs((values - np.mean(values)) / np.std(values))
-                anomalies[key] = np.where(z_scores > threshold)[0].tolist()
-            elif method == 'iqr':
-                q1 = np.percentile(values, 25)
-                q3 = np.percentile(values, 75)
-                iqr = q3 - q1
-                lower_bound = q1 - 1.5 * iqr
-                upper_bound = q3 + 1.5 * iqr
-                anomalies[key] = np.where((values < lower_bound) | (values > upper_bound))[0].tolist()
-            elif method == 'rolling':
-                window_size = min(10, len(values))
-                rolling_mean = pd.Series(values).rolling(window=window_size).mean()
-                rolling_std = pd.Series(values).rolling(window=window_size).std()
-                anomalies[key] = np.where(
-                    np.abs(values - rolling_mean) > threshold * rolling_std
-                )[0].tolist()
+            anomalies[key] = batch_anomaly_indices(values, method, threshold)
         
         return anomalies
     
@@ -242,15 +299,67 @@ class TimeSeriesData:
             raise
 
 class DataSynchronizer:
-    def __init__(self, sync_window_ms: int = 1000, max_buffer_size: int = 1000):
+    def __init__(self, sync_window_ms: int = 1000, max_buffer_size: int = 1000,
+                 reorder_depth: int = 64, tick_ms: int = 1000,
+                 allowed_lateness_ms: int = 0, anomaly_method: str = 'zscore',
+                 anomaly_threshold: float = 3.0, history_dir: Optional[str] = None,
+                 correlation_window_ms: int = 60000):
         self.sync_window_ms = sync_window_ms
+        self.correlation_window_ms = correlation_window_ms
         self.max_buffer_size = max_buffer_size
-        self.data_buffer: Dict[str, List[Dict[str, Any]]] = {}
+        self.reorder_depth = reorder_depth
+        self.tick_ms = tick_ms
+        self.allowed_lateness_ms = allowed_lateness_ms
+        self._next_tick_ns: Optional[int] = None
+        self.anomaly_method = anomaly_method
+        self.anomaly_threshold = anomaly_threshold
+        self.anomaly_detectors: Dict[str, Dict[str, OnlineAnomalyDetector]] = {}
+        self.stream_anomalies: Dict[str, deque] = {}
+        
+        # Evicted points are spilled to a memory-mapped store per stream
+        self.history_dir = Path(history_dir) if history_dir else None
+        self.history_stores: Dict[str, SegmentStore] = {}
+        self.data_buffer: Dict[str, ColumnarRingBuffer] = {}
+        
+        # ``lock`` guards the stream registry and ``tick_lock`` the streaming
+        # join's tick state; each stream's buffer, detectors and history have
+        # their own lock so producers on different streams never wait for each
+        # other or for synchronization
         self.lock = threading.Lock()
+        self.tick_lock = threading.Lock()
+        self.stream_locks: Dict[str, threading.Lock] = {}
         self.correlation_threshold = 0.7
         self.last_cleanup_time = time.time()
         self.cleanup_interval = 60  # seconds
-        self.time_series_data: Dict[str, TimeSeriesData] = {}
+        
+    @property
+    def time_series_data(self) -> Dict[str, TimeSeriesData]:
+        """Time series views over every non-empty stream buffer."""
+        return {
+            stream_name: self.get_time_series(stream_name)
+            for stream_name, buffer in self._streams()
+            if len(buffer)
+        }
+    
+    def get_time_series(self, stream_name: str) -> Optional[TimeSeriesData]:
+        """Build a zero-copy time series view over a stream buffer.
+        
+        The view shares memory with the ring buffer, so it reflects the buffer
+        as of this call; copy it if it must outlive further ingestion.
+        """
+        buffer = self.data_buffer.get(stream_name)
+        if not buffer:
+            return None
+        
+        with self.stream_locks[stream_name]:
+            return TimeSeriesData(
+                timestamps=buffer.timestamps.view('datetime64[ns]'),
+                values=buffer.columns(),
+                metadata={
+                    'stream_name': stream_name,
+                    'original_data': buffer.payloads[0]
+                }
+            )
         
     def create_time_series(self, stream_name: str, data: Dict[str, Any], timestamp: str) -> TimeSeriesData:
         """Create a time series from stream data."""
@@ -280,52 +389,34 @@ class DataSynchronizer:
         """Add a new data stream to the synchronizer with time series support."""
         start_time = time.time()
         try:
-            with self.lock:
-                if stream_name not in self.data_buffer:
-                    self.data_buffer[stream_name] = []
-                    STREAM_COUNT.inc()
-                
-                # Check buffer size
-                if len(self.data_buffer[stream_name]) >= self.max_buffer_size:
+            # Extract numeric values for the columnar buffer
+            numeric_values = {k: v for k, v in data.items() if isinstance(v, (int, float))}
+            if not numeric_values:
+                raise ValueError(f"No numeric values found in stream {stream_name}")
+            timestamp_ns = to_epoch_ns(timestamp)
+            size = encoded_size(data, timestamp)
+            
+            buffer = self._stream_buffer(stream_name)
+            with self.stream_locks[stream_name]:
+                # Add to buffer, overwriting the oldest point when full
+                if buffer.append(timestamp_ns, numeric_values, data, size):
                     logger.warning(f"Buffer size limit reached for stream {stream_name}")
-                    self.data_buffer[stream_name] = self.data_buffer[stream_name][-self.max_buffer_size:]
-                
-                # Add to buffer
-                self.data_buffer[stream_name].append({
-                    'data': data,
-                    'timestamp': timestamp
-                })
-                
-                # Update time series
-                time_series = self.create_time_series(stream_name, data, timestamp)
-                if stream_name in self.time_series_data:
-                    # Merge with existing time series
-                    existing = self.time_series_data[stream_name]
-                    merged_values = {
-                        k: existing.values[k] + time_series.values[k]
-                        for k in existing.values.keys()
-                    }
-                    self.time_series_data[stream_name] = TimeSeriesData(
-                        timestamps=existing.timestamps + time_series.timestamps,
-                        values=merged_values,
-                        metadata=existing.metadata,
-                        interpolation_method=existing.interpolation_method,
-                        time_unit=existing.time_unit
-                    )
-                else:
-                    self.time_series_data[stream_name] = time_series
-                
-                # Update buffer size metric
-                BUFFER_SIZE.set(self._calculate_buffer_size())
                 
-                # Periodic cleanup
-                current_time = time.time()
-                if current_time - self.last_cleanup_time > self.cleanup_interval:
-                    self._cleanup_old_data()
-                    self.last_cleanup_time = current_time
-                
-                logger.info(f"Added data to stream: {stream_name}")
-                return True
+                # Flag anomalies as the point arrives
+                self._detect_point_anomalies(stream_name, numeric_values, timestamp)
+            
+            # Update buffer size metric
+            BUFFER_SIZE.set(self._calculate_buffer_size())
+            
+            # Periodic cleanup
+            self._maybe_cleanup()
+            
+            logger.info(f"Added data to stream: {stream_name}")
+            return True
+        except LatePointError as e:
+            LATE_POINTS.inc()
+            logger.warning(f"Dropped late point for stream {stream_name}: {str(e)}")
+            return False
         except Exception as e:
             logger.error(f"Error adding data stream: {str(e)}")
             return False
@@ -333,127 +424,425 @@ class DataSynchronizer:
             duration = time.time() - start_time
             SYNC_DURATION.observe(duration)
 
-    def _calculate_buffer_size(self) -> int:
-        """Calculate the total size of the data buffer in bytes."""
+    def _stream_buffer(self, stream_name: str) -> ColumnarRingBuffer:
+        """Get or create the ring buffer (and its lock) for a stream."""
+        buffer = self.data_buffer.get(stream_name)
+        if buffer is None:
+            with self.lock:
+                buffer = self.data_buffer.get(stream_name)
+                if buffer is None:
+                    buffer = ColumnarRingBuffer(
+                        self.max_buffer_size,
+                        self.reorder_depth,
+                        on_evict=self._history_store(stream_name).append if self.history_dir else None
+                    )
+                    # Publish the lock before the buffer so readers always find it
+                    self.stream_locks[stream_name] = threading.Lock()
+                    self.data_buffer[stream_name] = buffer
+                    STREAM_COUNT.inc()
+        return buffer
+    
+    def _streams(self) -> List[Tuple[str, ColumnarRingBuffer]]:
+        """Snapshot of the stream registry, safe to iterate while streams are added."""
+        return list(self.data_buffer.items())
+    
+    
+    def add_data_batch(self, stream_name: str, records: Any,
+                       timestamps: Optional[List[Any]] = None,
+                       fields: Optional[List[str]] = None) -> int:
+        """Add a burst of points to a stream under a single lock acquisition.
+        
+        ``records`` is a list of ``{'data': ..., 'timestamp': ...}`` points or a
+        2-D NumPy block (see ``batch_points``). In-order points are written to
+        the ring buffer as one vectorised block. Returns the number of points
+        buffered; points without numeric values or too late to reorder are dropped.
+        """
+        start_time = time.time()
         try:
-            return sum(
-                len(json.dumps(point).encode('utf-8'))
-                for stream in self.data_buffer.values()
-                for point in stream
-            )
+            points = batch_points(records, timestamps, fields)
+            if isinstance(records, np.ndarray):
+                block = np.asarray(records, dtype=np.float64)
+                numeric = [dict(zip(fields, row)) for row in block.tolist()]
+                columns = {key: block[:, i] for i, key in enumerate(fields)}
+            else:
+                numeric = [
+                    {k: v for k, v in data.items() if isinstance(v, (int, float))}
+                    for data, _ in points
+                ]
+                keep = [i for i, values in enumerate(numeric) if values]
+                if len(keep) < len(points):
+                    logger.warning(
+                        f"Skipped {len(points) - len(keep)} points without numeric values in stream {stream_name}"
+                    )
+                    points = [points[i] for i in keep]
+                    numeric = [numeric[i] for i in keep]
+                columns = None
+            if not points:
+                return 0
+            
+            timestamps_ns = np.array([to_epoch_ns(timestamp) for _, timestamp in points], dtype=np.int64)
+            order = np.argsort(timestamps_ns, kind='stable')
+            timestamps_ns = timestamps_ns[order]
+            points = [points[i] for i in order]
+            numeric = [numeric[i] for i in order]
+            if columns is None:
+                keys = list(dict.fromkeys(key for values in numeric for key in values))
+                columns = {
+                    key: np.array([values.get(key, np.nan) for values in numeric], dtype=np.float64)
+                    for key in keys
+                }
+            else:
+                columns = {key: values[order] for key, values in columns.items()}
+            sizes = np.array([encoded_size(data, timestamp) for data, timestamp in points], dtype=np.int64)
+            
+            buffer = self._stream_buffer(stream_name)
+            with self.stream_locks[stream_name]:
+                # Points older than the newest buffered one are reordered one by one
+                late = 0
+                if len(buffer):
+                    late = int(np.searchsorted(timestamps_ns, buffer.latest()[0], side='left'))
+                dropped = set()
+                for i in range(late):
+                    try:
+                        buffer.append(int(timestamps_ns[i]), numeric[i], points[i][0], int(sizes[i]))
+                    except LatePointError:
+                        dropped.add(i)
+                if dropped:
+                    LATE_POINTS.inc(len(dropped))
+                    logger.warning(f"Dropped {len(dropped)} late points for stream {stream_name}")
+                
+                if buffer.extend(
+                    timestamps_ns[late:],
+                    {key: values[late:] for key, values in columns.items()},
+                    [data for data, _ in points[late:]],
+                    sizes[late:]
+                ):
+                    logger.warning(f"Buffer size limit reached for stream {stream_name}")
+                
+                for i, ((_, timestamp), values) in enumerate(zip(points, numeric)):
+                    if i not in dropped:
+                        self._detect_point_anomalies(stream_name, values, timestamp)
+            
+            BUFFER_SIZE.set(self._calculate_buffer_size())
+            self._maybe_cleanup()
+            
+            added = len(points) - len(dropped)
+            logger.info(f"Added {added} points to stream: {stream_name}")
+            return added
         except Exception as e:
-            logger.error(f"Error calculating buffer size: {str(e)}")
+            logger.error(f"Error adding data batch: {str(e)}")
             return 0
+        finally:
+            duration = time.time() - start_time
+            SYNC_DURATION.observe(duration)
+    
+    def _history_store(self, stream_name: str) -> SegmentStore:
+        """Get or open the on-disk history store for a stream."""
+        store = self.history_stores.get(stream_name)
+        if store is None:
+            store = SegmentStore(self.history_dir / quote(stream_name, safe=''))
+            self.history_stores[stream_name] = store
+        return store
+    
+    def get_history(self, stream_name: str, start_time: Optional[str] = None,
+                    end_time: Optional[str] = None) -> Optional[TimeSeriesData]:
+        """Open a stream's spilled history lazily as a memory-mapped time series."""
+        if not self.history_dir:
+            return None
+        with self.lock:
+            store = self._history_store(stream_name)
+            stream_lock = self.stream_locks.get(stream_name)
+        try:
+            # Keep a concurrent spill from changing the files mid-read
+            with stream_lock or threading.Lock():
+                return TimeSeriesData.from_segment_store(
+                    store,
+                    to_epoch_ns(start_time) if start_time else None,
+                    to_epoch_ns(end_time) if end_time else None,
+                    metadata={'stream_name': stream_name}
+                )
+        except ValueError:
+            return None
+    
+    def close(self):
+        """Spill every buffered point to the history stores and close them."""
+        for stream, buffer in self._streams():
+            with self.stream_locks[stream]:
+                if self.history_dir:
+                    buffer.evict(len(buffer))
+        with self.lock:
+            for store in self.history_stores.values():
+                store.close()
+    
+    def _detect_point_anomalies(self, stream_name: str, numeric_values: Dict[str, float], timestamp: str):
+        """Update the stream's online anomaly detectors with a new point."""
+        detectors = self.anomaly_detectors.setdefault(stream_name, {})
+        for key, value in numeric_values.items():
+            detector = detectors.get(key)
+            if detector is None:
+                detector = OnlineAnomalyDetector(self.anomaly_method, self.anomaly_threshold)
+                detectors[key] = detector
+            if detector.update(value):
+                ANOMALIES_DETECTED.inc()
+                self.stream_anomalies.setdefault(
+                    stream_name, deque(maxlen=self.max_buffer_size)
+                ).append({'timestamp': timestamp, 'field': key, 'value': value})
+    
+    def get_anomalies(self, stream_name: str) -> List[Dict[str, Any]]:
+        """Return the most recent anomalies flagged on ingest for a stream."""
+        return list(self.stream_anomalies.get(stream_name, []))
+    
+    def _calculate_buffer_size(self) -> int:
+        """Calculate the total size of the data buffer in bytes.
+        
+        Each buffer keeps a running total of the encoded sizes recorded at
+        insertion, so this is O(streams) rather than O(points).
+        """
+        return sum(buffer.nbytes for _, buffer in self._streams())
 
+    def _maybe_cleanup(self):
+        """Run the periodic cleanup if it is due, in at most one thread at a time."""
+        current_time = time.time()
+        if current_time - self.last_cleanup_time <= self.cleanup_interval:
+            return
+        with self.lock:
+            if current_time - self.last_cleanup_time <= self.cleanup_interval:
+                return
+            self.last_cleanup_time = current_time
+        self._cleanup_old_data()
+    
     def _cleanup_old_data(self):
-        """Remove data points older than the synchronization window."""
+        """Remove data points older than both the synchronization and correlation windows."""
         current_time = datetime.now()
-        window_start = current_time - timedelta(milliseconds=self.sync_window_ms)
-        
-        for stream in self.data_buffer:
-            initial_count = len(self.data_buffer[stream])
-            self.data_buffer[stream] = [
-                point for point in self.data_buffer[stream]
-                if datetime.fromisoformat(point['timestamp']) >= window_start
-            ]
-            if len(self.data_buffer[stream]) < initial_count:
-                logger.info(f"Cleaned up {initial_count - len(self.data_buffer[stream])} old data points from {stream}")
+        retention_ms = max(self.sync_window_ms, self.correlation_window_ms)
+        window_start = to_epoch_ns(current_time - timedelta(milliseconds=retention_ms))
+        
+        # Never evict data for ticks the streaming join has not emitted yet
+        if self._next_tick_ns is not None:
+            window_start = min(window_start, self._next_tick_ns)
+        
+        for stream, buffer in self._streams():
+            with self.stream_locks[stream]:
+                removed = buffer.evict_before(window_start)
+            if removed:
+                logger.info(f"Cleaned up {removed} old data points from {stream}")
 
     def synchronize_data(self) -> Optional[SynchronizedDataPoint]:
-        """Synchronize data streams and calculate correlations."""
+        """Synchronize data streams and calculate correlations.
+        
+        Reads a snapshot of the streams through short per-stream critical
+        sections (two O(log n) bisections each), so producers keep ingesting
+        while correlations are computed outside any lock.
+        """
         start_time = time.time()
         try:
-            with self.lock:
-                SYNC_OPERATIONS.inc()
-                
-                if not self.data_buffer:
+            SYNC_OPERATIONS.inc()
+            
+            streams = self._streams()
+            if not streams:
+                return None
+            
+            # Get the latest timestamp from all streams (buffers are sorted)
+            latest_timestamps = {}
+            for stream, buffer in streams:
+                with self.stream_locks[stream]:
+                    latest = buffer.latest()
+                if latest is None:
                     return None
-                
-                # Get the latest timestamp from all streams
-                latest_timestamps = {
-                    stream: max(
-                        (datetime.fromisoformat(point['timestamp']) 
-                         for point in points),
-                        default=None
+                latest_timestamps[stream] = latest[0]
+            
+            # Find the most recent common timestamp
+            sync_ns = min(latest_timestamps.values())
+            sync_time = from_epoch_ns(sync_ns)
+            window_ns = self.sync_window_ms * 1_000_000
+            
+            # Extract the latest point within the sync window by bisection,
+            # ignoring points that arrived after the snapshot above, and copy
+            # out the correlation window leading up to the sync point
+            synced_data = {}
+            windows = {}
+            for stream, buffer in streams:
+                with self.stream_locks[stream]:
+                    lo, hi = buffer.window(
+                        sync_ns - window_ns, min(sync_ns + window_ns, latest_timestamps[stream])
                     )
-                    for stream, points in self.data_buffer.items()
-                }
-                
-                if not all(latest_timestamps.values()):
-                    return None
-                
-                # Find the most recent common timestamp
-                sync_time = min(latest_timestamps.values())
+                    if hi > lo:
+                        synced_data[stream] = buffer.payloads[hi - 1]
+                        windows[stream] = self._signal_window(
+                            buffer, sync_ns - self.correlation_window_ms * 1_000_000, sync_ns
+                        )
+            
+            if not synced_data:
+                return None
+            
+            # Calculate correlations between streams
+            correlations = self._calculate_correlations(windows)
+            
+            # Calculate performance metrics
+            performance_metrics = {
+                'sync_duration_ms': (time.time() - start_time) * 1000,
+                'buffer_size_bytes': self._calculate_buffer_size(),
+                'stream_count': len(synced_data),
+                'correlation_count': len(correlations)
+            }
+            
+            return SynchronizedDataPoint(
+                timestamp=sync_time.isoformat(),
+                data_streams=synced_data,
+                correlations=correlations,
+                metadata={
+                    'sync_window_ms': self.sync_window_ms,
+                    'stream_count': len(synced_data)
+                },
+                performance_metrics=performance_metrics
+            )
+        except Exception as e:
+            logger.error(f"Error synchronizing data: {str(e)}")
+            return None
+        finally:
+            duration = time.time() - start_time
+            SYNC_DURATION.observe(duration)
+
+    def synchronized_ticks(self) -> Iterator[SynchronizedDataPoint]:
+        """Yield every aligned tick that all streams have passed, exactly once.
+        
+        Each stream's watermark is its latest event time minus
+        ``allowed_lateness_ms``. A ``tick_ms`` bucket is emitted as soon as the
+        slowest stream's watermark has reached the end of the bucket, joining the
+        latest point of every stream that has data in it. Ticks without any data
+        are skipped. Points arriving for an already emitted tick are ignored.
+        """
+        with self.tick_lock:
+            ready = self._collect_ready_ticks()
+        yield from ready
+    
+    def _collect_ready_ticks(self) -> List[SynchronizedDataPoint]:
+        """Build the synchronized points for all ticks behind the watermark.
+        
+        Must be called with ``tick_lock`` held, which serialises the tick state
+        without blocking producers. Each stream's unemitted points are copied
+        out under its own lock, and the join and correlations then run on
+        those copies.
+        """
+        start_time = time.time()
+        ready: List[SynchronizedDataPoint] = []
+        try:
+            streams = self._streams()
+            if not streams:
+                return ready
+            
+            bounds = {}
+            for stream, buffer in streams:
+                with self.stream_locks[stream]:
+                    if not len(buffer):
+                        return ready
+                    bounds[stream] = (int(buffer.timestamps[0]), buffer.latest()[0])
+            
+            tick_ns = self.tick_ms * 1_000_000
+            watermark = min(latest for _, latest in bounds.values()) - self.allowed_lateness_ms * 1_000_000
+            
+            if self._next_tick_ns is None:
+                first = min(first for first, _ in bounds.values())
+                self._next_tick_ns = first // tick_ns * tick_ns
+            
+            # Snapshot the points of every tick that is ready to be emitted,
+            # plus the correlation window before the first of them
+            limit_ns = watermark // tick_ns * tick_ns
+            if self._next_tick_ns >= limit_ns:
+                return ready
+            correlation_ns = self.correlation_window_ms * 1_000_000
+            snapshots = {}
+            for stream, buffer in streams:
+                with self.stream_locks[stream]:
+                    lo, hi = buffer.window(self._next_tick_ns - correlation_ns, limit_ns - 1)
+                    timestamps, signal_values = self._signal_window(
+                        buffer, self._next_tick_ns - correlation_ns, limit_ns - 1
+                    )
+                    snapshots[stream] = (timestamps, buffer.payloads[lo:hi].copy(), signal_values)
+            
+            while self._next_tick_ns + tick_ns <= watermark:
+                tick_start = self._next_tick_ns
+                tick_end = tick_start + tick_ns
                 
-                # Extract data points within sync window
                 synced_data = {}
-                for stream, points in self.data_buffer.items():
-                    window_points = [
-                        point for point in points
-                        if abs((datetime.fromisoformat(point['timestamp']) - sync_time).total_seconds() * 1000) 
-                        <= self.sync_window_ms
-                    ]
-                    if window_points:
-                        synced_data[stream] = window_points[-1]['data']
+                next_point = None
+                windows = {}
+                for stream, (timestamps, payloads, signal_values) in snapshots.items():
+                    lo = int(np.searchsorted(timestamps, tick_start, side='left'))
+                    hi = int(np.searchsorted(timestamps, tick_end - 1, side='right'))
+                    if hi > lo:
+                        synced_data[stream] = payloads[hi - 1]
+                        first = int(np.searchsorted(timestamps, tick_end - correlation_ns, side='left'))
+                        windows[stream] = (timestamps[first:hi], signal_values[first:hi])
+                    elif lo < len(timestamps):
+                        candidate = int(timestamps[lo])
+                        next_point = candidate if next_point is None else min(next_point, candidate)
                 
                 if not synced_data:
-                    return None
-                
-                # Calculate correlations between streams
-                correlations = self._calculate_correlations(synced_data)
-                
-                # Calculate performance metrics
-                performance_metrics = {
-                    'sync_duration_ms': (time.time() - start_time) * 1000,
-                    'buffer_size_bytes': self._calculate_buffer_size(),
-                    'stream_count': len(synced_data),
-                    'correlation_count': len(correlations)
-                }
+                    # Jump over empty ticks straight to the next buffered point
+                    if next_point is None:
+                        self._next_tick_ns = watermark // tick_ns * tick_ns
+                    else:
+                        self._next_tick_ns = next_point // tick_ns * tick_ns
+                    continue
                 
-                return SynchronizedDataPoint(
-                    timestamp=sync_time.isoformat(),
+                correlations = self._calculate_correlations(windows)
+                ready.append(SynchronizedDataPoint(
+                    timestamp=from_epoch_ns(tick_start).isoformat(),
                     data_streams=synced_data,
                     correlations=correlations,
                     metadata={
                         'sync_window_ms': self.sync_window_ms,
+                        'tick_ms': self.tick_ms,
+                        'watermark': from_epoch_ns(watermark).isoformat(),
                         'stream_count': len(synced_data)
                     },
-                    performance_metrics=performance_metrics
-                )
+                    performance_metrics={
+                        'sync_duration_ms': (time.time() - start_time) * 1000,
+                        'buffer_size_bytes': self._calculate_buffer_size(),
+                        'stream_count': len(synced_data),
+                        'correlation_count': len(correlations)
+                    }
+                ))
+                self._next_tick_ns = tick_end
+            
+            if ready:
+                SYNC_OPERATIONS.inc(len(ready))
+            return ready
         except Exception as e:
-            logger.error(f"Error synchronizing data: {str(e)}")
-            return None
+            logger.error(f"Error collecting synchronized ticks: {str(e)}")
+            return ready
         finally:
             duration = time.time() - start_time
             SYNC_DURATION.observe(duration)
 
-    def _calculate_correlations(self, synced_data: Dict[str, Any]) -> Dict[str, float]:
-        """Calculate correlations between different data streams."""
-        correlations = {}
+    def _signal_window(self, buffer: ColumnarRingBuffer, start_ns: int,
+                       end_ns: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy a stream's timestamps and per-point signal within a time range.
         
-        try:
-            # Convert data to numeric arrays where possible
-            numeric_data = {}
-            for stream, data in synced_data.items():
-                if isinstance(data, dict):
-                    # Extract numeric values from dictionaries
-                    numeric_values = [v for v in data.values() if isinstance(v, (int, float))]
-                    if numeric_values:
-                        numeric_data[stream] = np.array(numeric_values)
-            
-            # Calculate correlations between streams
-            streams = list(numeric_data.keys())
-            for i in range(len(streams)):
-                for j in range(i + 1, len(streams)):
-                    stream1, stream2 = streams[i], streams[j]
-                    corr = np.corrcoef(numeric_data[stream1], numeric_data[stream2])[0, 1]
-                    if not np.isnan(corr):
-                        correlations[f"{stream1}_{stream2}"] = float(corr)
+        A point's signal is the mean of its numeric fields. Call with the
+        stream's lock held.
+        """
+        lo, hi = buffer.window(start_ns, end_ns)
+        columns = [buffer.column(field)[lo:hi] for field in buffer.fields]
+        if len(columns) == 1:
+            signal_values = columns[0].copy()
+        else:
+            signal_values = np.nanmean(np.vstack(columns), axis=0) if hi > lo else np.empty(0)
+        return buffer.timestamps[lo:hi].copy(), signal_values
+    
+    def _calculate_correlations(self, windows: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, float]:
+        """Calculate correlations between the aligned signal windows of all streams.
         
+        Windows are aligned point by point within the sync window and the
+        Pearson matrix over every stream is computed in one pass.
+        """
+        try:
+            names, matrix = align_windows(windows, self.sync_window_ms * 1_000_000)
+            return pair_correlations(names, correlation_matrices(matrix, ('pearson',))['pearson'])
         except Exception as e:
             logger.error(f"Error calculating correlations: {str(e)}")
-        
-        return correlations
+            return {}
 
     def export_synced_data(self, filename: str):
         """Export synchronized data to a JSON file."""
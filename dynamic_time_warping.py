@@ -0,0 +1,249 @@
+from typing import List, Optional, Sequence, Tuple
+import logging
+import numpy as np
+from scipy.ndimage import maximum_filter1d, minimum_filter1d
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def band_bounds(n: int, m: int, window: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Column range ``[lo, hi)`` of every row inside a Sakoe-Chiba band.
+
+    The band follows the diagonal from (0, 0) to (n - 1, m - 1) with radius
+    ``window`` (None for no constraint) and is widened where needed so that a
+    warping path always exists.
+    """
+    rows = np.arange(n)
+    if window is None:
+        return np.zeros(n, dtype=np.int64), np.full(n, m, dtype=np.int64)
+    center = rows * ((m - 1) / (n - 1)) if n > 1 else np.zeros(n)
+    lo = np.clip(np.ceil(center - window), 0, m - 1).astype(np.int64)
+    hi = np.clip(np.floor(center + window) + 1, 1, m).astype(np.int64)
+    # Every row needs a cell, and consecutive rows must overlap for
+    # diagonal or vertical steps to connect
+    hi = np.maximum(hi, lo + 1)
+    lo[1:] = np.minimum(lo[1:], hi[:-1])
+    hi[-1] = m
+    return lo, hi
+
+
+def _dtw_loops(x: np.ndarray, y: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+               max_dist: float) -> float:
+    """Scalar DP core; compiled with numba when it is installed."""
+    n, m = len(x), len(y)
+    prev = np.full(m + 1, np.inf)
+    curr = np.full(m + 1, np.inf)
+    for i in range(n):
+        if i >= 2:
+            # Clear the cells left over from two rows back before reusing the buffer
+            for j in range(lo[i - 2], hi[i - 2]):
+                curr[j + 1] = np.inf
+        row_min = np.inf
+        for j in range(lo[i], hi[i]):
+            cost = abs(x[i] - y[j])
+            if i == 0 and j == 0:
+                best = cost
+            else:
+                best = min(prev[j] + 2 * cost, prev[j + 1] + cost, curr[j] + cost)
+            curr[j + 1] = best
+            if best < row_min:
+                row_min = best
+        if row_min > max_dist:
+            return np.inf
+        prev, curr = curr, prev
+    return prev[m]
+
+
+def _dtw_pairs_loops(xs: np.ndarray, ys: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                     max_dist: float) -> np.ndarray:
+    """Scalar DP core over stacked pairs, in parallel when compiled with numba."""
+    distances = np.empty(len(xs))
+    for k in prange(len(xs)):
+        distances[k] = _dtw_compiled(xs[k], ys[k], lo, hi, max_dist)
+    return distances
+
+
+if njit is not None:
+    _dtw_compiled = njit(cache=True)(_dtw_loops)
+    _dtw_pairs_compiled = njit(cache=True, parallel=True)(_dtw_pairs_loops)
+else:
+    _dtw_compiled = _dtw_pairs_compiled = None
+
+
+def _dtw_numpy_batch(xs: np.ndarray, ys: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+                     max_dist: float) -> np.ndarray:
+    """Row-vectorised DP core over stacked pairs of equal shapes.
+
+    Within a row, ``D[j] = min(A[j], D[j - 1] + c[j])`` where ``A`` holds the
+    diagonal and vertical candidates. This recurrence is a prefix minimum over
+    ``A - cumsum(c)``, so every row of every pair is a handful of NumPy calls.
+    Pairs whose row minimum exceeds ``max_dist`` are dropped from the
+    remaining rows and come back as ``inf``.
+    """
+    count, m = ys.shape
+    distances = np.full(count, np.inf)
+    active = np.arange(count)
+    prev = np.full((count, m + 1), np.inf)
+    curr = np.full((count, m + 1), np.inf)
+    for i in range(xs.shape[1]):
+        start, end = lo[i], hi[i]
+        cost = np.abs(xs[:, i, None] - ys[:, start:end])
+        if i == 0:
+            candidates = np.full_like(cost, np.inf)
+            candidates[:, 0] = cost[:, 0]
+        else:
+            candidates = np.minimum(prev[:, start:end] + 2 * cost, prev[:, start + 1:end + 1] + cost)
+        cumulative = np.cumsum(cost, axis=1)
+        row = cumulative + np.minimum.accumulate(candidates - cumulative, axis=1)
+        alive = row.min(axis=1) <= max_dist
+        if not alive.all():
+            active, xs, ys, prev, curr, row = (
+                array[alive] for array in (active, xs, ys, prev, curr, row)
+            )
+            if not len(active):
+                return distances
+        if i >= 2:
+            # Clear the cells left over from two rows back before reusing the buffer
+            curr[:, lo[i - 2] + 1:hi[i - 2] + 1] = np.inf
+        curr[:, start + 1:end + 1] = row
+        prev, curr = curr, prev
+    distances[active] = prev[:, m]
+    return distances
+
+
+def _dtw_numpy(x: np.ndarray, y: np.ndarray, lo: np.ndarray, hi: np.ndarray,
+               max_dist: float) -> float:
+    """Row-vectorised DP core for a single pair."""
+    return float(_dtw_numpy_batch(x[None, :], y[None, :], lo, hi, max_dist)[0])
+
+
+def lb_keogh(x: np.ndarray, y: np.ndarray, window: Optional[int] = None) -> float:
+    """LB_Keogh lower bound of ``dtw_distance(x, y, window)`` for equal lengths.
+
+    Sums how far ``x`` leaves the running min/max envelope of ``y`` over the
+    band, in O(n).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) != len(y):
+        raise ValueError("LB_Keogh needs series of equal length")
+    return float(lb_keogh_batch(x[None, :], y[None, :], window)[0])
+
+
+def lb_keogh_batch(xs: np.ndarray, ys: np.ndarray, window: Optional[int] = None) -> np.ndarray:
+    """LB_Keogh bounds for stacked pairs ``(xs[k], ys[k])`` of one length, in one pass.
+
+    The envelopes of all rows of ``ys`` are taken at once along the last axis.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    if xs.shape != ys.shape:
+        raise ValueError("LB_Keogh needs series of equal length")
+    length = ys.shape[1]
+    if window is None or window >= length:
+        upper = ys.max(axis=1, keepdims=True)
+        lower = ys.min(axis=1, keepdims=True)
+    else:
+        upper = maximum_filter1d(ys, size=2 * window + 1, axis=1, mode='nearest')
+        lower = minimum_filter1d(ys, size=2 * window + 1, axis=1, mode='nearest')
+    return np.sum(np.maximum(xs - upper, 0) + np.maximum(lower - xs, 0), axis=1)
+
+
+def dtw_distance(x: Sequence[float], y: Sequence[float], window: Optional[int] = None,
+                 max_dist: Optional[float] = None, use_numba: bool = True) -> float:
+    """Dynamic time warping distance between two series.
+
+    Uses the absolute difference as local cost and the symmetric2 step pattern
+    (diagonal steps weigh double), the default of the ``dtw`` package this
+    replaces. ``window`` is the Sakoe-Chiba band radius in samples. When
+    ``max_dist`` is given, the computation is abandoned as soon as the distance
+    is known to exceed it (first by LB_Keogh, then row by row) and ``inf`` is
+    returned instead.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    if not len(x) or not len(y):
+        raise ValueError("DTW needs non-empty series")
+    if max_dist is None:
+        max_dist = np.inf
+    elif len(x) == len(y) and lb_keogh(x, y, window) > max_dist:
+        return np.inf
+
+    lo, hi = band_bounds(len(x), len(y), window)
+    if use_numba and _dtw_compiled is not None:
+        return float(_dtw_compiled(x, y, lo, hi, float(max_dist)))
+    return _dtw_numpy(x, y, lo, hi, float(max_dist))
+
+
+def dtw_batch(pairs: Sequence[Tuple[Sequence[float], Sequence[float]]],
+              window: Optional[int] = None, max_dist: Optional[float] = None,
+              use_numba: bool = True) -> np.ndarray:
+    """DTW distances for many series pairs.
+
+    Pairs are grouped by their two lengths and each group is stacked and run
+    through the DP core in one call, row-vectorised across its pairs (or in
+    parallel under numba). With ``max_dist``, the LB_Keogh bounds of every
+    equal-length group are computed up front in a single pass, only the pairs
+    within the bound reach the DP, and those are abandoned early as in
+    ``dtw_distance``; pruned pairs come back as ``inf``.
+    """
+    pairs = [
+        (np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)) for x, y in pairs
+    ]
+    if any(not len(x) or not len(y) for x, y in pairs):
+        raise ValueError("DTW needs non-empty series")
+    max_dist = np.inf if max_dist is None else float(max_dist)
+
+    groups = {}
+    for index, (x, y) in enumerate(pairs):
+        groups.setdefault((len(x), len(y)), []).append(index)
+
+    distances = np.full(len(pairs), np.inf)
+    for (n, m), indices in groups.items():
+        indices = np.array(indices)
+        xs = np.stack([pairs[index][0] for index in indices])
+        ys = np.stack([pairs[index][1] for index in indices])
+        if n == m and np.isfinite(max_dist):
+            survivors = lb_keogh_batch(xs, ys, window) <= max_dist
+            indices, xs, ys = indices[survivors], xs[survivors], ys[survivors]
+            if not len(indices):
+                continue
+        lo, hi = band_bounds(n, m, window)
+        if use_numba and _dtw_pairs_compiled is not None:
+            distances[indices] = _dtw_pairs_compiled(xs, ys, lo, hi, max_dist)
+        else:
+            distances[indices] = _dtw_numpy_batch(xs, ys, lo, hi, max_dist)
+    return distances
+
+
+def dtw_nearest(query: Sequence[float], candidates: List[Sequence[float]],
+                window: Optional[int] = None, use_numba: bool = True) -> Tuple[int, float]:
+    """Index and distance of the candidate closest to ``query`` under DTW.
+
+    Candidates are visited in order of their LB_Keogh bound, and each DP is
+    abandoned once it cannot beat the best distance found so far.
+    """
+    query = np.asarray(query, dtype=np.float64)
+    bounds = [
+        lb_keogh(query, candidate, window) if len(candidate) == len(query) else 0.0
+        for candidate in candidates
+    ]
+    best_index, best = -1, np.inf
+    for index in np.argsort(bounds, kind='stable'):
+        if bounds[index] >= best:
+            break
+        distance = dtw_distance(query, candidates[index], window, best, use_numba)
+        if distance < best:
+            best_index, best = int(index), distance
+    return best_index, best
@@ -0,0 +1,458 @@
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from stream_buffer import from_epoch_ns, to_epoch_ns
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = '.catalog.json'
+CHUNK_PREFIX = 'chunk_'
+CHUNK_SUFFIX = '.npz'
+HOUR_NS = 3600 * 1_000_000_000
+# A directory modified this recently may change again within the same
+# timestamp tick, so its modification time is not trusted yet
+RACY_NS = 2 * 1_000_000_000
+
+
+@dataclass
+class CatalogEntry:
+    """Time range and fingerprint of one data file."""
+    name: str
+    start_ns: int
+    end_ns: int
+    count: int
+    size: int
+    mtime_ns: int
+    columnar: bool = False
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert timestamped records into a columnar chunk.
+
+    Nested dictionaries are flattened into one column per key path (the
+    path encoded as a JSON list); values that are not dictionaries, such as
+    lists, are stored as they are. Rows lacking a path are listed under
+    ``missing`` so records round-trip exactly.
+    """
+    columns: Dict[str, List[Any]] = {}
+    missing: Dict[str, List[int]] = {}
+    for row, record in enumerate(records):
+        for path, value in _flatten(record):
+            column = columns.get(path)
+            if column is None:
+                column = columns[path] = [None] * row
+                if row:
+                    missing[path] = list(range(row))
+            column.append(value)
+        for path, column in columns.items():
+            if len(column) == row:
+                column.append(None)
+                missing.setdefault(path, []).append(row)
+    return {
+        'timestamps': [to_epoch_ns(record['timestamp']) for record in records],
+        'columns': columns,
+        'missing': missing
+    }
+
+
+def columns_to_records(chunk: Dict[str, Any], start: int = 0, stop: Optional[int] = None,
+                       rows: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """Rebuild the records of rows ``[start, stop)``, or of the given ``rows``, from a columnar chunk."""
+    if rows is None:
+        stop = len(chunk['timestamps']) if stop is None else stop
+        rows = range(start, stop)
+    records = [{} for _ in rows]
+    for path, column in chunk['columns'].items():
+        keys = json.loads(path)
+        absent = set(chunk['missing'].get(path, ()))
+        for position, row in enumerate(rows):
+            if row in absent:
+                continue
+            target = records[position]
+            for key in keys[:-1]:
+                target = target.setdefault(key, {})
+            target[keys[-1]] = column[row]
+    return records
+
+
+def save_chunk(file, chunk: Dict[str, Any]):
+    """Write a columnar chunk as an ``.npz`` archive of one array per column.
+
+    Columns holding only ints or only floats are stored as int64/float64
+    arrays; any other column is stored as one JSON string per row. Rows
+    missing from a column are recorded in a boolean mask next to it.
+    """
+    paths = list(chunk['columns'])
+    encodings = []
+    arrays = {'timestamps': np.asarray(chunk['timestamps'], dtype=np.int64)}
+    for index, path in enumerate(paths):
+        column = chunk['columns'][path]
+        missing = np.zeros(len(column), dtype=bool)
+        missing[chunk['missing'].get(path, [])] = True
+        values = [value for value, absent in zip(column, missing) if not absent]
+        if values and all(type(value) is int and -2 ** 63 <= value < 2 ** 63 for value in values):
+            encoding, dtype, filler = 'i8', np.int64, 0
+        elif values and all(type(value) is float for value in values):
+            encoding, dtype, filler = 'f8', np.float64, 0.0
+        else:
+            encoding, dtype, filler = 'json', str, None
+        if encoding == 'json':
+            array = np.array([json.dumps(value) for value in column], dtype=str)
+        else:
+            array = np.array([filler if absent else value for value, absent in zip(column, missing)],
+                             dtype=dtype)
+        encodings.append(encoding)
+        arrays[f'values_{index}'] = array
+        if missing.any():
+            arrays[f'missing_{index}'] = missing
+    meta = {'paths': paths, 'encodings': encodings, 'sources': chunk.get('sources', [])}
+    arrays['meta'] = np.array(json.dumps(meta))
+    np.savez(file, **arrays)
+
+
+def load_chunk(path: Path, start_ns: Optional[int] = None,
+               end_ns: Optional[int] = None) -> Dict[str, Any]:
+    """Read the rows of a chunk with ``start_ns <= timestamp <= end_ns``.
+
+    Timestamps are bisected first and every column is sliced to the range,
+    so only the rows in range are decoded.
+    """
+    with np.load(path) as data:
+        meta = json.loads(str(data['meta'][()]))
+        timestamps = data['timestamps']
+        lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, side='left'))
+        hi = len(timestamps) if end_ns is None else int(np.searchsorted(timestamps, end_ns, side='right'))
+        columns, missing = {}, {}
+        for index, (column, encoding) in enumerate(zip(meta['paths'], meta['encodings'])):
+            values = data[f'values_{index}'][lo:hi]
+            if encoding == 'json':
+                columns[column] = [json.loads(value) for value in values]
+            else:
+                columns[column] = values.tolist()
+            if f'missing_{index}' in data.files:
+                rows = np.flatnonzero(data[f'missing_{index}'][lo:hi]).tolist()
+                if rows:
+                    missing[column] = rows
+                    for row in rows:
+                        columns[column][row] = None
+        return {
+            'timestamps': timestamps[lo:hi].tolist(),
+            'columns': columns,
+            'missing': missing,
+            'sources': meta['sources']
+        }
+
+
+def _flatten(record: Dict[str, Any], prefix: Tuple[str, ...] = ()):
+    for key, value in record.items():
+        if isinstance(value, dict) and value:
+            yield from _flatten(value, prefix + (key,))
+        else:
+            yield json.dumps(list(prefix + (key,))), value
+
+
+class FileCatalog:
+    """Time-partitioned index over a directory of JSON data files.
+
+    A sidecar catalog records the first and last record timestamp of every
+    file matching ``pattern``, so a range query bisects the files by start
+    time (with a running maximum of end times) and opens only the files
+    that overlap it. The directory is listed only when its modification time
+    changes (or is too recent to trust); otherwise a query still stats the
+    files it overlaps, so files rewritten in place are picked up. A file is
+    parsed for indexing only when it is new or has changed.
+
+    Compaction is off unless ``compact_after`` is set, and only runs when
+    ``compact`` is called, never from ``load``. It merges the files whose
+    records all end more than ``compact_after`` before the current hour into
+    one columnar chunk per hour (``chunk_<prefix><YYYYmmdd_HH>.npz``, see
+    ``save_chunk``) and then DELETES the source files, so enable it only for
+    directories whose files no other component needs. Each chunk lists its
+    sources, so an interrupted compaction is finished on the next refresh.
+    """
+
+    def __init__(self, directory: str, pattern: str,
+                 compact_after: Optional[timedelta] = None, max_workers: int = 4):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.chunk_prefix = f"{CHUNK_PREFIX}{pattern.split('*')[0]}"
+        self.chunk_pattern = f"{self.chunk_prefix}*{CHUNK_SUFFIX}"
+        self.compact_after = compact_after
+        self.max_workers = max_workers
+
+        self.entries: Dict[str, CatalogEntry] = {}
+        self._ordered: List[CatalogEntry] = []
+        self._starts: List[int] = []
+        self._max_ends: List[int] = []
+        self._directory_mtime_ns: Optional[int] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._read_catalog()
+
+    @property
+    def catalog_path(self) -> Path:
+        return self.directory / CATALOG_FILE
+
+    def _read_catalog(self):
+        try:
+            with open(self.catalog_path, 'r') as f:
+                catalog = json.load(f)
+            self.entries = {entry['name']: CatalogEntry(**entry) for entry in catalog['entries']}
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Rebuilding unreadable catalog {self.catalog_path}: {e}")
+            self.entries = {}
+        self._rebuild_index()
+
+    def _write_catalog(self):
+        temporary = self.catalog_path.with_suffix('.tmp')
+        with open(temporary, 'w') as f:
+            json.dump({'entries': [asdict(entry) for entry in self._ordered]}, f)
+        os.replace(temporary, self.catalog_path)
+
+    def _rebuild_index(self):
+        self._ordered = sorted(self.entries.values(), key=lambda entry: (entry.start_ns, entry.name))
+        self._starts = [entry.start_ns for entry in self._ordered]
+        self._max_ends = list(accumulate((entry.end_ns for entry in self._ordered), max))
+
+    @staticmethod
+    def _read_records(path: Path) -> List[Dict[str, Any]]:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return data if isinstance(data, list) else [data]
+
+    def _index_file(self, path: Path, stat: os.stat_result) -> Optional[CatalogEntry]:
+        """Parse a new or changed file for its time range."""
+        if fnmatch(path.name, self.chunk_pattern):
+            with np.load(path) as data:
+                timestamps = data['timestamps'].tolist()
+                chunk = json.loads(str(data['meta'][()]))
+            # Finish a compaction that stopped before its sources were removed
+            for source in chunk.get('sources', []):
+                self.entries.pop(source, None)
+                (self.directory / source).unlink(missing_ok=True)
+            columnar = True
+        else:
+            timestamps = [to_epoch_ns(record['timestamp']) for record in self._read_records(path)]
+            columnar = False
+        if not timestamps:
+            return None
+        return CatalogEntry(
+            name=path.name,
+            start_ns=min(timestamps),
+            end_ns=max(timestamps),
+            count=len(timestamps),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            columnar=columnar
+        )
+
+    def refresh(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> bool:
+        """Bring the catalog up to date with the directory; return whether it changed.
+
+        When the directory is unchanged, only the files overlapping
+        ``[start_ns, end_ns]`` (if given) are checked for in-place changes.
+        """
+        with self._lock:
+            scan_ns = time.time_ns()
+            try:
+                directory_mtime_ns = self.directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                return False
+
+            listed = directory_mtime_ns != self._directory_mtime_ns
+            present = {}
+            if listed:
+                with os.scandir(self.directory) as scan:
+                    for item in scan:
+                        if item.is_file() and (fnmatch(item.name, self.pattern) or
+                                               fnmatch(item.name, self.chunk_pattern)):
+                            present[item.name] = item.stat()
+                removed = set(self.entries) - set(present)
+            elif start_ns is not None:
+                removed = set()
+                for entry in self._overlapping(start_ns, end_ns):
+                    try:
+                        present[entry.name] = os.stat(self.directory / entry.name)
+                    except FileNotFoundError:
+                        removed.add(entry.name)
+            else:
+                return False
+
+            changed = bool(removed)
+            complete = True
+            for name in removed:
+                del self.entries[name]
+            # Index chunks first so their compacted sources are dropped before being parsed
+            for name in sorted(present, key=lambda name: not fnmatch(name, self.chunk_pattern)):
+                stat = present[name]
+                entry = self.entries.get(name)
+                if entry is not None and (entry.size, entry.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                    continue
+                if not (self.directory / name).exists():
+                    continue
+                try:
+                    entry = self._index_file(self.directory / name, stat)
+                except Exception as e:
+                    # Possibly still being written; retry on the next refresh
+                    logger.warning(f"Could not index {name}: {e}")
+                    complete = False
+                    continue
+                if entry is not None:
+                    self.entries[name] = entry
+                else:
+                    self.entries.pop(name, None)
+                changed = True
+
+            if changed:
+                self._rebuild_index()
+                self._write_catalog()
+            if listed and complete:
+                self._mark_listed(directory_mtime_ns, scan_ns)
+            return changed
+
+    def _mark_listed(self, directory_mtime_ns: int, scan_ns: int):
+        """Skip listing until the directory changes, unless the listing may have raced a write."""
+        racy = scan_ns - directory_mtime_ns < RACY_NS
+        self._directory_mtime_ns = None if racy else directory_mtime_ns
+
+    def _overlapping(self, start_ns: int, end_ns: int) -> List[CatalogEntry]:
+        # Files starting after the range cannot overlap it, and the
+        # running maximum of end times skips the prefix that ends before it
+        hi = bisect_right(self._starts, end_ns)
+        lo = bisect_left(self._max_ends, start_ns, 0, hi)
+        return [entry for entry in self._ordered[lo:hi] if entry.end_ns >= start_ns]
+
+    def query(self, start_ns: int, end_ns: int) -> List[CatalogEntry]:
+        """Catalog entries whose time range overlaps ``[start_ns, end_ns]``."""
+        with self._lock:
+            return self._overlapping(start_ns, end_ns)
+
+    def _load_entry(self, entry: CatalogEntry, start_ns: int,
+                    end_ns: int) -> List[Tuple[int, Dict[str, Any]]]:
+        path = self.directory / entry.name
+        try:
+            if entry.columnar:
+                chunk = load_chunk(path, start_ns, end_ns)
+                return list(zip(chunk['timestamps'], columns_to_records(chunk)))
+            records = []
+            for record in self._read_records(path):
+                timestamp_ns = to_epoch_ns(record['timestamp'])
+                if start_ns <= timestamp_ns <= end_ns:
+                    records.append((timestamp_ns, record))
+            return records
+        except Exception as e:
+            logger.error(f"Error loading data from {path}: {e}")
+            return []
+
+    def load(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
+        """Load the records with ``start_time <= timestamp <= end_time``, sorted by time."""
+        start_ns, end_ns = to_epoch_ns(start_time), to_epoch_ns(end_time)
+        self.refresh(start_ns, end_ns)
+        entries = self.query(start_ns, end_ns)
+
+        if len(entries) > 1 and self.max_workers > 1:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                executor = self._executor
+            parts = list(executor.map(lambda entry: self._load_entry(entry, start_ns, end_ns), entries))
+        else:
+            parts = [self._load_entry(entry, start_ns, end_ns) for entry in entries]
+
+        records = [item for part in parts for item in part]
+        records.sort(key=lambda item: item[0])
+        return [record for _, record in records]
+
+    def compact(self, now: Optional[datetime] = None) -> int:
+        """Compact closed hours of raw files into columnar chunks; return files compacted.
+
+        A maintenance call, kept off the load path: the compacted source files
+        are removed. Does nothing when ``compact_after`` is None.
+        """
+        if self.compact_after is None:
+            return 0
+        self.refresh()
+        now = now or datetime.now()
+        cutoff_ns = to_epoch_ns(now - self.compact_after) // HOUR_NS * HOUR_NS
+
+        with self._lock:
+            hours: Dict[int, List[CatalogEntry]] = {}
+            for entry in self._ordered:
+                if entry.start_ns >= cutoff_ns:
+                    break
+                if not entry.columnar and entry.end_ns < cutoff_ns:
+                    hours.setdefault(entry.start_ns // HOUR_NS * HOUR_NS, []).append(entry)
+            if not hours:
+                return 0
+
+            compacted = 0
+            for hour_ns, sources in hours.items():
+                name = f"{self.chunk_prefix}{from_epoch_ns(hour_ns):%Y%m%d_%H}{CHUNK_SUFFIX}"
+                try:
+                    self._write_chunk(name, sources)
+                except Exception as e:
+                    logger.error(f"Error compacting {len(sources)} files into {name}: {e}")
+                    continue
+                compacted += len(sources)
+
+            self._rebuild_index()
+            self._write_catalog()
+            self._mark_listed(self.directory.stat().st_mtime_ns, time.time_ns())
+        logger.info(f"Compacted {compacted} files in {self.directory} into hourly chunks")
+        return compacted
+
+    def _write_chunk(self, name: str, sources: List[CatalogEntry]):
+        """Merge source files (and any existing chunk of the same hour) into a chunk."""
+        records = []
+        existing = self.entries.get(name)
+        if existing is not None:
+            records.extend(columns_to_records(load_chunk(self.directory / name)))
+        for source in sources:
+            records.extend(self._read_records(self.directory / source.name))
+        records.sort(key=lambda record: to_epoch_ns(record['timestamp']))
+
+        chunk = records_to_columns(records)
+        chunk['sources'] = [source.name for source in sources]
+        path = self.directory / name
+        temporary = path.with_suffix('.tmp')
+        with open(temporary, 'wb') as f:
+            save_chunk(f, chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+        stat = path.stat()
+        timestamps = chunk['timestamps']
+        self.entries[name] = CatalogEntry(
+            name=name, start_ns=timestamps[0], end_ns=timestamps[-1], count=len(timestamps),
+            size=stat.st_size, mtime_ns=stat.st_mtime_ns, columnar=True
+        )
+        for source in sources:
+            self.entries.pop(source.name, None)
+            (self.directory / source.name).unlink(missing_ok=True)
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,67 @@
+import logging
+import time
+import numpy as np
+from prometheus_client import Histogram
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics
+PREPROCESSING_TIME = Histogram(
+    'preprocessing_stage_seconds', 'Time spent in each preprocessing stage', ['stage']
+)
+
+
+def detrend_columns(matrix: np.ndarray) -> np.ndarray:
+    """Remove the least-squares line from every column.
+
+    Equivalent to ``scipy.signal.detrend(matrix, axis=0)``, but with the
+    closed-form slope instead of a least-squares solve.
+    """
+    centered = matrix - matrix.mean(axis=0)
+    if len(matrix) < 2:
+        return centered
+    t = np.arange(len(matrix)) - (len(matrix) - 1) / 2
+    slope = (t @ centered) / (t @ t)
+    return centered - np.multiply.outer(t, slope)
+
+
+def clip_outliers(matrix: np.ndarray, k: float = 1.5) -> np.ndarray:
+    """Clip every column to ``k`` interquartile ranges beyond its quartiles."""
+    q1, q3 = np.percentile(matrix, [25, 75], axis=0)
+    iqr = q3 - q1
+    return np.clip(matrix, q1 - k * iqr, q3 + k * iqr)
+
+
+def standardize(matrix: np.ndarray) -> np.ndarray:
+    """Scale every column to zero mean and unit variance; constant columns become NaN."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (matrix - matrix.mean(axis=0)) / matrix.std(axis=0)
+
+
+def preprocess_matrix(matrix: np.ndarray, normalize: bool = True, detrend: bool = True,
+                      remove_outliers: bool = True) -> np.ndarray:
+    """Preprocess a block of aligned streams, one stream per column.
+
+    Runs each enabled stage once over the whole block, so every pairwise
+    metric shares the result; a 1-D array is a single stream. Detrending and
+    IQR clipping commute with scaling, so standardising last yields the same
+    series as standardising first while keeping the output at zero mean and
+    unit variance. The time spent in each stage is exported per stage.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    stages = [
+        ('detrend', detrend, detrend_columns),
+        ('remove_outliers', remove_outliers, clip_outliers),
+        ('normalize', normalize, standardize)
+    ]
+    for stage, enabled, transform in stages:
+        if enabled:
+            start_time = time.perf_counter()
+            matrix = transform(matrix)
+            PREPROCESSING_TIME.labels(stage=stage).observe(time.perf_counter() - start_time)
+    return matrix
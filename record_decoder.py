@@ -0,0 +1,214 @@
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+import operator
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MINUTE_NS = 60 * 1_000_000_000
+
+
+@dataclass(frozen=True)
+class Field:
+    """One column decoded from a nested record.
+
+    ``kind`` is 'float' for numeric values, 'length' for the length of a
+    list, and 'category' for strings, which are dictionary-encoded to
+    integer codes.
+    """
+    name: str
+    path: Tuple[str, ...]
+    kind: str = 'float'
+
+
+WEBCAM_FIELDS = (
+    Field('posture_quality', ('posture', 'posture_quality')),
+    Field('shoulder_alignment', ('posture', 'shoulder_alignment')),
+    Field('back_straightness', ('posture', 'back_straightness')),
+    Field('head_position', ('posture', 'head_position')),
+    Field('face_count', ('faces',), 'length')
+)
+
+HID_FIELDS = (
+    Field('cpu_percent', ('system', 'cpu_percent')),
+    Field('memory_percent', ('system', 'memory_percent')),
+    Field('key_presses', ('hid', 'keyboard_events', 'key_presses')),
+    Field('mouse_clicks', ('hid', 'mouse_events', 'clicks')),
+    Field('active_window', ('hid', 'active_window'), 'category')
+)
+
+
+@dataclass
+class DecodedRecords:
+    """Column arrays of a batch of records, sorted by timestamp."""
+    timestamps: np.ndarray  # datetime64[ns]
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+
+def _lookup(record: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    for key in path:
+        record = record[key]
+    return record
+
+
+class RecordDecoder:
+    """Decode JSON records into typed NumPy columns.
+
+    Each field is read by an accessor built from its path, straight into
+    a typed array; batches with missing or malformed values fall back to
+    decoding value by value, where missing numeric values decode to NaN and
+    missing categories to -1. The category dictionaries persist across
+    batches, so codes stay stable from one batch to the next.
+    """
+
+    def __init__(self, fields: Sequence[Field], required: Optional[str] = None):
+        self.fields = tuple(fields)
+        self.required = required
+        self.categories: Dict[str, Dict[str, int]] = {
+            field.name: {} for field in self.fields if field.kind == 'category'
+        }
+        self._accessors = {field.name: self._build_accessor(field) for field in self.fields}
+
+    @staticmethod
+    def _build_accessor(field: Field):
+        """Function reading a field's value from a record, with the keys of short paths unrolled."""
+        path = field.path
+        if len(path) == 1:
+            access = operator.itemgetter(path[0])
+        elif len(path) == 2:
+            access = lambda record, a=path[0], b=path[1]: record[a][b]
+        elif len(path) == 3:
+            access = lambda record, a=path[0], b=path[1], c=path[2]: record[a][b][c]
+        else:
+            access = lambda record: reduce(operator.getitem, path, record)
+        if field.kind == 'length':
+            return lambda record: len(access(record))
+        return access
+
+    def _columns(self, records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Decode every field with its accessor."""
+        columns = {}
+        for field in self.fields:
+            values = map(self._accessors[field.name], records)
+            if field.kind == 'category':
+                codes = self.categories[field.name]
+                columns[field.name] = np.fromiter(
+                    (-1 if value is None else codes.setdefault(value, len(codes)) for value in values),
+                    dtype=np.int32, count=len(records)
+                )
+            else:
+                columns[field.name] = np.fromiter(values, dtype=np.float64, count=len(records))
+        return columns
+
+    def labels(self, name: str) -> List[str]:
+        """Category labels of a field, indexed by code."""
+        return list(self.categories[name])
+
+    def _values(self, records: List[Dict[str, Any]], field: Field) -> np.ndarray:
+        if field.kind == 'category':
+            codes = self.categories[field.name]
+            missing, dtype = -1, np.int32
+        else:
+            missing, dtype = np.nan, np.float64
+        values = np.empty(len(records), dtype=dtype)
+        for index, record in enumerate(records):
+            try:
+                value = _lookup(record, field.path)
+            except (KeyError, TypeError):
+                value = None
+            try:
+                if value is None:
+                    value = missing
+                elif field.kind == 'category':
+                    value = codes.setdefault(value, len(codes))
+                elif field.kind == 'length':
+                    value = len(value)
+                values[index] = value
+            except (TypeError, ValueError):
+                values[index] = missing
+        return values
+
+    def decode(self, records: List[Dict[str, Any]]) -> DecodedRecords:
+        """Decode a batch of records (each with an ISO ``timestamp``)."""
+        if self.required is not None:
+            records = [record for record in records if self.required in record]
+        timestamps = [record['timestamp'] for record in records]
+        try:
+            timestamps = np.array(timestamps, dtype='datetime64[ns]')
+        except ValueError:
+            # Offsets in the strings; let pandas convert them
+            timestamps = pd.to_datetime(timestamps).to_numpy(dtype='datetime64[ns]')
+
+        try:
+            columns = self._columns(records)
+        except (KeyError, TypeError, ValueError):
+            columns = {field.name: self._values(records, field) for field in self.fields}
+        if len(timestamps) > 1 and np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind='stable')
+            timestamps = timestamps[order]
+            columns = {name: values[order] for name, values in columns.items()}
+        return DecodedRecords(timestamps, columns)
+
+    def frame(self, records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Decode a batch into a DataFrame indexed by timestamp.
+
+        Numeric columns wrap the decoded arrays and category columns become
+        pandas categoricals over the codes.
+        """
+        decoded = self.decode(records)
+        data = {}
+        for field in self.fields:
+            values = decoded.columns[field.name]
+            if field.kind == 'category':
+                values = pd.Categorical.from_codes(values, categories=self.labels(field.name))
+            data[field.name] = values
+        index = pd.DatetimeIndex(decoded.timestamps, name='timestamp')
+        return pd.DataFrame(data, index=index, copy=False)
+
+
+def minute_means(timestamps: np.ndarray,
+                 values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-minute means of the columns of ``values`` over sorted timestamps.
+
+    Returns every minute from the first to the last record (as
+    datetime64[ns]) and the matching means, NaN where a minute or a column
+    has no values. Rows are grouped with ``np.add.reduceat`` over the minute
+    boundaries, for all columns at once.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    if not len(timestamps):
+        return np.array([], dtype='datetime64[ns]'), np.empty((0, values.shape[1]))
+
+    buckets = timestamps.view(np.int64) // MINUTE_NS
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts, axis=0)
+    counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+
+    first = buckets[0]
+    minutes = ((first + np.arange(buckets[-1] - first + 1)) * MINUTE_NS).view('datetime64[ns]')
+    means = np.full((len(minutes), values.shape[1]), np.nan)
+    with np.errstate(invalid='ignore'):
+        means[buckets[starts] - first] = sums / counts
+    return minutes, means
+
+
+def resample_minutes(frame: pd.DataFrame) -> pd.DataFrame:
+    """``frame.resample('1min').mean(numeric_only=True)`` for a sorted timestamp index."""
+    numeric = frame.select_dtypes('number')
+    minutes, means = minute_means(frame.index.to_numpy(dtype='datetime64[ns]'), numeric.to_numpy())
+    index = pd.DatetimeIndex(minutes, name=frame.index.name, freq='min' if len(minutes) else None)
+    return pd.DataFrame(means, index=index, columns=numeric.columns)
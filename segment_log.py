@@ -0,0 +1,152 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SEGMENT_PATTERN = 'segment_*.jsonl'
+
+
+class SegmentLog:
+    """Append-only JSON-lines log split into daily directories of segments.
+
+    Records are appended to ``<YYYY-MM-DD>/segment_<n>.jsonl`` under
+    ``directory``; a segment is rotated once it would grow past
+    ``max_segment_bytes``. Every append is flushed to the operating system,
+    and the active segment is fsynced at most ``fsync_interval`` seconds
+    after an append: inline once the interval has passed, otherwise by a
+    timer, so records are synced even when traffic stops (and on close). A
+    crash loses no acknowledged record and a power failure at most the last
+    interval. A torn final line is skipped on replay.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = 100 * 1024 * 1024,
+                 fsync_interval: float = 1.0):
+        if max_segment_bytes <= 0:
+            raise ValueError("Segment size must be positive")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._path: Optional[Path] = None
+        self._handle: Optional[BinaryIO] = None
+        self._size = 0
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+
+    @staticmethod
+    def _segment_index(path: Path) -> int:
+        return int(path.stem.split('_')[1])
+
+    def _segments(self, day_dir: Path) -> List[Path]:
+        return sorted(day_dir.glob(SEGMENT_PATTERN), key=self._segment_index)
+
+    def _close_segment(self):
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self._handle.close()
+            self._handle = None
+            self._last_fsync = time.monotonic()
+            self._dirty = False
+
+    def _open_segment(self, day: str, rotate: bool):
+        """Continue the day's last segment, or start the next one when rotating."""
+        self._close_segment()
+        day_dir = self.directory / day
+        day_dir.mkdir(exist_ok=True)
+        segments = self._segments(day_dir)
+        index = self._segment_index(segments[-1]) if segments else 1
+        if rotate and segments:
+            index += 1
+        self._day = day
+        self._path = day_dir / f"segment_{index:06d}.jsonl"
+        self._handle = open(self._path, 'ab')
+        self._size = self._handle.tell()
+        if self._size and self._ends_torn(self._path):
+            # Terminate a line torn by a crash so the next record stays readable
+            self._handle.write(b'\n')
+            self._size += 1
+
+    @staticmethod
+    def _ends_torn(path: Path) -> bool:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def append(self, record: Dict[str, Any], timestamp: Optional[datetime] = None):
+        """Append one record to the segment of its day."""
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode()
+        day = (timestamp or datetime.now()).strftime('%Y-%m-%d')
+        with self._lock:
+            if day != self._day:
+                self._open_segment(day, rotate=False)
+            if self._size and self._size + len(line) > self.max_segment_bytes:
+                self._open_segment(day, rotate=True)
+            self._handle.write(line)
+            self._handle.flush()
+            self._size += len(line)
+            self._dirty = True
+            elapsed = time.monotonic() - self._last_fsync
+            if elapsed >= self.fsync_interval:
+                self._fsync()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval - elapsed, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _fsync(self):
+        """Sync the active segment to disk; call with the lock held."""
+        if self._handle is not None and self._dirty:
+            os.fsync(self._handle.fileno())
+            self._dirty = False
+        self._last_fsync = time.monotonic()
+
+    def _flush(self):
+        """Timer callback syncing records appended since the last fsync."""
+        with self._lock:
+            self._timer = None
+            self._fsync()
+
+    def days(self) -> List[str]:
+        """Days that have segments, oldest first."""
+        return sorted(path.name for path in self.directory.iterdir()
+                      if path.is_dir() and any(path.glob(SEGMENT_PATTERN)))
+
+    def replay(self, start_day: Optional[date] = None,
+               end_day: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the records of every segment between two days (inclusive), in append order."""
+        start = start_day.isoformat() if start_day is not None else None
+        end = end_day.isoformat() if end_day is not None else None
+        for day in self.days():
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            for segment in self._segments(self.directory / day):
+                with open(segment, 'rb') as f:
+                    for number, line in enumerate(f, 1):
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            logger.warning(f"Skipping unreadable record {number} in {segment}")
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._close_segment()
+            self._day = None
@@ -0,0 +1,190 @@
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+import logging
+import os
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FILE = 'timestamps.i64'
+COLUMN_SUFFIX = '.f64'
+
+
+class SegmentStore:
+    """Append-only, memory-mapped columnar history for one stream.
+
+    History is split into segment directories of at most ``segment_capacity``
+    points. Each segment holds a raw int64 timestamp file plus one raw float64
+    file per field, so reads are served from ``np.memmap`` views and only the
+    pages a query touches are loaded. Every append is fsynced, columns before
+    timestamps, and everything on disk is rediscovered on start-up, so history
+    survives process restarts; a segment torn by a crash is cut back to the
+    points all of its files hold.
+    """
+
+    def __init__(self, directory: str, segment_capacity: int = 1_000_000):
+        if segment_capacity <= 0:
+            raise ValueError("Segment capacity must be positive")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_capacity = segment_capacity
+
+        self._segments: List[Path] = sorted(
+            path for path in self.directory.glob('segment_*') if path.is_dir()
+        )
+        for segment in self._segments:
+            self._repair_segment(segment)
+        self._handles: Dict[str, BinaryIO] = {}
+        self._active_length = self._segment_length(self._segments[-1]) if self._segments else 0
+        self._active_fields = set(self._segment_fields(self._segments[-1])) if self._segments else set()
+
+    def __len__(self) -> int:
+        return sum(self._segment_length(segment) for segment in self._segments)
+
+    @staticmethod
+    def _segment_length(segment: Path) -> int:
+        path = segment / TIMESTAMP_FILE
+        return path.stat().st_size // 8 if path.exists() else 0
+
+    @staticmethod
+    def _segment_fields(segment: Path) -> List[str]:
+        return sorted(
+            unquote(path.name[:-len(COLUMN_SUFFIX)])
+            for path in segment.glob(f'*{COLUMN_SUFFIX}')
+        )
+
+    def _repair_segment(self, segment: Path):
+        """Truncate every file of a segment to the length they all have."""
+        paths = [segment / TIMESTAMP_FILE] + [
+            self._column_path(segment, field) for field in self._segment_fields(segment)
+        ]
+        sizes = [path.stat().st_size if path.exists() else 0 for path in paths]
+        size = min(sizes) // 8 * 8
+        for path, current in zip(paths, sizes):
+            if current != size:
+                logger.warning(f"Truncating torn segment file {path} from {current} to {size} bytes")
+                os.truncate(path, size)
+
+    def _column_path(self, segment: Path, field: str) -> Path:
+        return segment / f"{quote(field, safe='')}{COLUMN_SUFFIX}"
+
+    def _open_segment(self):
+        """Close the active segment and start a new one."""
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+        index = int(self._segments[-1].name.split('_')[1]) + 1 if self._segments else 1
+        segment = self.directory / f"segment_{index:06d}"
+        segment.mkdir()
+        self._segments.append(segment)
+        self._active_length = 0
+        self._active_fields = set()
+
+    def _handle(self, name: str, path: Path) -> BinaryIO:
+        handle = self._handles.get(name)
+        if handle is None:
+            handle = open(path, 'ab')
+            self._handles[name] = handle
+        return handle
+
+    def append(self, timestamps_ns: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Append a block of points (sorted by timestamp) to the history."""
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        offset = 0
+        while offset < len(timestamps_ns):
+            if not self._segments or self._active_length >= self.segment_capacity:
+                self._open_segment()
+            segment = self._segments[-1]
+            count = min(len(timestamps_ns) - offset, self.segment_capacity - self._active_length)
+            chunk = slice(offset, offset + count)
+
+            for field in self._active_fields | set(columns):
+                path = self._column_path(segment, field)
+                if field not in self._active_fields:
+                    self._active_fields.add(field)
+                    if self._active_length:
+                        # Backfill a field first seen part-way through the segment
+                        np.full(self._active_length, np.nan).tofile(self._handle(field, path))
+                values = columns.get(field)
+                block = (
+                    np.asarray(values[chunk], dtype=np.float64)
+                    if values is not None else np.full(count, np.nan)
+                )
+                block.tofile(self._handle(field, path))
+
+            # Columns are durable before the timestamps that make them visible
+            self._sync(name for name in self._handles if name != TIMESTAMP_FILE)
+            timestamps_ns[chunk].tofile(self._handle(TIMESTAMP_FILE, segment / TIMESTAMP_FILE))
+            self._sync([TIMESTAMP_FILE])
+
+            self._active_length += count
+            offset += count
+
+    def _sync(self, names):
+        for name in names:
+            handle = self._handles[name]
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def flush(self):
+        for handle in self._handles.values():
+            handle.flush()
+
+    def close(self):
+        self.flush()
+        for handle in self._handles.values():
+            handle.close()
+        self._handles = {}
+
+    def read(self, start_ns: Optional[int] = None,
+             end_ns: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Read the points with ``start_ns <= timestamp <= end_ns``.
+
+        Segments outside the range are skipped and the range inside each segment
+        is located by bisection. A range within one segment is returned as
+        read-only memory-mapped views; ranges spanning segments are concatenated.
+        """
+        self.flush()
+        parts = []
+        for segment in self._segments:
+            length = self._segment_length(segment)
+            if not length:
+                continue
+            timestamps = np.memmap(segment / TIMESTAMP_FILE, dtype=np.int64, mode='r', shape=(length,))
+            if (start_ns is not None and timestamps[-1] < start_ns) or \
+                    (end_ns is not None and timestamps[0] > end_ns):
+                continue
+            lo = 0 if start_ns is None else int(np.searchsorted(timestamps, start_ns, side='left'))
+            hi = length if end_ns is None else int(np.searchsorted(timestamps, end_ns, side='right'))
+            if hi <= lo:
+                continue
+            columns = {
+                field: np.memmap(self._column_path(segment, field), dtype=np.float64,
+                                 mode='r', shape=(length,))[lo:hi]
+                for field in self._segment_fields(segment)
+            }
+            parts.append((timestamps[lo:hi], columns))
+
+        if not parts:
+            return np.empty(0, dtype=np.int64), {}
+        if len(parts) == 1:
+            return parts[0]
+
+        fields = sorted({field for _, columns in parts for field in columns})
+        return (
+            np.concatenate([timestamps for timestamps, _ in parts]),
+            {
+                field: np.concatenate([
+                    columns.get(field, np.full(len(timestamps), np.nan))
+                    for timestamps, columns in parts
+                ])
+                for field in fields
+            }
+        )
@@ -0,0 +1,384 @@
+import json
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, List, Optional, Any, Tuple
+import logging
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_epoch_ns(timestamp: Any) -> int:
+    """Convert an ISO timestamp or datetime to integer nanoseconds since the epoch.
+
+    Naive timestamps are treated as local wall-clock time (the convention used
+    throughout the collectors); aware timestamps are converted to local time first.
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone().replace(tzinfo=None)
+    return ((timestamp - EPOCH) // timedelta(microseconds=1)) * 1000
+
+
+def from_epoch_ns(timestamp_ns: int) -> datetime:
+    """Convert integer nanoseconds since the epoch back to a naive datetime."""
+    return EPOCH + timedelta(microseconds=int(timestamp_ns) // 1000)
+
+
+def encoded_size(data: Dict[str, Any], timestamp: str) -> int:
+    """Size in bytes of a buffered point as it would be serialised to JSON."""
+    point = {'data': data, 'timestamp': timestamp}
+    try:
+        return len(json.dumps(point).encode('utf-8'))
+    except (TypeError, ValueError):
+        return len(json.dumps(point, default=str).encode('utf-8'))
+
+
+class BufferSizeTracker:
+    """Running byte-size ledger for list-based point buffers.
+
+    Each point's encoded size is recorded once when it is buffered, and the
+    per-stream totals are adjusted as points are evicted, so reading the buffer
+    size is O(streams) instead of re-serialising every buffered point. Streams
+    share no counters, so callers only need to serialise updates per stream.
+    """
+
+    def __init__(self):
+        self._sizes: Dict[str, Deque[int]] = {}
+        self._stream_bytes: Dict[str, int] = {}
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(list(self._stream_bytes.values()))
+
+    def record(self, stream_name: str, data: Dict[str, Any], timestamp: str) -> int:
+        """Record a newly buffered point and return its encoded size."""
+        size = encoded_size(data, timestamp)
+        self._sizes.setdefault(stream_name, deque()).append(size)
+        self._stream_bytes[stream_name] = self._stream_bytes.get(stream_name, 0) + size
+        return size
+
+    def evict(self, stream_name: str, count: int = 1) -> int:
+        """Forget the ``count`` oldest points of a stream and return the bytes freed."""
+        sizes = self._sizes.get(stream_name)
+        freed = 0
+        while sizes and count > 0:
+            freed += sizes.popleft()
+            count -= 1
+        if freed:
+            self._stream_bytes[stream_name] -= freed
+        return freed
+
+    def clear(self, stream_name: Optional[str] = None):
+        """Forget one stream, or every stream when no name is given."""
+        streams = [stream_name] if stream_name is not None else list(self._sizes)
+        for name in streams:
+            self._stream_bytes.pop(name, None)
+            self._sizes.pop(name, None)
+
+    def stream_bytes(self, stream_name: str) -> int:
+        return self._stream_bytes.get(stream_name, 0)
+
+
+def asof_indices(timeline_ns: np.ndarray, timestamps_ns: np.ndarray,
+                 tolerance_ns: Optional[int] = None, direction: str = 'nearest') -> np.ndarray:
+    """Match every timeline point to a point of a sorted timestamp array.
+
+    Returns, for each timeline entry, the index of the matched point in
+    ``timestamps_ns`` or -1 when there is no match within ``tolerance_ns``.
+    ``direction`` follows ``pandas.merge_asof``: 'backward', 'forward' or 'nearest'.
+    """
+    if len(timestamps_ns) == 0:
+        return np.full(len(timeline_ns), -1, dtype=np.int64)
+
+    backward = np.searchsorted(timestamps_ns, timeline_ns, side='right') - 1
+    forward = np.searchsorted(timestamps_ns, timeline_ns, side='left')
+    forward[forward >= len(timestamps_ns)] = -1
+
+    if direction == 'backward':
+        indices = backward
+    elif direction == 'forward':
+        indices = forward
+    elif direction == 'nearest':
+        unmatched = np.iinfo(np.int64).max
+        backward_distance = np.where(
+            backward >= 0, timeline_ns - timestamps_ns[np.maximum(backward, 0)], unmatched
+        )
+        forward_distance = np.where(
+            forward >= 0, timestamps_ns[np.maximum(forward, 0)] - timeline_ns, unmatched
+        )
+        indices = np.where(forward_distance < backward_distance, forward, backward)
+    else:
+        raise ValueError(f"Unsupported alignment direction: {direction}")
+
+    if tolerance_ns is not None:
+        distance = np.abs(timeline_ns - timestamps_ns[np.maximum(indices, 0)])
+        indices = np.where((indices >= 0) & (distance <= tolerance_ns), indices, -1)
+    return indices
+
+
+def batch_points(records: Any, timestamps: Optional[List[Any]] = None,
+                 fields: Optional[List[str]] = None) -> List[Tuple[Dict[str, Any], str]]:
+    """Normalise a batch of records into ``(data, timestamp)`` pairs.
+
+    ``records`` is either a list of ``{'data': ..., 'timestamp': ...}`` points, or
+    a 2-D NumPy block with one row per point whose rows are named by
+    ``timestamps`` and columns by ``fields``.
+    """
+    if isinstance(records, np.ndarray):
+        if records.ndim != 2 or timestamps is None or fields is None:
+            raise ValueError("A NumPy block needs 2 dimensions, timestamps and fields")
+        if records.shape != (len(timestamps), len(fields)):
+            raise ValueError("Block shape does not match timestamps and fields")
+        return [
+            (dict(zip(fields, row)), timestamp if isinstance(timestamp, str) else timestamp.isoformat())
+            for row, timestamp in zip(records.tolist(), timestamps)
+        ]
+    return [(record['data'], record['timestamp']) for record in records]
+
+
+class LatePointError(ValueError):
+    """Raised when a point arrives too far out of order to be reordered."""
+
+
+class ColumnarRingBuffer:
+    """Preallocated per-stream ring buffer with columnar storage.
+
+    Timestamps are kept as int64 epoch nanoseconds and every numeric field as a
+    float64 column. Each slot is written twice (at ``i`` and ``i + capacity``) so
+    the live window is always one contiguous region and can be handed out as a
+    zero-copy slice. Appends are O(1) and eviction only moves the start pointer.
+    The encoded size of every point is kept in its own column so ``nbytes`` is
+    maintained as a running total.
+
+    Points are kept sorted by timestamp so time ranges can be located by
+    bisection. Out-of-order arrivals are inserted in place as long as they land
+    within the last ``reorder_depth`` points; anything later than that is
+    rejected with a ``LatePointError``.
+
+    ``on_evict``, if given, is called with the timestamps and value columns of
+    every block of points just before they are evicted (e.g. to spill them to
+    disk). The arrays are views that are only valid during the call.
+    """
+
+    def __init__(self, capacity: int, reorder_depth: int = 64,
+                 on_evict: Optional[Callable[[np.ndarray, Dict[str, np.ndarray]], None]] = None):
+        if capacity <= 0:
+            raise ValueError("Capacity must be positive")
+        self.capacity = capacity
+        self.reorder_depth = max(0, min(reorder_depth, capacity - 1))
+        self.on_evict = on_evict
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._payloads = np.empty(2 * capacity, dtype=object)
+        self._sizes = np.zeros(2 * capacity, dtype=np.int64)
+        self._start = 0
+        self._size = 0
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns.keys())
+
+    def _column(self, field: str) -> np.ndarray:
+        column = self._columns.get(field)
+        if column is None:
+            column = np.full(2 * self.capacity, np.nan, dtype=np.float64)
+            self._columns[field] = column
+        return column
+
+    def _arrays(self) -> List[np.ndarray]:
+        return [self._timestamps, self._payloads, self._sizes, *self._columns.values()]
+
+    def _write(self, slot: int, timestamp_ns: int, values: Dict[str, float],
+               payload: Any, size: int):
+        """Write one point into a physical slot and its mirror."""
+        mirror = slot + self.capacity
+        self._timestamps[slot] = self._timestamps[mirror] = timestamp_ns
+        for field in values:
+            self._column(field)
+        for field, column in self._columns.items():
+            column[slot] = column[mirror] = values.get(field, np.nan)
+        self._payloads[slot] = self._payloads[mirror] = payload
+        self._sizes[slot] = self._sizes[mirror] = size
+
+    def _mirror(self, lo: int, hi: int):
+        """Copy physical slots ``[lo, hi)`` onto their mirror positions."""
+        cap = self.capacity
+        for array in self._arrays():
+            if lo < cap:
+                array[lo + cap:min(hi, cap) + cap] = array[lo:min(hi, cap)]
+            if hi > cap:
+                array[max(lo, cap) - cap:hi - cap] = array[max(lo, cap):hi]
+
+    def append(self, timestamp_ns: int, values: Dict[str, float],
+               payload: Any = None, size: int = 0) -> bool:
+        """Append a point, overwriting the oldest one when full.
+
+        ``size`` is the point's encoded size in bytes, added to ``nbytes``.
+        Returns True if an old point was evicted to make room.
+        """
+        if self._size and timestamp_ns < self._timestamps[self._start + self._size - 1]:
+            return self._insert_late(timestamp_ns, values, payload, size)
+
+        evicted = self._size == self.capacity
+        if evicted:
+            self.evict(1)
+        slot = (self._start + self._size) % self.capacity
+        self._write(slot, timestamp_ns, values, payload, size)
+        self._size += 1
+        self.nbytes += size
+        return evicted
+
+    def extend(self, timestamps_ns: np.ndarray, columns: Dict[str, np.ndarray],
+               payloads: Optional[List[Any]] = None, sizes: Optional[np.ndarray] = None) -> int:
+        """Append a sorted block of points with vectorised writes.
+
+        The block must not start before the newest buffered point; late points
+        have to go through ``append``. Returns the number of points evicted,
+        including points of the block itself that did not fit.
+        """
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        count = len(timestamps_ns)
+        if not count:
+            return 0
+        if np.any(np.diff(timestamps_ns) < 0) or (
+                self._size and timestamps_ns[0] < self._timestamps[self._start + self._size - 1]):
+            raise ValueError("Block must be sorted and start at or after the newest point")
+        sizes = np.zeros(count, dtype=np.int64) if sizes is None else np.asarray(sizes, dtype=np.int64)
+        if payloads is None:
+            payloads = [None] * count
+
+        # Make room, then spill whatever part of the block overflows on its own
+        evicted = self.evict(max(0, self._size + count - self.capacity))
+        skip = max(0, count - self.capacity)
+        if skip:
+            if self.on_evict is not None:
+                self.on_evict(timestamps_ns[:skip], {field: values[:skip] for field, values in columns.items()})
+            evicted += skip
+            timestamps_ns, sizes, payloads = timestamps_ns[skip:], sizes[skip:], payloads[skip:]
+            columns = {field: values[skip:] for field, values in columns.items()}
+            count = self.capacity
+
+        slots = (self._start + self._size + np.arange(count)) % self.capacity
+        mirrors = slots + self.capacity
+        block = np.empty(count, dtype=object)
+        block[:] = payloads
+        for field in columns:
+            self._column(field)
+        for array, values in (
+            (self._timestamps, timestamps_ns), (self._payloads, block), (self._sizes, sizes),
+            *((column, columns.get(field, np.nan)) for field, column in self._columns.items())
+        ):
+            array[slots] = values
+            array[mirrors] = values
+
+        self._size += count
+        self.nbytes += int(sizes.sum())
+        return evicted
+
+    def _insert_late(self, timestamp_ns: int, values: Dict[str, float],
+                     payload: Any, size: int) -> bool:
+        """Insert an out-of-order point into its sorted position near the tail."""
+        depth = min(self.reorder_depth, self._size)
+        tail = self.timestamps[self._size - depth:]
+        position = int(np.searchsorted(tail, timestamp_ns, side='right'))
+        if position == 0 and depth < self._size:
+            raise LatePointError(
+                f"Point arrived more than {self.reorder_depth} points out of order"
+            )
+        index = self._size - depth + position
+
+        evicted = self._size == self.capacity
+        if evicted:
+            self.evict(1)
+            index -= 1
+        for field in values:
+            self._column(field)
+
+        # Shift the tail right by one within the contiguous region, then mirror it
+        lo = self._start + index
+        hi = self._start + self._size + 1
+        for array in self._arrays():
+            array[lo + 1:hi] = array[lo:hi - 1].copy()
+        self._timestamps[lo] = timestamp_ns
+        for field, column in self._columns.items():
+            column[lo] = values.get(field, np.nan)
+        self._payloads[lo] = payload
+        self._sizes[lo] = size
+        self._mirror(lo, hi)
+
+        self._size += 1
+        self.nbytes += size
+        return evicted
+
+    def evict(self, count: int) -> int:
+        """Drop the ``count`` oldest points by advancing the start pointer."""
+        count = max(0, min(count, self._size))
+        if count:
+            if self.on_evict is not None:
+                end = self._start + count
+                self.on_evict(
+                    self._timestamps[self._start:end],
+                    {field: column[self._start:end] for field, column in self._columns.items()}
+                )
+            self.nbytes -= int(self._sizes[self._start:self._start + count].sum())
+        self._start = (self._start + count) % self.capacity
+        self._size -= count
+        return count
+
+    def evict_before(self, timestamp_ns: int) -> int:
+        """Drop all points older than ``timestamp_ns``."""
+        return self.evict(int(np.searchsorted(self.timestamps, timestamp_ns, side='left')))
+
+    def window(self, start_ns: int, end_ns: int) -> Tuple[int, int]:
+        """Locate the points with ``start_ns <= timestamp <= end_ns`` by bisection.
+
+        Returns the ``[lo, hi)`` index range into the buffer views.
+        """
+        timestamps = self.timestamps
+        return (
+            int(np.searchsorted(timestamps, start_ns, side='left')),
+            int(np.searchsorted(timestamps, end_ns, side='right'))
+        )
+
+    def clear(self):
+        self._start = 0
+        self._size = 0
+        self.nbytes = 0
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Zero-copy view of the buffered timestamps (epoch ns)."""
+        return self._timestamps[self._start:self._start + self._size]
+
+    @property
+    def payloads(self) -> np.ndarray:
+        """Zero-copy view of the original data dictionaries."""
+        return self._payloads[self._start:self._start + self._size]
+
+    def column(self, field: str) -> np.ndarray:
+        """Zero-copy view of one value column."""
+        return self._columns[field][self._start:self._start + self._size]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Zero-copy views of all value columns."""
+        return {field: self.column(field) for field in self._columns}
+
+    def latest(self) -> Optional[Tuple[int, Any]]:
+        """Return the most recently appended (timestamp_ns, payload)."""
+        if not self._size:
+            return None
+        slot = self._start + self._size - 1
+        return int(self._timestamps[slot]), self._payloads[slot]
@@ -26,12 +26,16 @@ REPORT_COUNT = Counter('reports_generated_total', 'Total number of reports gener
 STORAGE_USAGE = Gauge('storage_usage_bytes', 'Total storage usage in bytes')
 
 class SystemIntegration:
-    def __init__(self, storage_path: str = "integrated_data"):
+    def __init__(self, storage_path: str = "integrated_data", streaming_join: bool = False):
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(exist_ok=True)
         
+        # Emit every aligned tick instead of polling the latest common point
+        self.streaming_join = streaming_join
+        
         # Initialize components
-        self.data_synchronizer = DataSynchronizer()
+        # Points evicted from the live buffers are kept as on-disk history
+        self.data_synchronizer = DataSynchronizer(history_dir=str(self.storage_path / "history"))
         self.predictive_analytics = PredictiveAnalytics()
         
         # Initialize data storage
@@ -40,6 +44,10 @@ class SystemIntegration:
         # Thread safety
         self.lock = threading.Lock()
         
+        # Synchronized points whose save failed, retried on the next call
+        self.unsaved_points: List[Any] = []
+        self.max_unsaved_points = 1000
+        
         # Performance monitoring
         self.last_cleanup_time = time.time()
         self.cleanup_interval = 3600  # 1 hour
@@ -82,16 +90,33 @@ class SystemIntegration:
                 return False
             
             # Synchronize data
-            synced_data = self.data_synchronizer.synchronize_data()
-            if synced_data:
+            if self.streaming_join:
+                synced_points = self.data_synchronizer.synchronized_ticks()
+            else:
+                synced_data = self.data_synchronizer.synchronize_data()
+                synced_points = [synced_data] if synced_data else []
+            
+            # Ticks are consumed from the synchronizer, so a failed save must
+            # not drop the rest: save each one, and keep the failures for retry
+            with self.lock:
+                synced_points = self.unsaved_points + list(synced_points)
+                self.unsaved_points = []
+            unsaved = []
+            for synced_data in synced_points:
                 # Save synchronized data
                 if not self._save_synced_data(synced_data):
-                    logger.error("Failed to save synchronized data")
-                    return False
+                    unsaved.append(synced_data)
+                    continue
                 
                 # Analyze data for alerts
                 self._analyze_data(synced_data)
             
+            if unsaved:
+                with self.lock:
+                    self.unsaved_points = (unsaved + self.unsaved_points)[-self.max_unsaved_points:]
+                logger.error(f"Failed to save {len(unsaved)} synchronized data points; retrying on the next call")
+                return False
+            
             # Periodic cleanup
             current_time = time.time()
             if current_time - self.last_cleanup_time > self.cleanup_interval:
@@ -107,6 +132,10 @@ class SystemIntegration:
             duration = time.time() - start_time
             PROCESSING_DURATION.observe(duration)
     
+    def close(self):
+        """Spill the buffered points to history and release its files."""
+        self.data_synchronizer.close()
+    
     def _cleanup_old_data(self):
         """Clean up old data based on retention policy."""
         try:
@@ -0,0 +1,353 @@
+"""Micro-benchmarks for the correlation paths.
+
+Run directly (``python tests/benchmark_data_correlation.py``); these are not
+collected by pytest.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import pandas as pd
+from scipy import signal
+from scipy.stats import spearmanr
+
+from correlation_engine import (
+    chunked_correlation_matrices, correlation_matrices, cross_correlation_batch, pair_correlations
+)
+from dynamic_time_warping import _dtw_compiled, dtw_batch, dtw_distance
+from file_catalog import FileCatalog
+from record_decoder import HID_FIELDS, RecordDecoder, resample_minutes
+
+logging.disable(logging.CRITICAL)
+
+
+def _streams(count: int, rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    base = np.sin(np.linspace(0, 20, rows))
+    return {
+        f"stream{i}": base * rng.uniform(-1, 1) + rng.normal(0, 0.5, rows)
+        for i in range(count)
+    }
+
+
+def _pairwise(streams):
+    """Reference implementation of the original per-pair correlation loop."""
+    names = list(streams)
+    correlations = {}
+    for i in range(len(names)):
+        for j in range(i + 1, len(names)):
+            series1, series2 = streams[names[i]], streams[names[j]]
+            correlations[f"{names[i]}_{names[j]}"] = {
+                'pearson': float(np.corrcoef(series1, series2)[0, 1]),
+                'spearman': float(spearmanr(series1, series2)[0])
+            }
+    return correlations
+
+
+def _engine(streams):
+    names = list(streams)
+    matrices = correlation_matrices(np.column_stack([streams[name] for name in names]))
+    return {
+        method: pair_correlations(names, matrix) for method, matrix in matrices.items()
+    }
+
+
+def bench_correlation_matrix(stream_counts=(5, 20, 50), rows: int = 1000, repeats: int = 10):
+    """Pearson + Spearman over every stream pair: per-pair loop vs one matrix pass."""
+    print(f"Pearson + Spearman for all pairs, {rows} aligned rows")
+    print(f"{'streams':>8}{'pairwise ms':>14}{'matrix ms':>12}{'speedup':>10}")
+    results = {}
+    for count in stream_counts:
+        streams = _streams(count, rows)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            expected = _pairwise(streams)
+        pairwise = (time.perf_counter() - start) / repeats * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            actual = _engine(streams)
+        matrix = (time.perf_counter() - start) / repeats * 1000
+
+        for key, values in expected.items():
+            assert abs(values['pearson'] - actual['pearson'][key]) < 1e-9
+            assert abs(values['spearman'] - actual['spearman'][key]) < 1e-9
+        results[count] = (pairwise, matrix)
+        print(f"{count:>8}{pairwise:>14.2f}{matrix:>12.2f}{pairwise / matrix:>9.1f}x")
+    return results
+
+
+def _python_dtw(x, y):
+    """Reference implementation of an unconstrained pure-Python DTW (symmetric2)."""
+    n, m = len(x), len(y)
+    prev = [float('inf')] * (m + 1)
+    for i in range(n):
+        curr = [float('inf')] * (m + 1)
+        for j in range(m):
+            cost = abs(x[i] - y[j])
+            if i == 0 and j == 0:
+                curr[1] = cost
+            else:
+                curr[j + 1] = min(prev[j] + 2 * cost, prev[j + 1] + cost, curr[j] + cost)
+        prev = curr
+    return prev[m]
+
+
+def _current_dtw():
+    """The DTW the synchronizers called before: the ``dtw`` package when installed."""
+    try:
+        from dtw import dtw
+        return 'dtw package', lambda x, y: dtw(x, y).distance
+    except ImportError:
+        return 'pure Python', _python_dtw
+
+
+def bench_dtw(lengths=(100, 1000, 10000), window_ratio: float = 0.1, pairs: int = 4,
+              reference_limit: int = 1000):
+    """DTW per pair: previous unconstrained path vs the built-in banded DP."""
+    name, reference = _current_dtw()
+    print(f"DTW per pair, Sakoe-Chiba band of {window_ratio:.0%}, numba "
+          f"{'available' if _dtw_compiled is not None else 'not installed'}")
+    print(f"{'length':>8}{name + ' ms':>18}{'full ms':>10}{'banded ms':>11}{'batch ms':>10}"
+          f"{'pruned ms':>11}")
+    results = {}
+    for length in lengths:
+        streams = list(_streams(pairs + 1, length).values())
+        series_pairs = [(streams[0], other) for other in streams[1:]]
+        window = max(1, int(window_ratio * length))
+
+        def timed(function):
+            start = time.perf_counter()
+            values = [function(x, y) for x, y in series_pairs]
+            return (time.perf_counter() - start) / len(series_pairs) * 1000, values
+
+        if length <= reference_limit:
+            reference_ms, expected = timed(reference)
+        else:
+            reference_ms, expected = float('nan'), None
+        full_ms, full = timed(lambda x, y: dtw_distance(x, y))
+        if expected is not None and name == 'pure Python':
+            assert np.allclose(full, expected)
+        banded_ms, banded = timed(lambda x, y: dtw_distance(x, y, window))
+
+        start = time.perf_counter()
+        batch = dtw_batch(series_pairs, window)
+        batch_ms = (time.perf_counter() - start) / len(series_pairs) * 1000
+        assert np.allclose(batch, banded)
+
+        # With a threshold below most distances, LB_Keogh and row abandoning prune the DP
+        threshold = float(np.median(banded))
+        start = time.perf_counter()
+        dtw_batch(series_pairs, window, max_dist=threshold)
+        pruned_ms = (time.perf_counter() - start) / len(series_pairs) * 1000
+
+        results[length] = (reference_ms, full_ms, banded_ms, batch_ms, pruned_ms)
+        print(f"{length:>8}{reference_ms:>18.2f}{full_ms:>10.2f}{banded_ms:>11.2f}{batch_ms:>10.2f}"
+              f"{pruned_ms:>11.2f}")
+    return results
+
+
+def _full_cross_correlation(series1, series2):
+    """Reference implementation of the original every-lag cross-correlation."""
+    correlation = signal.correlate(series1, series2, mode='full')
+    lags = signal.correlation_lags(len(series1), len(series2))
+    peak = np.argmax(np.abs(correlation))
+    return int(lags[peak]), float(correlation[peak])
+
+
+def bench_cross_correlation(lengths=(1440, 10080, 100000), stream_count: int = 10,
+                            max_lags=(5, 60), repeats: int = 3):
+    """Cross-correlation for all pairs: every lag per pair vs a lag-limited batch."""
+    print(f"Cross-correlation for all pairs of {stream_count} streams")
+    print(f"{'rows':>8}{'full ms':>10}" + ''.join(f"{f'lag<={lag} ms':>14}" for lag in max_lags))
+    results = {}
+    for rows in lengths:
+        streams = [series - series.mean() for series in _streams(stream_count, rows).values()]
+        pairs = [(i, j) for i in range(stream_count) for j in range(i + 1, stream_count)]
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for i, j in pairs:
+                _full_cross_correlation(streams[i], streams[j])
+        full = (time.perf_counter() - start) / repeats * 1000
+
+        limited = []
+        for max_lag in max_lags:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                cross_correlation_batch(streams, pairs, max_lag)
+            limited.append((time.perf_counter() - start) / repeats * 1000)
+        results[rows] = (full, *limited)
+        print(f"{rows:>8}{full:>10.2f}" + ''.join(f"{value:>14.2f}" for value in limited))
+    return results
+
+
+def bench_chunked_correlation(days=(1, 30), stream_counts=(2, 50), workers: int = None,
+                              repeats: int = 3):
+    """Pearson + Spearman from chunked moments: inline vs on a persistent process pool.
+
+    ``days`` of minute-level data, i.e. 1440 rows per day.
+    """
+    workers = workers or os.cpu_count() or 1
+    print(f"Chunked Pearson + Spearman on minute-level data, {workers} workers "
+          f"({os.cpu_count()} CPUs)")
+    print(f"{'rows':>8}{'streams':>9}{'one pass ms':>13}{'inline ms':>11}{'pool ms':>10}")
+    results = {}
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        # Start the workers before timing, as the correlator's pool is persistent;
+        # every run below is also warmed up once so the workers have imported it
+        list(executor.map(time.sleep, [0.2] * workers))
+        for day_count in days:
+            rows = 1440 * day_count
+            chunk_rows = -(-rows // max(workers, 2))
+            bounds = [(start, min(start + chunk_rows, rows)) for start in range(0, rows, chunk_rows)]
+            for count in stream_counts:
+                matrix = np.column_stack(list(_streams(count, rows).values()))
+                timings = []
+                for run in (lambda: correlation_matrices(matrix),
+                            lambda: chunked_correlation_matrices(matrix, bounds),
+                            lambda: chunked_correlation_matrices(matrix, bounds, executor)):
+                    run()
+                    start = time.perf_counter()
+                    for _ in range(repeats):
+                        result = run()
+                    timings.append((time.perf_counter() - start) / repeats * 1000)
+                    assert np.allclose(result['pearson'], correlation_matrices(matrix)['pearson'])
+                results[(rows, count)] = tuple(timings)
+                print(f"{rows:>8}{count:>9}" + ''.join(
+                    f"{value:>{width}.2f}" for value, width in zip(timings, (13, 11, 10))
+                ))
+    return results
+
+
+def _scan_all(directory, start_time, end_time):
+    """Reference implementation of the original loader: open every file, keep the range."""
+    data = []
+    for file_path in directory.glob('metrics_*.json'):
+        with open(file_path, 'r') as f:
+            record = json.load(f)
+        if start_time <= datetime.fromisoformat(record['timestamp']) <= end_time:
+            data.append(record)
+    return sorted(data, key=lambda x: x['timestamp'])
+
+
+def bench_range_loading(days=(1, 7), window_minutes: int = 5, repeats: int = 5):
+    """Load the last few minutes of per-minute HID files: full scan vs the file catalog.
+
+    The first catalog load is timed with indexing the directory and the
+    maintenance compaction of closed hours; later loads reuse the sidecar
+    catalog.
+    """
+    print(f"Last {window_minutes} minutes of per-minute metrics files")
+    print(f"{'files':>8}{'scan ms':>10}{'first load ms':>15}{'catalog ms':>12}")
+    results = {}
+    for day_count in days:
+        directory = Path(tempfile.mkdtemp())
+        try:
+            end_time = datetime.now().replace(second=0, microsecond=0)
+            files = 1440 * day_count
+            for minute in range(files):
+                timestamp = end_time - timedelta(minutes=minute)
+                record = {'timestamp': timestamp.isoformat(), 'system': {'cpu_percent': 50.0}}
+                with open(directory / f"metrics_{timestamp:%Y%m%d_%H%M%S}.json", 'w') as f:
+                    json.dump(record, f)
+            start_time = end_time - timedelta(minutes=window_minutes)
+
+            start = time.perf_counter()
+            for _ in range(repeats):
+                expected = _scan_all(directory, start_time, end_time)
+            scan = (time.perf_counter() - start) / repeats * 1000
+
+            catalog = FileCatalog(directory, 'metrics_*.json', compact_after=timedelta(hours=1))
+            start = time.perf_counter()
+            catalog.compact()
+            catalog.load(start_time, end_time)
+            first = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _ in range(repeats):
+                loaded = catalog.load(start_time, end_time)
+            warm = (time.perf_counter() - start) / repeats * 1000
+            catalog.close()
+            assert loaded == expected
+        finally:
+            shutil.rmtree(directory)
+        results[files] = (scan, first, warm)
+        print(f"{files:>8}{scan:>10.2f}{first:>15.2f}{warm:>12.2f}")
+    return results
+
+
+def _pandas_minutes(hid_data):
+    """Reference implementation of the original record-to-minute path."""
+    hid_df = pd.DataFrame([
+        {
+            'timestamp': d['timestamp'],
+            'cpu_percent': d['system']['cpu_percent'],
+            'memory_percent': d['system']['memory_percent'],
+            'key_presses': d['hid']['keyboard_events']['key_presses'],
+            'mouse_clicks': d['hid']['mouse_events']['clicks'],
+            'active_window': d['hid']['active_window']
+        }
+        for d in hid_data
+    ])
+    hid_df['timestamp'] = pd.to_datetime(hid_df['timestamp'])
+    hid_df.set_index('timestamp', inplace=True)
+    return hid_df.resample('1min').mean(numeric_only=True)
+
+
+def bench_record_decoding(record_counts=(3600, 86400), repeats: int = 3):
+    """HID records to minute means: dict comprehension + resample vs typed decoder + reduceat."""
+    print("HID records to minute means")
+    print(f"{'records':>8}{'pandas ms':>11}{'decoder ms':>12}{'speedup':>10}")
+    rng = np.random.default_rng(7)
+    start_time = datetime(2026, 10, 1)
+    results = {}
+    for count in record_counts:
+        hid_data = [
+            {
+                'timestamp': (start_time + timedelta(seconds=i)).isoformat(),
+                'system': {'cpu_percent': float(rng.uniform(0, 100)), 'memory_percent': 60.0},
+                'hid': {
+                    'keyboard_events': {'key_presses': int(rng.integers(0, 50))},
+                    'mouse_events': {'clicks': int(rng.integers(0, 10))},
+                    'active_window': f"Window {i % 7}"
+                }
+            }
+            for i in range(count)
+        ]
+        decoder = RecordDecoder(HID_FIELDS)
+        timings = []
+        for run in (lambda: _pandas_minutes(hid_data), lambda: resample_minutes(decoder.frame(hid_data))):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                result = run()
+            timings.append((time.perf_counter() - start) / repeats * 1000)
+        pd.testing.assert_frame_equal(result, _pandas_minutes(hid_data), check_index_type=False)
+        results[count] = tuple(timings)
+        print(f"{count:>8}{timings[0]:>11.2f}{timings[1]:>12.2f}{timings[0] / timings[1]:>9.1f}x")
+    return results
+
+
+if __name__ == "__main__":
+    bench_correlation_matrix()
+    print()
+    bench_dtw()
+    print()
+    bench_cross_correlation()
+    print()
+    bench_chunked_correlation()
+    print()
+    bench_range_loading()
+    print()
+    bench_record_decoding()
@@ -0,0 +1,228 @@
+"""Micro-benchmarks for the stream synchronizers.
+
+Run directly (``python tests/benchmark_data_sync.py``); these are not collected
+by pytest.
+"""
+import logging
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from data_synchronizer import DataSynchronizer
+from advanced_data_sync import AdvancedDataSynchronizer
+
+logging.disable(logging.CRITICAL)
+warnings.simplefilter('ignore', RuntimeWarning)
+
+
+def _timestamps(count: int, start: datetime = None, step_ms: int = 10):
+    start = start or datetime.now()
+    return [(start + timedelta(milliseconds=i * step_ms)).isoformat() for i in range(count)]
+
+
+def bench_ingest_latency(max_buffer_size: int = 10000, buckets: int = 10):
+    """Mean ingest latency per fill decile; should stay flat as the buffer fills."""
+    results = {}
+    for name, synchronizer in (
+        ('DataSynchronizer', DataSynchronizer(max_buffer_size=max_buffer_size)),
+        ('AdvancedDataSynchronizer', AdvancedDataSynchronizer(max_buffer_size=max_buffer_size)),
+    ):
+        # Keep periodic cleanup out of the measurement
+        synchronizer.cleanup_interval = float('inf')
+        timestamps = _timestamps(max_buffer_size)
+        bucket_size = max_buffer_size // buckets
+        latencies = []
+        for bucket in range(buckets):
+            start = time.perf_counter()
+            for timestamp in timestamps[bucket * bucket_size:(bucket + 1) * bucket_size]:
+                synchronizer.add_data_stream(
+                    'activity',
+                    {'keyboard_events': 10, 'mouse_clicks': 5, 'window': 'editor'},
+                    timestamp
+                )
+            latencies.append((time.perf_counter() - start) / bucket_size * 1e6)
+        results[name] = latencies
+
+    print(f"Ingest latency (us/point) filling to max_buffer_size={max_buffer_size}")
+    print("fill %   " + "".join(f"{name:>28}" for name in results))
+    for bucket in range(buckets):
+        row = "".join(f"{latencies[bucket]:>28.1f}" for latencies in results.values())
+        print(f"{(bucket + 1) * 100 // buckets:>5}%  {row}")
+    return results
+
+
+def _linear_scan_sync(points_by_stream, sync_window_ms: int):
+    """Reference implementation of the original list-scanning synchronisation."""
+    latest = {
+        stream: max(datetime.fromisoformat(point['timestamp']) for point in points)
+        for stream, points in points_by_stream.items()
+    }
+    sync_time = min(latest.values())
+    synced = {}
+    for stream, points in points_by_stream.items():
+        window_points = [
+            point for point in points
+            if abs((datetime.fromisoformat(point['timestamp']) - sync_time).total_seconds() * 1000)
+            <= sync_window_ms
+        ]
+        if window_points:
+            synced[stream] = window_points[-1]['data']
+    return synced
+
+
+def bench_sync_window(points_per_stream: int = 10000, streams: int = 8, repeats: int = 50):
+    """Cost of one synchronize_data call with bisected window selection."""
+    synchronizer = DataSynchronizer(max_buffer_size=points_per_stream)
+    synchronizer.cleanup_interval = float('inf')
+    timestamps = _timestamps(points_per_stream)
+    points_by_stream = {}
+    for stream in range(streams):
+        name = f"stream{stream}"
+        points_by_stream[name] = []
+        for i, timestamp in enumerate(timestamps):
+            data = {'value': float(i), 'stream': stream}
+            synchronizer.add_data_stream(name, data, timestamp)
+            points_by_stream[name].append({'data': data, 'timestamp': timestamp})
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        synchronizer.synchronize_data()
+    bisected = (time.perf_counter() - start) / repeats * 1000
+
+    start = time.perf_counter()
+    _linear_scan_sync(points_by_stream, synchronizer.sync_window_ms)
+    linear = (time.perf_counter() - start) * 1000
+
+    print(f"synchronize_data with {streams} streams x {points_per_stream} points")
+    print(f"  bisected window selection: {bisected:8.3f} ms/call")
+    print(f"  linear scan (original):    {linear:8.3f} ms/call")
+    return bisected, linear
+
+
+def bench_batch_ingest(points: int = 20000, batch_size: int = 500):
+    """Ingest throughput of add_data_batch against per-point add_data_stream."""
+    timestamps = _timestamps(points)
+    records = [
+        {'data': {'keyboard_events': i % 7, 'mouse_clicks': i % 3, 'window': 'editor'},
+         'timestamp': timestamp}
+        for i, timestamp in enumerate(timestamps)
+    ]
+    block = np.array([[i % 7, i % 3] for i in range(points)], dtype=np.float64)
+    results = {}
+    for name, factory in (
+        ('DataSynchronizer', lambda: DataSynchronizer(max_buffer_size=points)),
+        ('AdvancedDataSynchronizer', lambda: AdvancedDataSynchronizer(max_buffer_size=points)),
+    ):
+        synchronizer = factory()
+        synchronizer.cleanup_interval = float('inf')
+        start = time.perf_counter()
+        for record in records:
+            synchronizer.add_data_stream('activity', record['data'], record['timestamp'])
+        per_point = points / (time.perf_counter() - start)
+
+        synchronizer = factory()
+        synchronizer.cleanup_interval = float('inf')
+        start = time.perf_counter()
+        for offset in range(0, points, batch_size):
+            synchronizer.add_data_batch('activity', records[offset:offset + batch_size])
+        batched = points / (time.perf_counter() - start)
+
+        synchronizer = factory()
+        synchronizer.cleanup_interval = float('inf')
+        start = time.perf_counter()
+        for offset in range(0, points, batch_size):
+            synchronizer.add_data_batch(
+                'activity', block[offset:offset + batch_size],
+                timestamps=timestamps[offset:offset + batch_size],
+                fields=['keyboard_events', 'mouse_clicks']
+            )
+        numpy_block = points / (time.perf_counter() - start)
+        results[name] = (per_point, batched, numpy_block)
+
+    print(f"Ingest throughput (points/s), {points} points in batches of {batch_size}")
+    print(f"{'':26}{'per point':>14}{'list batch':>14}{'numpy block':>14}")
+    for name, (per_point, batched, numpy_block) in results.items():
+        print(f"{name:26}{per_point:>14,.0f}{batched:>14,.0f}{numpy_block:>14,.0f}")
+    return results
+
+
+def _global_lock(cls):
+    """Variant of a synchronizer that serialises ingest and synchronization on one lock."""
+    class GlobalLock(cls):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._global = threading.Lock()
+
+        def add_data_stream(self, *args, **kwargs):
+            with self._global:
+                return super().add_data_stream(*args, **kwargs)
+
+        def synchronize_data(self):
+            with self._global:
+                return super().synchronize_data()
+
+    GlobalLock.__name__ = f"GlobalLock{cls.__name__}"
+    return GlobalLock
+
+
+def _producer_latencies(synchronizer, producers: int, points: int, synchronize: bool):
+    """Per-call ingest latencies (us) of producer threads, optionally racing a sync loop."""
+    latencies = [[] for _ in range(producers)]
+    done = threading.Event()
+    start_time = datetime.now()
+
+    def produce(index: int):
+        timestamps = _timestamps(points, start_time)
+        for i, timestamp in enumerate(timestamps):
+            start = time.perf_counter()
+            synchronizer.add_data_stream(f"producer{index}", {'value': float(i)}, timestamp)
+            latencies[index].append((time.perf_counter() - start) * 1e6)
+
+    def synchronize_loop():
+        while not done.is_set():
+            synchronizer.synchronize_data()
+
+    threads = [threading.Thread(target=produce, args=(i,)) for i in range(producers)]
+    syncer = threading.Thread(target=synchronize_loop)
+    if synchronize:
+        syncer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    if synchronize:
+        syncer.join()
+    return np.concatenate([np.asarray(values) for values in latencies])
+
+
+def bench_contention(producers: int = 3, points: int = 3000, max_buffer_size: int = 1000):
+    """Producer ingest latency with and without a concurrent synchronize_data loop."""
+    print(f"Producer latency (us/call), {producers} producer threads x {points} points")
+    print(f"{'':48}{'p50':>9}{'p99':>9}{'p99.9':>10}")
+    results = {}
+    for cls in (DataSynchronizer, AdvancedDataSynchronizer):
+        for variant in (_global_lock(cls), cls):
+            for synchronize in (False, True):
+                synchronizer = variant(max_buffer_size=max_buffer_size)
+                synchronizer.cleanup_interval = float('inf')
+                latencies = _producer_latencies(synchronizer, producers, points, synchronize)
+                label = f"{variant.__name__}{' + sync loop' if synchronize else ''}"
+                p50, p99, p999 = np.percentile(latencies, [50, 99, 99.9])
+                results[label] = (p50, p99, p999)
+                print(f"{label:48}{p50:>9.1f}{p99:>9.1f}{p999:>10.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    bench_ingest_latency()
+    bench_sync_window()
+    bench_batch_ingest()
+    bench_contention()
@@ -1,7 +1,10 @@
+import json
 import unittest
+from unittest.mock import patch
 from datetime import datetime, timedelta
 import numpy as np
 from advanced_data_sync import AdvancedDataSynchronizer, TimeSeriesPoint, SynchronizedDataPoint
+from stream_buffer import to_epoch_ns
 
 class TestAdvancedDataSynchronizer(unittest.TestCase):
     def setUp(self):
@@ -166,6 +169,122 @@ class TestAdvancedDataSynchronizer(unittest.TestCase):
         self.assertIn('average_correlation_time', metrics)
         self.assertGreater(metrics['stream_count'], 0)
     
+    def test_buffer_size_tracking(self):
+        """Test that the tracked buffer size matches re-serialising the buffer."""
+        synchronizer = AdvancedDataSynchronizer(max_buffer_size=5)
+        for i in range(8):
+            timestamp = (datetime.now() + timedelta(seconds=i)).isoformat()
+            synchronizer.add_data_stream('stream1', {'value': float(i), 'label': 'x' * i}, timestamp)
+        
+        expected = sum(
+            len(json.dumps(point).encode('utf-8'))
+            for point in synchronizer.data_buffer['stream1']
+        )
+        self.assertEqual(synchronizer._calculate_buffer_size(), expected)
+    
+    def test_add_data_batch(self):
+        """Test that a batch ingest trims and sizes the buffer like per-point ingest."""
+        records = [
+            {'data': {'value': float(i), 'label': 'x' * i},
+             'timestamp': (datetime.now() + timedelta(seconds=i)).isoformat()}
+            for i in range(8)
+        ]
+        synchronizer = AdvancedDataSynchronizer(max_buffer_size=5)
+        
+        self.assertEqual(synchronizer.add_data_batch('stream1', records), 8)
+        self.assertEqual(synchronizer.data_buffer['stream1'], records[-5:])
+        self.assertEqual(
+            [point.value for point in synchronizer.time_series_data['stream1']],
+            [3.0, 4.0, 5.0, 6.0, 7.0]
+        )
+        expected = sum(len(json.dumps(point).encode('utf-8')) for point in records[-5:])
+        self.assertEqual(synchronizer._calculate_buffer_size(), expected)
+    
+    def test_correlations_follow_sliding_window(self):
+        """Test that cached correlations are refreshed as the window slides."""
+        start = datetime.now().replace(microsecond=0)
+        synchronizer = AdvancedDataSynchronizer(correlation_window=60)
+        
+        def add(offset, value1, value2):
+            timestamp = (start + timedelta(seconds=offset)).isoformat()
+            synchronizer.add_data_stream('stream1', {'value': value1}, timestamp)
+            synchronizer.add_data_stream('stream2', {'value': value2}, timestamp)
+            return to_epoch_ns(timestamp)
+        
+        with patch.object(synchronizer, '_calculate_advanced_correlation',
+                          side_effect=lambda s1, s2, pearson, spearman: float(pearson)):
+            for i in range(30):
+                sync_ns = add(i, np.sin(i), np.sin(i))
+            first = synchronizer._calculate_correlations(synchronizer.time_series_data, sync_ns)
+            self.assertAlmostEqual(first['stream1_stream2'], 1.0)
+            
+            # Unchanged windows are served from the cache
+            calls = synchronizer._calculate_advanced_correlation.call_count
+            synchronizer._calculate_correlations(synchronizer.time_series_data, sync_ns)
+            self.assertEqual(synchronizer._calculate_advanced_correlation.call_count, calls)
+            
+            # Once the positively correlated samples slide out, the result follows
+            for i in range(100, 130):
+                sync_ns = add(i, np.sin(i), -np.sin(i))
+            second = synchronizer._calculate_correlations(synchronizer.time_series_data, sync_ns)
+            self.assertAlmostEqual(second['stream1_stream2'], -1.0)
+        
+        tracker = synchronizer.comoments[('stream1', 'stream2')]
+        self.assertEqual(len(tracker), 30)
+        self.assertAlmostEqual(synchronizer.live_correlations(sync_ns)['stream1_stream2'], -1.0)
+    
+    def test_correlation_cache_follows_window_contents(self):
+        """Test that unpaired points and buffer trimming invalidate cached correlations."""
+        start = datetime.now().replace(microsecond=0)
+        synchronizer = AdvancedDataSynchronizer(correlation_window=600, max_buffer_size=20)
+        
+        for i in range(20):
+            timestamp = (start + timedelta(seconds=i)).isoformat()
+            synchronizer.add_data_stream('stream1', {'value': np.sin(i)}, timestamp)
+            synchronizer.add_data_stream('stream2', {'value': np.cos(i)}, timestamp)
+        sync_ns = to_epoch_ns(timestamp)
+        
+        with patch.object(synchronizer, '_calculate_advanced_correlation', return_value=0.5) as combine:
+            synchronizer._calculate_correlations(synchronizer.time_series_data, sync_ns)
+            self.assertEqual(combine.call_count, 1)
+        
+            # A point of one stream only is never paired, but still changes the window
+            timestamp = (start + timedelta(seconds=19, milliseconds=500)).isoformat()
+            synchronizer.add_data_stream('stream1', {'value': 3.0}, timestamp)
+            synchronizer._calculate_correlations(synchronizer.time_series_data, to_epoch_ns(timestamp))
+            self.assertEqual(combine.call_count, 2)
+        
+            # Trimming the other stream's buffer slides its window as well
+            synchronizer.add_data_stream('stream2', {'value': 0.0}, timestamp)
+            synchronizer._calculate_correlations(synchronizer.time_series_data, to_epoch_ns(timestamp))
+            self.assertEqual(combine.call_count, 3)
+            synchronizer._calculate_correlations(synchronizer.time_series_data, to_epoch_ns(timestamp))
+            self.assertEqual(combine.call_count, 3)
+    
+    def test_correlation_terms_share_preprocessed_input(self):
+        """Test that Pearson and Spearman are both taken from the preprocessed windows."""
+        start = datetime.now().replace(microsecond=0)
+        synchronizer = AdvancedDataSynchronizer(correlation_window=60)
+        rng = np.random.default_rng(5)
+        trend = np.arange(40) * 10.0
+        noise1, noise2 = rng.normal(0, 1, 40), rng.normal(0, 1, 40)
+        for i in range(40):
+            timestamp = (start + timedelta(seconds=i)).isoformat()
+            synchronizer.add_data_stream('stream1', {'value': trend[i] + noise1[i]}, timestamp)
+            synchronizer.add_data_stream('stream2', {'value': trend[i] + noise2[i]}, timestamp)
+        
+        terms = {}
+        def capture(series1, series2, pearson, spearman):
+            terms.update(series1=series1, series2=series2, pearson=pearson, spearman=spearman)
+            return 0.0
+        with patch.object(synchronizer, '_calculate_advanced_correlation', side_effect=capture):
+            synchronizer._calculate_correlations(synchronizer.time_series_data, to_epoch_ns(timestamp))
+        
+        # The shared trend is detrended away, so the raw near-perfect correlation does not leak in
+        self.assertAlmostEqual(terms['pearson'], np.corrcoef(terms['series1'], terms['series2'])[0, 1])
+        self.assertLess(abs(terms['pearson']), 0.5)
+        self.assertLess(abs(terms['spearman']), 0.5)
+    
     def test_data_preprocessing(self):
         """Test data preprocessing functionality."""
         # Create test data with outliers
@@ -0,0 +1,147 @@
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from anomaly_detection import OnlineAnomalyDetector, P2Quantile, batch_anomaly_indices
+from data_synchronizer import DataSynchronizer, TimeSeriesData
+
+class TestOnlineAnomalyDetector(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.values = rng.normal(50, 2, 500)
+        self.values[[100, 250, 400]] = [90.0, 5.0, 120.0]
+
+    def test_rolling_matches_batch(self):
+        """Test that online rolling detection flags the same points as the batch method."""
+        detector = OnlineAnomalyDetector('rolling', threshold=2.0)
+        flagged = detector.replay(self.values)
+
+        self.assertEqual(flagged, batch_anomaly_indices(self.values, 'rolling', 2.0))
+        self.assertIn(100, flagged)
+
+    def test_rolling_stable_at_large_offsets(self):
+        """Test that the rolling variance keeps small spreads on top of a large level."""
+        values = 1e9 + self.values
+        detector = OnlineAnomalyDetector('rolling', threshold=2.0)
+        flagged = detector.replay(values)
+
+        self.assertEqual(flagged, batch_anomaly_indices(values, 'rolling', 2.0))
+        self.assertAlmostEqual(detector._window_m2 / 9, np.var(values[-10:], ddof=1), delta=1e-3)
+
+    def test_zscore_flags_spikes(self):
+        """Test that Welford z-scores flag spikes as they arrive."""
+        detector = OnlineAnomalyDetector('zscore', threshold=3.0)
+        flagged = detector.replay(self.values)
+
+        for index in (100, 250, 400):
+            self.assertIn(index, flagged)
+        self.assertAlmostEqual(detector.mean, np.mean(self.values))
+        self.assertAlmostEqual(detector.std, np.std(self.values))
+
+    def test_iqr_flags_spikes(self):
+        """Test that quartile sketches flag spikes as they arrive."""
+        detector = OnlineAnomalyDetector('iqr')
+        flagged = detector.replay(self.values)
+
+        for index in (100, 250, 400):
+            self.assertIn(index, flagged)
+
+    def test_batch_api_matches_time_series(self):
+        """Test that the batch API returns the indices detect_anomalies reports."""
+        start = datetime(2025, 1, 1)
+        series = TimeSeriesData(
+            timestamps=[start + timedelta(seconds=i) for i in range(len(self.values))],
+            values={'value': self.values},
+            metadata={}
+        )
+        for method in ('zscore', 'iqr', 'rolling'):
+            self.assertEqual(
+                OnlineAnomalyDetector.detect_batch(self.values, method),
+                series.detect_anomalies(method)['value']
+            )
+
+    def test_non_finite_values_skipped(self):
+        """Test that NaN and infinite values are never flagged and leave the statistics intact."""
+        for method in ('zscore', 'iqr', 'rolling'):
+            clean = OnlineAnomalyDetector(method)
+            expected = clean.replay(self.values[:300])
+            detector = OnlineAnomalyDetector(method)
+            flagged = detector.replay(np.r_[self.values[:150], np.nan, np.inf, -np.inf, self.values[150:300]])
+
+            self.assertEqual(flagged, [i if i < 150 else i + 3 for i in expected], method)
+            self.assertEqual(detector.count, 303)
+            self.assertEqual(detector.samples, 300)
+            np.testing.assert_equal(
+                (detector.mean, detector.std, detector._q1.value, detector._q3.value, detector._window_mean,
+                 detector._window_m2),
+                (clean.mean, clean.std, clean._q1.value, clean._q3.value, clean._window_mean, clean._window_m2)
+            )
+
+    def test_replay_against_detect_batch(self):
+        """Test online replay against batch detection: both flag the same spikes."""
+        for method in ('zscore', 'iqr', 'rolling'):
+            online = OnlineAnomalyDetector(method, threshold=2.0).replay(self.values)
+            batch = OnlineAnomalyDetector.detect_batch(self.values, method, threshold=2.0)
+            for index in (100, 250, 400):
+                self.assertIn(index, online, method)
+                self.assertIn(index, batch, method)
+
+    def test_unknown_method_rejected(self):
+        """Test that unsupported methods are rejected."""
+        with self.assertRaises(ValueError):
+            OnlineAnomalyDetector('median')
+
+class TestP2Quantile(unittest.TestCase):
+    def test_quartile_estimates(self):
+        """Test that streaming quartiles approximate the exact percentiles."""
+        values = np.random.default_rng(7).normal(0, 1, 10000)
+        q1, q3 = P2Quantile(0.25), P2Quantile(0.75)
+        for value in values:
+            q1.update(value)
+            q3.update(value)
+
+        self.assertAlmostEqual(q1.value, np.percentile(values, 25), delta=0.05)
+        self.assertAlmostEqual(q3.value, np.percentile(values, 75), delta=0.05)
+
+    def test_exact_for_few_values(self):
+        """Test that estimates are exact before the markers are initialised."""
+        quantile = P2Quantile(0.75)
+        for value in (3.0, 1.0, 2.0):
+            quantile.update(value)
+        self.assertEqual(quantile.value, np.percentile([3.0, 1.0, 2.0], 75))
+
+class TestSynchronizerAnomalies(unittest.TestCase):
+    def test_anomalies_flagged_on_ingest(self):
+        """Test that the synchronizer flags anomalies per stream as points arrive."""
+        synchronizer = DataSynchronizer(max_buffer_size=100, anomaly_method='rolling', anomaly_threshold=2.0)
+        start = datetime.now()
+        values = [10.0, 10.5, 9.5, 10.2, 9.8, 10.1, 9.9, 10.3, 9.7, 10.0, 50.0]
+        for i, value in enumerate(values):
+            synchronizer.add_data_stream(
+                'activity', {'keyboard_events': value}, (start + timedelta(seconds=i)).isoformat()
+            )
+
+        anomalies = synchronizer.get_anomalies('activity')
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0]['field'], 'keyboard_events')
+        self.assertEqual(anomalies[0]['value'], 50.0)
+
+    def test_non_finite_points_buffered_and_counted(self):
+        """Test that NaN values neither fail ingest nor stop the remaining detectors."""
+        start = datetime.now()
+        for method in ('zscore', 'iqr', 'rolling'):
+            synchronizer = DataSynchronizer(max_buffer_size=100, anomaly_method=method)
+            records = [
+                {'data': {'a': float(i % 3), 'b': float('nan') if i == 4 else float(i)},
+                 'timestamp': (start + timedelta(seconds=i)).isoformat()}
+                for i in range(11)
+            ]
+            self.assertEqual(synchronizer.add_data_batch('activity', records), 11, method)
+            self.assertTrue(synchronizer.add_data_stream(
+                'activity', {'a': float('nan')}, (start + timedelta(seconds=11)).isoformat()
+            ))
+            detectors = synchronizer.anomaly_detectors['activity']
+            self.assertEqual(detectors['a'].count, 12)
+            self.assertEqual(detectors['b'].samples, 10)
+
+if __name__ == '__main__':
+    unittest.main()
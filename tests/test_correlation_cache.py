@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from prometheus_client import REGISTRY
+from correlation_cache import CorrelationCache, array_digest
+
+class TestCorrelationCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = CorrelationCache(
+            'test', max_entries=3, ttl_seconds=10, max_bytes=1000, clock=lambda: self.now
+        )
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, {'cache': 'test', **labels}) or 0.0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that a lookup protects an entry from LRU eviction."""
+        for key in 'abc':
+            self.cache.put(key, 1.0, size=10)
+        self.assertEqual(self.cache.get('a'), 1.0)
+        self.cache.put('d', 1.0, size=10)
+
+        self.assertNotIn('b', self.cache)
+        self.assertIn('a', self.cache)
+        self.assertEqual(len(self.cache), 3)
+
+    def test_ttl_and_byte_bound(self):
+        """Test that entries expire after the TTL and the byte bound is kept."""
+        self.cache.put('old', 1.0, size=10)
+        self.now = 11
+        self.assertIsNone(self.cache.get('old'))
+
+        self.cache.put('a', 1.0, size=600)
+        self.cache.put('b', 2.0, size=600)
+        self.assertNotIn('a', self.cache)
+        self.assertEqual(self.cache.nbytes, 600)
+        self.cache.put('huge', 3.0, size=5000)
+        self.assertNotIn('huge', self.cache)
+
+    def test_prometheus_metrics(self):
+        """Test that hits, misses and evictions are exported by cache and reason."""
+        hits = self.sample('correlation_cache_hits_total')
+        misses = self.sample('correlation_cache_misses_total')
+        evictions = self.sample('correlation_cache_evictions_total', reason='lru')
+
+        self.cache.get('missing')
+        for key in 'abcd':
+            self.cache.put(key, {'pearson': 0.5})
+        self.cache.get('d')
+
+        self.assertEqual(self.sample('correlation_cache_hits_total'), hits + 1)
+        self.assertEqual(self.sample('correlation_cache_misses_total'), misses + 1)
+        self.assertEqual(self.sample('correlation_cache_evictions_total', reason='lru'), evictions + 1)
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.evictions), (1, 1, 1))
+
+    def test_array_digest(self):
+        """Test that digests follow content, shape and dtype, not object identity."""
+        values = np.arange(12, dtype=np.float64)
+        self.assertEqual(array_digest(values, values[::2]), array_digest(values.copy(), values[::2].copy()))
+        self.assertNotEqual(array_digest(values), array_digest(values.reshape(3, 4)))
+        self.assertNotEqual(array_digest(values), array_digest(values.astype(np.float32)))
+        self.assertNotEqual(array_digest(values[:6], values[6:]), array_digest(values[6:], values[:6]))
+
+if __name__ == '__main__':
+    unittest.main()
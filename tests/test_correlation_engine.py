@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+from scipy import signal
+from scipy.stats import pearsonr, spearmanr
+import correlation_engine
+from correlation_engine import (
+    SlidingCoMoments, align_windows, chunked_correlation_matrices, column_moments, complete_rows,
+    correlation_matrices, cross_correlation, cross_correlation_batch, merge_moments, pair_correlations,
+    pearson_matrix, spearman_matrix, stack_streams
+)
+
+class TestCorrelationEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        base = np.linspace(0, 10, 50)
+        self.streams = {
+            'webcam': base + rng.normal(0, 1, 50),
+            'hid': -base + rng.normal(0, 1, 50),
+            'system': rng.integers(0, 5, 50).astype(float)
+        }
+
+    def test_matrices_match_scipy(self):
+        """Test that the matrix results match scipy's pairwise functions."""
+        names, matrix = stack_streams(self.streams)
+        pearson = pearson_matrix(matrix)
+        spearman = spearman_matrix(matrix)
+
+        for i in range(len(names)):
+            for j in range(len(names)):
+                series1, series2 = matrix[:, i], matrix[:, j]
+                self.assertAlmostEqual(pearson[i, j], pearsonr(series1, series2)[0], places=10)
+                self.assertAlmostEqual(spearman[i, j], spearmanr(series1, series2)[0], places=10)
+
+    def test_pair_correlations_keys(self):
+        """Test that pairs are keyed '<stream1>_<stream2>' in stream order."""
+        names, matrix = stack_streams(self.streams)
+        correlations = pair_correlations(names, correlation_matrices(matrix)['pearson'])
+
+        self.assertEqual(list(correlations), ['webcam_hid', 'webcam_system', 'hid_system'])
+        self.assertLess(correlations['webcam_hid'], -0.9)
+
+    def test_constant_and_missing_values(self):
+        """Test that constant columns are left out and incomplete rows dropped."""
+        matrix = np.array([[1.0, 2.0, 5.0], [2.0, np.nan, 5.0], [3.0, 6.0, 5.0], [4.0, 8.0, 5.0]])
+        self.assertEqual(len(complete_rows(matrix)), 3)
+
+        correlations = pair_correlations(['a', 'b', 'c'], correlation_matrices(matrix)['pearson'])
+        self.assertEqual(list(correlations), ['a_b'])
+        self.assertAlmostEqual(correlations['a_b'], 1.0)
+
+    def test_unaligned_windows_are_rejected(self):
+        """Test that windows of different lengths cannot be stacked directly."""
+        with self.assertRaises(ValueError):
+            stack_streams({'a': [1.0, 2.0], 'b': [1.0, 2.0, 3.0]})
+
+    def test_align_windows(self):
+        """Test that windows are matched to the sparsest stream's timeline."""
+        dense = (np.arange(0, 100, 10), np.arange(10, dtype=float))
+        sparse = (np.array([1, 31, 62, 200]), np.array([1.0, 2.0, 3.0, 4.0]))
+        names, matrix = align_windows({'dense': dense, 'sparse': sparse}, tolerance_ns=5)
+
+        self.assertEqual(names, ['dense', 'sparse'])
+        np.testing.assert_array_equal(matrix[:3], [[0.0, 1.0], [3.0, 2.0], [6.0, 3.0]])
+        self.assertTrue(np.isnan(matrix[3, 0]))
+
+    def test_merged_chunk_moments(self):
+        """Test that moments merged across chunks match the whole matrix."""
+        _, matrix = stack_streams(self.streams)
+        whole = column_moments(matrix)
+        merged = merge_moments(merge_moments(column_moments(matrix[:7]), column_moments(matrix[7:30])),
+                               column_moments(matrix[30:]))
+        self.assertEqual(merged.count, whole.count)
+        np.testing.assert_allclose(merged.mean, whole.mean)
+        np.testing.assert_allclose(merged.comoment, whole.comoment)
+
+        chunked = chunked_correlation_matrices(matrix, [(0, 7), (7, 30), (30, 50)])
+        expected = correlation_matrices(matrix)
+        np.testing.assert_allclose(chunked['pearson'], expected['pearson'], atol=1e-12)
+        np.testing.assert_allclose(chunked['spearman'], expected['spearman'], atol=1e-12)
+
+class TestSlidingCoMoments(unittest.TestCase):
+    def test_matches_window_recompute(self):
+        """Test that the running correlation equals a recompute over the window."""
+        rng = np.random.default_rng(1)
+        tracker = SlidingCoMoments(window_ns=50)
+        x = 1e6 + rng.normal(0, 1, 200).cumsum()
+        y = 0.5 * x + rng.normal(0, 1, 200)
+
+        for t in range(200):
+            tracker.add(t, x[t], y[t])
+            if t >= 2:
+                lo = max(0, t - 50)
+                self.assertAlmostEqual(tracker.correlation, np.corrcoef(x[lo:t + 1], y[lo:t + 1])[0, 1], places=6)
+        self.assertEqual(len(tracker), 51)
+
+    def test_version_and_constant_window(self):
+        """Test that the version tracks window changes and flat windows are undefined."""
+        tracker = SlidingCoMoments(window_ns=10)
+        tracker.add(0, 1.0, 2.0)
+        tracker.add(1, 1.0, 3.0)
+        self.assertTrue(np.isnan(tracker.correlation))
+
+        version = tracker.version
+        self.assertEqual(tracker.evict_before(0), 0)
+        self.assertEqual(tracker.version, version)
+        self.assertEqual(tracker.evict_before(5), 2)
+        self.assertGreater(tracker.version, version)
+        self.assertEqual(len(tracker), 0)
+
+class TestCrossCorrelation(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.x = rng.normal(0, 1, 400)
+        self.y = np.roll(self.x, 7) + rng.normal(0, 0.2, 400)
+        self.noise = rng.normal(0, 1, 300)
+
+    def test_matches_full_correlation(self):
+        """Test that FFT and direct paths both match scipy's full correlation within the lag limit."""
+        for factor in (0, 1e9):
+            with patch.object(correlation_engine, 'DIRECT_CROSS_CORRELATION_FACTOR', factor):
+                for series1, series2, max_lag in [(self.x, self.y, 20), (self.x, self.noise, None),
+                                                  (self.noise, self.x, 15)]:
+                    result = cross_correlation(series1, series2, max_lag)
+                    x, y = series1 - series1.mean(), series2 - series2.mean()
+                    full = signal.correlate(x, y) / np.sqrt(np.dot(x, x) * np.dot(y, y))
+                    lags = signal.correlation_lags(len(x), len(y))
+                    selected = np.isin(lags, result['lags'])
+                    np.testing.assert_array_equal(lags[selected], result['lags'])
+                    np.testing.assert_allclose(result['curve'], full[selected], atol=1e-10)
+
+    def test_peak_lag_and_confidence(self):
+        """Test that a shifted copy peaks at its shift and noise gets little confidence."""
+        shifted = cross_correlation(self.x, self.y, max_lag=20)
+        self.assertEqual(shifted['peak_lag'], -7)
+        self.assertGreater(shifted['peak_correlation'], 0.9)
+        self.assertGreater(shifted['confidence'], 0.99)
+        self.assertEqual(len(shifted['lags']), 41)
+
+        unrelated = cross_correlation(self.x[:300], self.noise, max_lag=20)
+        self.assertLess(unrelated['confidence'], 0.99)
+
+    def test_batch_and_constant_series(self):
+        """Test that a batch matches single calls and a flat series has no correlation."""
+        series = [self.x, self.y, np.ones(400)]
+        results = cross_correlation_batch(series, [(0, 1), (1, 2)], max_lag=10)
+        np.testing.assert_allclose(results[0]['curve'], cross_correlation(self.x, self.y, 10)['curve'])
+        self.assertTrue(np.isnan(results[1]['peak_correlation']))
+        self.assertTrue(np.isnan(results[1]['curve']).all())
+
+if __name__ == '__main__':
+    unittest.main()
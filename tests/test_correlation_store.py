@@ -0,0 +1,71 @@
+import unittest
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from correlation_store import CorrelationStore
+
+class TestCorrelationStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.store = CorrelationStore(self.directory)
+        self.start = datetime(2026, 9, 1, 12, 0)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def run_result(self, day):
+        return {
+            'posture_vs_activity': {'webcam_hid': {'pearson': day / 100, 'mutual_information': float('nan')}},
+            'time_patterns': {'hourly_posture': {'12': 0.5}}
+        }
+
+    def test_latest_run(self):
+        """Test that the latest run is returned whatever the insertion order."""
+        self.assertIsNone(self.store.latest())
+        self.store.append(self.run_result(2), self.start + timedelta(days=2))
+        self.store.append(self.run_result(1), self.start + timedelta(days=1))
+
+        latest = self.store.latest()
+        self.assertEqual(latest['posture_vs_activity']['webcam_hid']['pearson'], 0.02)
+        self.assertEqual(set(latest), {'posture_vs_activity', 'time_patterns'})
+
+    def test_history_of_one_analysis(self):
+        """Test a time-range query over a single analysis."""
+        for day in range(40):
+            self.store.append(self.run_result(day), self.start + timedelta(days=day))
+
+        history = self.store.history(
+            'posture_vs_activity', self.start + timedelta(days=10), self.start + timedelta(days=39)
+        )
+        self.assertEqual(len(history), 30)
+        self.assertEqual(history[0][0], self.start + timedelta(days=10))
+        self.assertEqual([result['webcam_hid']['pearson'] for _, result in history],
+                         [day / 100 for day in range(10, 40)])
+        self.assertEqual(self.store.history('missing'), [])
+
+    def test_legacy_files_are_imported(self):
+        """Test that per-run JSON files are imported once on open and kept under a new name."""
+        legacy = self.directory / 'correlation_20260901_120000.json'
+        with open(legacy, 'w') as f:
+            json.dump(self.run_result(5), f)
+
+        # Queries never scan or change the directory
+        self.assertEqual(self.store.history('time_patterns'), [])
+        self.assertTrue(legacy.exists())
+
+        reopened = CorrelationStore(self.directory)
+        self.addCleanup(reopened.close)
+        self.assertEqual(reopened.history('time_patterns')[0][0], self.start)
+        self.assertEqual(reopened.latest()['posture_vs_activity']['webcam_hid']['pearson'], 0.05)
+        self.assertEqual(list(self.directory.glob('correlation_*.json')), [])
+        self.assertTrue((self.directory / 'correlation_20260901_120000.json.imported').exists())
+
+        # Renamed files are not imported again
+        self.assertEqual(reopened.import_legacy(), 0)
+        self.assertEqual(len(reopened.history('time_patterns')), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,16 @@
 import unittest
 from unittest.mock import MagicMock, patch
 import json
+import os
+import signal
+import time
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-from data_correlation import DataCorrelator
+from concurrent.futures.process import BrokenProcessPool
+from correlation_engine import correlation_matrices
+from data_correlation import DataCorrelator, MinuteResampler
 
 class TestDataCorrelator(unittest.TestCase):
     def setUp(self):
@@ -23,6 +29,8 @@ class TestDataCorrelator(unittest.TestCase):
         Path(self.config['correlation_data_dir']).mkdir(exist_ok=True)
     
     def tearDown(self):
+        self.correlator.close()
+        
         # Clean up test files
         for path in [
             Path(self.config['webcam_data_dir']),
@@ -34,12 +42,12 @@ class TestDataCorrelator(unittest.TestCase):
                     file.unlink()
                 path.rmdir()
     
-    def create_test_webcam_data(self, timestamp: datetime) -> None:
+    def create_test_webcam_data(self, timestamp: datetime, posture_quality: float = 0.8) -> None:
         """Create test webcam data file."""
         data = {
             'timestamp': timestamp.isoformat(),
             'posture': {
-                'posture_quality': 0.8,
+                'posture_quality': posture_quality,
                 'shoulder_alignment': 0.9,
                 'back_straightness': 0.7,
                 'head_position': 0.8,
@@ -57,12 +65,12 @@ class TestDataCorrelator(unittest.TestCase):
         with open(file_path, 'w') as f:
             json.dump(data, f)
     
-    def create_test_hid_data(self, timestamp: datetime) -> None:
+    def create_test_hid_data(self, timestamp: datetime, cpu_percent: float = 50.0) -> None:
         """Create test HID data file."""
         data = {
             'timestamp': timestamp.isoformat(),
             'system': {
-                'cpu_percent': 50.0,
+                'cpu_percent': cpu_percent,
                 'memory_percent': 60.0,
                 'disk_percent': 70.0,
                 'process_count': 100
@@ -128,6 +136,57 @@ class TestDataCorrelator(unittest.TestCase):
         self.assertIn('system_impact', correlations)
         self.assertIn('time_patterns', correlations)
         self.assertIn('environmental_factors', correlations)
+        self.assertEqual(len(self.correlator.get_correlation_history('system_impact')), 1)
+    
+    def test_minute_resampler_matches_resample(self):
+        """Test that a sliding minute resampler equals resampling the window."""
+        rng = np.random.default_rng(5)
+        index = pd.Timestamp('2026-10-01 09:00') + pd.to_timedelta(np.sort(rng.uniform(0, 7200, 500)), unit='s')
+        rows = pd.DataFrame({'value': rng.normal(0, 1, 500), 'count': rng.integers(0, 9, 500)}, index=index)
+        rows.index.name = 'timestamp'
+        resampler = MinuteResampler()
+        
+        loaded = rows.index[0]
+        for start, end in [(0, 1800), (95.5, 2000), (1000, 4000), (1000, 4000), (3999, 7200)]:
+            start = rows.index[0] + pd.Timedelta(seconds=start)
+            end = rows.index[0] + pd.Timedelta(seconds=end)
+            new_rows = rows[(rows.index >= loaded) & (rows.index < end)]
+            loaded = end
+            minutes = resampler.update(start, new_rows)
+            window = rows[(rows.index >= start) & (rows.index < end)]
+            pd.testing.assert_frame_equal(minutes, window.resample('1min').mean())
+    
+    def test_incremental_matches_full_recompute(self):
+        """Test that incremental correlation runs match full recomputes."""
+        incremental = DataCorrelator({**self.config, 'optimization': {'incremental': True}})
+        self.addCleanup(incremental.close)
+        rng = np.random.default_rng(9)
+        
+        def write(timestamp):
+            self.create_test_webcam_data(timestamp, float(rng.uniform(0, 1)))
+            self.create_test_hid_data(timestamp, float(rng.uniform(0, 100)))
+        
+        def comparable(correlations):
+            correlations.pop('performance_metrics')
+            return json.dumps(correlations, sort_keys=True, default=str)
+        
+        now = datetime.now()
+        for seconds in range(60, 3000, 45):
+            write(now - timedelta(seconds=seconds))
+        start_time = now - timedelta(minutes=45)
+        self.assertEqual(
+            comparable(incremental.correlate_data(start_time)),
+            comparable(self.correlator.correlate_data(start_time))
+        )
+        
+        # A later run loads only the new records and evicts the expired ones
+        time.sleep(1)
+        write(datetime.now())
+        start_time += timedelta(minutes=7, seconds=15)
+        with patch.object(incremental.hid_catalog, 'load', wraps=incremental.hid_catalog.load) as load:
+            result = incremental.correlate_data(start_time)
+        self.assertGreater(load.call_args[0][0], now)
+        self.assertEqual(comparable(result), comparable(self.correlator.correlate_data(start_time)))
     
     def test_analyze_posture_activity_correlation(self):
         """Test posture and activity correlation analysis."""
@@ -170,6 +229,152 @@ class TestDataCorrelator(unittest.TestCase):
         self.assertIn('high_load_impact', factors)
         self.assertIn('face_detection_impact', factors)
     
+    def test_cross_correlation_lag_limit(self):
+        """Test that cross-correlation only searches lags within the configured limit."""
+        series = np.sin(np.linspace(0, 12, 120))
+        result = self.correlator._calculate_cross_correlation(series, np.roll(series, 3))
+        
+        self.assertEqual(result['max_lag'], -3)
+        self.assertEqual(result['lags'], list(range(-5, 6)))
+        self.assertEqual(len(result['curve']), 11)
+        self.assertGreater(result['normalized_correlation'], 0.9)
+        json.dumps(result)
+    
+    def test_expensive_metrics_are_memoised(self):
+        """Test that MI and Granger are computed once per distinct input window."""
+        correlator = DataCorrelator({**self.config, 'optimization': {'parallel_processing': False}})
+        self.addCleanup(correlator.close)
+        rng = np.random.default_rng(0)
+        windows = {'a': rng.normal(0, 1, 40), 'b': rng.normal(0, 1, 40)}
+        
+        with patch('data_correlation.mutual_information', return_value=0.5) as mi, \
+                patch('data_correlation.granger_causality', return_value={'lag_1': 0.1}) as granger:
+            first = correlator._calculate_correlations(windows)
+            second = correlator._calculate_correlations(windows)
+            self.assertEqual(mi.call_count, 1)
+            self.assertEqual(granger.call_count, 1)
+            self.assertEqual(first['a_b']['mutual_information'], 0.5)
+            self.assertEqual(second['a_b']['granger_causality'], {'lag_1': 0.1})
+            
+            correlator._calculate_correlations({'a': windows['a'], 'b': windows['b'][::-1].copy()})
+            self.assertEqual(mi.call_count, 2)
+    
+    def test_expensive_metrics_cheap_mode(self):
+        """Test that cheap mode serves the last result between refresh cycles."""
+        correlator = DataCorrelator({
+            **self.config,
+            'optimization': {'parallel_processing': False, 'expensive_metrics_every': 3}
+        })
+        self.addCleanup(correlator.close)
+        rng = np.random.default_rng(1)
+        
+        with patch('data_correlation.mutual_information', side_effect=[0.1, 0.2]) as mi, \
+                patch('data_correlation.granger_causality', return_value={}):
+            for cycle in range(4):
+                correlator.correlation_cycles = cycle
+                result = correlator._calculate_correlations(
+                    {'a': rng.normal(0, 1, 40), 'b': rng.normal(0, 1, 40)}, 'test:'
+                )
+                self.assertEqual(result['a_b']['mutual_information'], 0.1 if cycle < 3 else 0.2)
+            self.assertEqual(mi.call_count, 2)
+    
+    def test_expensive_metrics_on_process_pool(self):
+        """Test that the process pool returns the same metrics as an inline run."""
+        rng = np.random.default_rng(2)
+        windows = {'a_b': (rng.normal(0, 1, 60), rng.normal(0, 1, 60))}
+        inline = DataCorrelator({**self.config, 'optimization': {'parallel_processing': False}})
+        self.addCleanup(inline.close)
+        
+        # Finite stand-ins that pickle by reference, so a mismatch cannot hide behind NaN
+        with patch('data_correlation.mutual_information', np.dot), \
+                patch('data_correlation.granger_causality', np.correlate):
+            pooled = self.correlator._calculate_expensive_metrics(windows)
+            self.assertIsNotNone(self.correlator._executor)
+            expected = inline._calculate_expensive_metrics(windows)
+        self.assertTrue(np.isfinite(pooled['a_b']['mutual_information']))
+        np.testing.assert_equal(pooled, expected)
+    
+    def test_broken_pool_is_discarded_at_submit(self):
+        """Test that a pool that fails on submit is dropped and started again on the next call."""
+        executor = MagicMock()
+        executor.submit.side_effect = BrokenProcessPool('worker died')
+        self.correlator._executor = executor
+        windows = {'a_b': (np.arange(10.0), np.ones(10))}
+        
+        with patch('data_correlation.mutual_information', return_value=0.5), \
+                patch('data_correlation.granger_causality', return_value={}):
+            results = self.correlator._calculate_expensive_metrics(windows)
+        self.assertEqual(results['a_b']['mutual_information'], 0.5)
+        self.assertEqual(executor.submit.call_count, 1)
+        self.assertIsNone(self.correlator._executor)
+        self.assertIsNot(self.correlator._process_executor(), executor)
+    
+    def test_broken_worker_keeps_store_open(self):
+        """Test that a dead worker only resets the pool, not the result store."""
+        future = MagicMock()
+        future.result.side_effect = BrokenProcessPool('worker died')
+        executor = MagicMock()
+        executor.submit.return_value = future
+        self.correlator._executor = executor
+        
+        with patch('data_correlation.mutual_information', return_value=0.5), \
+                patch('data_correlation.granger_causality', return_value={}):
+            results = self.correlator._calculate_expensive_metrics({'a_b': (np.arange(10.0), np.ones(10))})
+        self.assertEqual(results['a_b']['mutual_information'], 0.5)
+        self.assertIsNone(self.correlator._executor)
+        executor.shutdown.assert_called_once()
+        
+        self.correlator._save_correlation_results({'test': 'data'})
+        self.assertEqual(self.correlator.get_latest_correlation(), {'test': 'data'})
+    
+    def test_parallel_correlation_matches_serial(self):
+        """Test that the chunked process-pool path matches a serial calculation."""
+        rng = np.random.default_rng(3)
+        webcam_df = pd.DataFrame({'posture_quality': rng.normal(0, 1, 300).cumsum()})
+        hid_df = pd.Series(webcam_df['posture_quality'] * 0.5 + rng.normal(0, 1, 300))
+        serial = DataCorrelator({**self.config, 'optimization': {'parallel_processing': False}})
+        self.addCleanup(serial.close)
+        parallel = DataCorrelator({
+            **self.config,
+            'optimization': {'parallel_processing': True, 'process_workers': 2, 'batch_size': 50}
+        })
+        
+        try:
+            expected = serial._optimize_correlation_calculation(webcam_df, hid_df)['webcam_hid']
+            actual = parallel._optimize_correlation_calculation(webcam_df, hid_df)['webcam_hid']
+            self.assertIsNotNone(parallel._executor)
+        finally:
+            parallel.close()
+        self.assertAlmostEqual(actual['pearson'], expected['pearson'], places=10)
+        self.assertAlmostEqual(actual['spearman'], expected['spearman'], places=10)
+        self.assertEqual(actual['dtw'], expected['dtw'])
+    
+    def test_parallel_correlation_recovers_from_dead_workers(self):
+        """Test that killed pool workers fall back to inline matrices and a fresh pool."""
+        matrix = np.random.default_rng(4).normal(0, 1, (300, 3)).cumsum(axis=0)
+        correlator = DataCorrelator({
+            **self.config,
+            'optimization': {'parallel_processing': True, 'process_workers': 2, 'batch_size': 50}
+        })
+        self.addCleanup(correlator.close)
+        expected = correlation_matrices(matrix)
+        np.testing.assert_allclose(correlator._parallel_correlation_matrices(matrix)['pearson'], expected['pearson'])
+        
+        broken = correlator._executor
+        for process in list(broken._processes.values()):
+            os.kill(process.pid, signal.SIGKILL)
+            process.join()
+        actual = correlator._parallel_correlation_matrices(matrix)
+        self.assertIsNone(correlator._executor)
+        np.testing.assert_allclose(actual['pearson'], expected['pearson'])
+        np.testing.assert_allclose(actual['spearman'], expected['spearman'])
+        
+        # The next call starts a new pool
+        actual = correlator._parallel_correlation_matrices(matrix)
+        self.assertIsNotNone(correlator._executor)
+        self.assertIsNot(correlator._executor, broken)
+        np.testing.assert_allclose(actual['spearman'], expected['spearman'])
+    
     def test_get_latest_correlation(self):
         """Test retrieving latest correlation results."""
         test_data = {'test': 'data'}
@@ -179,6 +384,8 @@ class TestDataCorrelator(unittest.TestCase):
         with open(file_path, 'w') as f:
             json.dump(test_data, f)
         
+        # Files from earlier versions are imported when the store is opened
+        self.correlator.correlation_store.import_legacy()
         latest = self.correlator.get_latest_correlation()
         self.assertEqual(latest, test_data)
 
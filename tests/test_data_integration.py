@@ -0,0 +1,165 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import numpy as np
+import data_integration
+from data_integration import HOT_TIER_BYTES, HOT_TIER_POINTS, DataIntegrationEngine, DataPoint
+
+class TestDataIntegrationEngine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.engine = DataIntegrationEngine(self.temp_dir)
+        self.start = datetime(2026, 10, 1, 9, 0)
+
+    def tearDown(self):
+        self.engine.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def add_points(self, count, seed=4):
+        """Add points with slightly shuffled timestamps, bypassing the raw log."""
+        rng = np.random.default_rng(seed)
+        seconds = np.arange(count) + rng.integers(-3, 3, count)
+        points = []
+        for i, offset in enumerate(seconds):
+            points.append(DataPoint(
+                source=str(rng.choice(['hid', 'webcam', 'system'])),
+                type=str(rng.choice(['keyboard_event', 'mouse_event'])),
+                data={'index': i},
+                timestamp=(self.start + timedelta(seconds=int(offset))).isoformat()
+            ))
+            self.engine._append_point(points[-1])
+        return points
+
+    def brute_force(self, source=None, data_type=None, start_time=None, end_time=None, points=None):
+        points = [
+            point for point in (self.engine.data_points if points is None else points)
+            if (not source or point.source == source) and (not data_type or point.type == data_type)
+            and (not start_time or datetime.fromisoformat(point.timestamp) >= datetime.fromisoformat(start_time))
+            and (not end_time or datetime.fromisoformat(point.timestamp) <= datetime.fromisoformat(end_time))
+        ]
+        return sorted(points, key=lambda point: datetime.fromisoformat(point.timestamp))
+
+    def test_indexed_queries_match_filtering(self):
+        """Test indexed queries against filtering every point."""
+        self.add_points(500)
+        start_time = (self.start + timedelta(seconds=100)).isoformat()
+        end_time = (self.start + timedelta(seconds=250)).isoformat()
+        for filters in [
+            {'source': 'hid', 'data_type': 'keyboard_event'},
+            {'source': 'webcam', 'start_time': start_time, 'end_time': end_time},
+            {'data_type': 'mouse_event', 'end_time': end_time},
+            {'start_time': start_time},
+            {'source': 'missing'}
+        ]:
+            expected = self.brute_force(**filters)
+            self.assertEqual(self.engine.get_data_points(**filters), expected, filters)
+        self.assertEqual(self.engine.get_data_points(), self.engine.data_points)
+
+    def test_clear_data_resets_indexes(self):
+        """Test that cleared points no longer match queries."""
+        self.add_points(10)
+        self.engine.clear_data()
+        self.assertEqual(self.engine.get_data_points(source='hid'), [])
+        self.assertTrue(self.engine.add_data_point('hid', 'keyboard_event', {'key': 'a'}))
+        self.assertEqual(len(self.engine.get_data_points(source='hid', data_type='keyboard_event')), 1)
+
+    def test_queries_span_spilled_points(self):
+        """Test that points spilled to disk are still found, in order, by every query."""
+        self.engine.hot_tier_config.update({'max_points': 120, 'spill_batch': 50})
+        added = self.add_points(500)
+        self.assertLessEqual(len(self.engine.data_points), 120)
+        self.assertEqual(sum(chunk.count for chunk in self.engine.spilled_chunks) + len(self.engine.data_points), 500)
+        self.assertEqual(HOT_TIER_POINTS._value.get(), len(self.engine.data_points))
+
+        start_time = (self.start + timedelta(seconds=100)).isoformat()
+        end_time = (self.start + timedelta(seconds=420)).isoformat()
+        for filters in [
+            {'source': 'hid', 'data_type': 'keyboard_event'},
+            {'source': 'webcam', 'start_time': start_time, 'end_time': end_time},
+            {'data_type': 'mouse_event', 'end_time': end_time},
+            {'start_time': start_time}
+        ]:
+            expected = self.brute_force(points=added, **filters)
+            self.assertEqual(self.engine.get_data_points(**filters), expected, filters)
+        self.assertEqual(self.engine.get_data_points(), added)
+        self.assertEqual(self.engine.process_data(len), 500)
+
+    def test_hot_tier_byte_and_age_limits(self):
+        """Test that the byte and age limits bound the hot tier."""
+        self.engine.hot_tier_config.update({'max_points': None, 'max_bytes': 2000, 'spill_batch': 1})
+        self.add_points(100)
+        self.assertLessEqual(self.engine.hot_bytes, 2000)
+        self.assertEqual(HOT_TIER_BYTES._value.get(), self.engine.hot_bytes)
+
+        self.engine.hot_tier_config.update({'max_bytes': None, 'max_age_seconds': 60})
+        self.assertTrue(self.engine.add_data_point('hid', 'keyboard_event', {'key': 'a'}))
+        self.assertEqual(len(self.engine.data_points), 1)
+        self.assertEqual(len(self.engine.get_data_points()), 101)
+
+        self.engine.clear_data()
+        self.assertEqual(self.engine.get_data_points(), [])
+        self.assertEqual(list(self.engine.spill_path.glob('chunk_*.json')), [])
+        self.assertEqual(DataIntegrationEngine(self.temp_dir).spilled_chunks, [])
+
+    def test_spilled_points_survive_restart(self):
+        """Test that a new engine over the same storage finds the spilled chunks."""
+        self.engine.hot_tier_config.update({'max_points': 50, 'spill_batch': 50})
+        added = self.add_points(230)
+        spilled = sum(chunk.count for chunk in self.engine.spilled_chunks)
+        expected = sorted(added[:spilled], key=lambda point: datetime.fromisoformat(point.timestamp))
+        self.engine.close()
+
+        restarted = DataIntegrationEngine(self.temp_dir)
+        self.addCleanup(restarted.close)
+        self.assertEqual(restarted.sequence, spilled)
+        self.assertEqual(restarted.get_data_points(start_time=self.start.isoformat()), expected)
+
+        # A chunk written just before a crash, but missing from the index, is still found
+        (self.engine.spill_path / 'chunks.json').unlink()
+        recovered = DataIntegrationEngine(self.temp_dir)
+        self.addCleanup(recovered.close)
+        self.assertEqual(recovered.get_data_points(), added[:spilled])
+
+    def test_chunks_written_outside_lock(self):
+        """Test that spilled chunks are serialised without the lock and stay queryable meanwhile."""
+        self.engine.hot_tier_config.update({'max_points': 20, 'spill_batch': 10})
+        seen = []
+        records_to_columns = data_integration.records_to_columns
+
+        def check(records):
+            seen.append((self.engine.lock.locked(), len(self.engine.get_data_points())))
+            return records_to_columns(records)
+
+        with patch('data_integration.records_to_columns', side_effect=check):
+            self.add_points(31)
+        self.assertEqual(seen, [(False, 21), (False, 31)])
+        self.assertTrue(all(chunk.rows is None for chunk in self.engine.spilled_chunks))
+
+    def test_spilled_chunks_fsynced_before_rename(self):
+        """Test that chunk and index files are fsynced before they replace the old ones."""
+        self.engine.hot_tier_config.update({'max_points': 20, 'spill_batch': 10})
+        events = []
+        fsync, replace = data_integration.os.fsync, data_integration.os.replace
+
+        def record_fsync(fd):
+            events.append('fsync')
+            return fsync(fd)
+
+        def record_replace(source, target):
+            events.append(('replace', target.name))
+            return replace(source, target)
+
+        with patch('data_integration.os.fsync', side_effect=record_fsync), \
+                patch('data_integration.os.replace', side_effect=record_replace):
+            self.add_points(21)
+        chunk = self.engine.spilled_chunks[0].name
+        # Each file is synced before its rename, and the directory after it
+        self.assertEqual(events, [
+            'fsync', ('replace', chunk), 'fsync',
+            'fsync', ('replace', 'chunks.json'), 'fsync'
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
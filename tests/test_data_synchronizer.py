@@ -0,0 +1,492 @@
+import json
+import threading
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from data_synchronizer import DataSynchronizer, TimeSeriesData, SynchronizedDataPoint
+from stream_buffer import BufferSizeTracker, ColumnarRingBuffer, LatePointError, encoded_size, to_epoch_ns
+
+class TestTimeSeriesData(unittest.TestCase):
+    def setUp(self):
+        start = datetime(2025, 1, 1, 9, 0, 0)
+        self.timestamps = [start + timedelta(seconds=i) for i in range(10)]
+        self.values = {
+            'keyboard_events': [float(i) for i in range(9)] + [100.0],
+            'mouse_clicks': [2.0] * 10
+        }
+
+    def test_quality_metrics_are_lazy_and_cached(self):
+        """Test that quality metrics are computed on first access and cached."""
+        series = TimeSeriesData(timestamps=self.timestamps, values=self.values, metadata={})
+        self.assertIsNone(series._quality_metrics)
+
+        metrics = series.quality_metrics
+        self.assertIs(series.quality_metrics, metrics)
+        self.assertAlmostEqual(metrics['sampling_rate_mean'], 1.0)
+        self.assertAlmostEqual(metrics['keyboard_events_mean'], np.mean(self.values['keyboard_events']))
+        self.assertAlmostEqual(metrics['keyboard_events_std'], np.std(self.values['keyboard_events']))
+        self.assertEqual(metrics['keyboard_events_max'], 100.0)
+        self.assertAlmostEqual(metrics['keyboard_events_outlier_ratio'], 0.1)
+        self.assertEqual(metrics['mouse_clicks_outlier_ratio'], 0.0)
+
+    def test_quality_metrics_invalidated_on_data_change(self):
+        """Test that replacing the values recomputes the metrics."""
+        series = TimeSeriesData(timestamps=self.timestamps, values=self.values, metadata={})
+        self.assertEqual(series.quality_metrics['mouse_clicks_mean'], 2.0)
+
+        series.values = {'mouse_clicks': [4.0] * 10}
+        self.assertEqual(series.quality_metrics['mouse_clicks_mean'], 4.0)
+
+    def test_non_monotonic_timestamps_rejected(self):
+        """Test that decreasing timestamps are rejected."""
+        with self.assertRaises(ValueError):
+            TimeSeriesData(timestamps=self.timestamps[::-1], values=self.values, metadata={})
+
+    def test_align_many_with_tolerance(self):
+        """Test aligning three series onto a common timeline with a tolerance."""
+        start = self.timestamps[0]
+        activity = TimeSeriesData(
+            timestamps=self.timestamps,
+            values={'keyboard_events': np.arange(10.0)},
+            metadata={'stream_name': 'activity'}
+        )
+        webcam = TimeSeriesData(
+            timestamps=[start + timedelta(seconds=i, milliseconds=100) for i in range(0, 10, 2)],
+            values={'posture_score': np.arange(5.0) / 10},
+            metadata={'stream_name': 'webcam'}
+        )
+        system = TimeSeriesData(
+            timestamps=[start + timedelta(seconds=i, milliseconds=50) for i in range(10)],
+            values={'cpu_percent': np.arange(10.0) * 10},
+            metadata={'stream_name': 'system'}
+        )
+
+        aligned = TimeSeriesData.align_many(
+            [activity, webcam, system], tolerance=timedelta(milliseconds=200)
+        )
+
+        self.assertEqual(len(aligned.timestamps), 5)
+        np.testing.assert_array_equal(aligned.values['activity.keyboard_events'], [0, 2, 4, 6, 8])
+        np.testing.assert_array_equal(aligned.values['webcam.posture_score'], [0, 0.1, 0.2, 0.3, 0.4])
+        np.testing.assert_array_equal(aligned.values['system.cpu_percent'], [0, 20, 40, 60, 80])
+        self.assertEqual(aligned.metadata['aligned_columns']['webcam'], {'posture_score': 'webcam.posture_score'})
+
+    def test_align_many_backward_direction(self):
+        """Test as-of alignment looking only backwards."""
+        start = self.timestamps[0]
+        left = TimeSeriesData(timestamps=self.timestamps[:3], values={'a': [1.0, 2.0, 3.0]}, metadata={})
+        right = TimeSeriesData(
+            timestamps=[start + timedelta(milliseconds=900), start + timedelta(seconds=1, milliseconds=100)],
+            values={'b': [10.0, 20.0]},
+            metadata={}
+        )
+
+        aligned = TimeSeriesData.align_many([left, right], timedelta(seconds=1), direction='backward')
+
+        np.testing.assert_array_equal(aligned.values['series_1.b'], [10.0, 20.0])
+        np.testing.assert_array_equal(aligned.values['series_0.a'], [2.0, 3.0])
+
+    def test_align_with_exact_match(self):
+        """Test pairwise alignment on exactly matching timestamps."""
+        first = TimeSeriesData(timestamps=self.timestamps, values=self.values, metadata={'stream_name': 'a'})
+        second = TimeSeriesData(
+            timestamps=self.timestamps[::3], values={'score': [1.0, 2.0, 3.0, 4.0]}, metadata={'stream_name': 'b'}
+        )
+
+        aligned1, aligned2 = first.align_with(second)
+
+        self.assertEqual(len(aligned1.timestamps), 4)
+        np.testing.assert_array_equal(aligned1.values['mouse_clicks'], [2.0] * 4)
+        np.testing.assert_array_equal(aligned2.values['score'], [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(aligned2.metadata, {'stream_name': 'b'})
+
+class TestColumnarRingBuffer(unittest.TestCase):
+    def test_append_and_wraparound(self):
+        """Test that appends past capacity evict the oldest points."""
+        buffer = ColumnarRingBuffer(capacity=3)
+        for i in range(5):
+            buffer.append(i, {'value': float(i)}, {'value': i})
+
+        self.assertEqual(len(buffer), 3)
+        np.testing.assert_array_equal(buffer.timestamps, [2, 3, 4])
+        np.testing.assert_array_equal(buffer.column('value'), [2.0, 3.0, 4.0])
+        self.assertEqual(buffer.latest(), (4, {'value': 4}))
+
+    def test_views_are_zero_copy(self):
+        """Test that column views share memory with the buffer."""
+        buffer = ColumnarRingBuffer(capacity=4)
+        for i in range(6):
+            buffer.append(i, {'value': float(i)})
+
+        self.assertTrue(np.shares_memory(buffer.column('value'), buffer._columns['value']))
+        self.assertTrue(np.shares_memory(buffer.timestamps, buffer._timestamps))
+
+    def test_new_fields_are_backfilled(self):
+        """Test that fields first seen later are NaN for earlier points."""
+        buffer = ColumnarRingBuffer(capacity=4)
+        buffer.append(0, {'a': 1.0})
+        buffer.append(1, {'a': 2.0, 'b': 3.0})
+
+        self.assertTrue(np.isnan(buffer.column('b')[0]))
+        self.assertEqual(buffer.column('b')[1], 3.0)
+
+    def test_evict_before(self):
+        """Test eviction of points older than a cutoff."""
+        buffer = ColumnarRingBuffer(capacity=5)
+        for i in range(5):
+            buffer.append(i * 10, {'value': float(i)})
+
+        self.assertEqual(buffer.evict_before(25), 3)
+        np.testing.assert_array_equal(buffer.timestamps, [30, 40])
+
+    def test_nbytes_tracks_appends_and_evictions(self):
+        """Test that the running byte total follows appends and evictions."""
+        buffer = ColumnarRingBuffer(capacity=3)
+        for i in range(5):
+            buffer.append(i, {'value': float(i)}, size=10 + i)
+
+        self.assertEqual(buffer.nbytes, 12 + 13 + 14)
+        buffer.evict(2)
+        self.assertEqual(buffer.nbytes, 14)
+        buffer.clear()
+        self.assertEqual(buffer.nbytes, 0)
+
+    def test_out_of_order_points_are_sorted(self):
+        """Test that late points within the reorder depth are inserted in order."""
+        buffer = ColumnarRingBuffer(capacity=4, reorder_depth=2)
+        for timestamp in [10, 20, 40, 30, 50, 45]:
+            buffer.append(timestamp, {'value': float(timestamp)}, timestamp, size=1)
+
+        np.testing.assert_array_equal(buffer.timestamps, [30, 40, 45, 50])
+        np.testing.assert_array_equal(buffer.column('value'), [30.0, 40.0, 45.0, 50.0])
+        self.assertEqual(list(buffer.payloads), [30, 40, 45, 50])
+        self.assertEqual(buffer.nbytes, 4)
+
+        # Views stay consistent after wrapping past the mirrored region
+        for timestamp in [60, 70, 65]:
+            buffer.append(timestamp, {'value': float(timestamp)}, timestamp, size=1)
+        np.testing.assert_array_equal(buffer.timestamps, [50, 60, 65, 70])
+
+    def test_too_late_points_are_rejected(self):
+        """Test that points older than the reorder window raise."""
+        buffer = ColumnarRingBuffer(capacity=10, reorder_depth=2)
+        for timestamp in [10, 20, 30, 40]:
+            buffer.append(timestamp, {'value': 1.0})
+
+        with self.assertRaises(LatePointError):
+            buffer.append(15, {'value': 1.0})
+        self.assertEqual(len(buffer), 4)
+
+    def test_window_bisection(self):
+        """Test locating a closed time range by bisection."""
+        buffer = ColumnarRingBuffer(capacity=10)
+        for timestamp in [10, 20, 20, 30, 40]:
+            buffer.append(timestamp, {'value': 1.0})
+
+        self.assertEqual(buffer.window(20, 30), (1, 4))
+        self.assertEqual(buffer.window(41, 50), (5, 5))
+
+    def test_extend_matches_append(self):
+        """Test that a block extend leaves the buffer as per-point appends would."""
+        appended = ColumnarRingBuffer(capacity=4)
+        extended = ColumnarRingBuffer(capacity=4)
+        for i in range(3):
+            appended.append(i, {'a': float(i)}, i, 10)
+        extended.extend(np.arange(3), {'a': np.arange(3.0)}, [0, 1, 2], np.full(3, 10))
+        for i in range(3, 9):
+            appended.append(i, {'a': float(i), 'b': 1.0}, i, 10)
+        evicted = extended.extend(np.arange(3, 9), {'a': np.arange(3.0, 9.0), 'b': np.ones(6)},
+                                  list(range(3, 9)), np.full(6, 10))
+
+        self.assertEqual(evicted, 5)
+        np.testing.assert_array_equal(extended.timestamps, appended.timestamps)
+        np.testing.assert_array_equal(extended.column('a'), appended.column('a'))
+        np.testing.assert_array_equal(extended.column('b'), appended.column('b'))
+        self.assertEqual(list(extended.payloads), list(appended.payloads))
+        self.assertEqual(extended.nbytes, appended.nbytes)
+        with self.assertRaises(ValueError):
+            extended.extend(np.array([1]), {'a': np.array([1.0])})
+
+class TestBufferSizeTracker(unittest.TestCase):
+    def test_record_and_evict(self):
+        """Test that recorded sizes match JSON encoding and are released on eviction."""
+        tracker = BufferSizeTracker()
+        point = {'value': 1.5}
+        timestamp = '2025-01-01T00:00:00'
+        size = tracker.record('stream1', point, timestamp)
+
+        self.assertEqual(size, len(json.dumps({'data': point, 'timestamp': timestamp}).encode('utf-8')))
+        tracker.record('stream1', point, timestamp)
+        tracker.record('stream2', point, timestamp)
+        self.assertEqual(tracker.total_bytes, 3 * size)
+
+        self.assertEqual(tracker.evict('stream1'), size)
+        self.assertEqual(tracker.stream_bytes('stream1'), size)
+        tracker.clear()
+        self.assertEqual(tracker.total_bytes, 0)
+
+class TestDataSynchronizer(unittest.TestCase):
+    def setUp(self):
+        self.synchronizer = DataSynchronizer(sync_window_ms=1000, max_buffer_size=100)
+        self.now = datetime.now().replace(microsecond=0)
+
+    def test_add_data_stream(self):
+        """Test adding points to the columnar buffers."""
+        for i in range(3):
+            timestamp = (self.now + timedelta(seconds=i)).isoformat()
+            self.assertTrue(self.synchronizer.add_data_stream(
+                'activity', {'keyboard_events': i, 'mouse_clicks': 2 * i}, timestamp
+            ))
+
+        buffer = self.synchronizer.data_buffer['activity']
+        self.assertEqual(len(buffer), 3)
+        np.testing.assert_array_equal(buffer.column('mouse_clicks'), [0.0, 2.0, 4.0])
+
+    def test_buffer_size_is_exact(self):
+        """Test that the buffer size equals re-serialising every buffered point."""
+        synchronizer = DataSynchronizer(max_buffer_size=5)
+        points = []
+        for i in range(8):
+            timestamp = (self.now + timedelta(seconds=i)).isoformat()
+            data = {'keyboard_events': i, 'window': 'editor' * i}
+            synchronizer.add_data_stream('activity', data, timestamp)
+            points.append((data, timestamp))
+
+        expected = sum(encoded_size(data, timestamp) for data, timestamp in points[-5:])
+        self.assertEqual(synchronizer._calculate_buffer_size(), expected)
+
+    def test_non_numeric_data_rejected(self):
+        """Test that points without numeric values are rejected."""
+        result = self.synchronizer.add_data_stream('activity', {'window': 'editor'}, self.now.isoformat())
+        self.assertFalse(result)
+
+    def test_time_series_view(self):
+        """Test building a time series view over the buffer."""
+        for i in range(5):
+            timestamp = (self.now + timedelta(seconds=i)).isoformat()
+            self.synchronizer.add_data_stream('webcam', {'posture_score': i / 10}, timestamp)
+
+        series = self.synchronizer.time_series_data['webcam']
+        self.assertIsInstance(series, TimeSeriesData)
+        self.assertEqual(len(series.timestamps), 5)
+        self.assertTrue(np.shares_memory(
+            series.values['posture_score'],
+            self.synchronizer.data_buffer['webcam']._columns['posture_score']
+        ))
+
+    def test_synchronize_data(self):
+        """Test synchronizing two streams."""
+        timestamp = self.now.isoformat()
+        self.synchronizer.add_data_stream('activity', {'keyboard_events': 10, 'mouse_clicks': 5}, timestamp)
+        self.synchronizer.add_data_stream('webcam', {'posture_score': 0.8, 'attention_level': 0.9}, timestamp)
+
+        synced = self.synchronizer.synchronize_data()
+
+        self.assertIsInstance(synced, SynchronizedDataPoint)
+        self.assertEqual(synced.timestamp, timestamp)
+        self.assertEqual(synced.data_streams['webcam'], {'posture_score': 0.8, 'attention_level': 0.9})
+
+    def test_synchronize_uses_sync_window(self):
+        """Test that each stream contributes its latest point within the window."""
+        for i in range(5):
+            timestamp = (self.now + timedelta(milliseconds=400 * i)).isoformat()
+            self.synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+        late = (self.now + timedelta(milliseconds=900)).isoformat()
+        self.synchronizer.add_data_stream('activity', {'keyboard_events': 99}, late)
+        self.synchronizer.add_data_stream('webcam', {'posture_score': 0.5}, self.now.isoformat())
+
+        synced = self.synchronizer.synchronize_data()
+
+        self.assertEqual(synced.timestamp, self.now.isoformat())
+        self.assertEqual(synced.data_streams['activity'], {'keyboard_events': 99})
+
+    def test_synchronized_ticks_emit_each_tick_once(self):
+        """Test that the streaming join emits every tick behind the watermark once."""
+        synchronizer = DataSynchronizer(tick_ms=1000)
+        for i in range(4):
+            timestamp = (self.now + timedelta(seconds=i, milliseconds=100)).isoformat()
+            synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+            synchronizer.add_data_stream('webcam', {'posture_score': i / 10}, timestamp)
+
+        ticks = list(synchronizer.synchronized_ticks())
+
+        # The last tick is still open because no stream has passed its end
+        self.assertEqual(
+            [tick.timestamp for tick in ticks],
+            [(self.now + timedelta(seconds=i)).isoformat() for i in range(3)]
+        )
+        self.assertEqual(ticks[1].data_streams['activity'], {'keyboard_events': 1})
+        self.assertEqual(ticks[1].data_streams['webcam'], {'posture_score': 0.1})
+        self.assertEqual(list(synchronizer.synchronized_ticks()), [])
+
+        # Advancing only one stream does not move the joint watermark
+        later = (self.now + timedelta(seconds=10)).isoformat()
+        synchronizer.add_data_stream('activity', {'keyboard_events': 10}, later)
+        self.assertEqual(list(synchronizer.synchronized_ticks()), [])
+
+        # Once every stream has passed, empty ticks are skipped
+        synchronizer.add_data_stream('webcam', {'posture_score': 1.0}, later)
+        ticks = list(synchronizer.synchronized_ticks())
+        self.assertEqual([tick.timestamp for tick in ticks], [(self.now + timedelta(seconds=3)).isoformat()])
+
+    def test_synchronized_ticks_allowed_lateness(self):
+        """Test that allowed lateness holds ticks open for late points."""
+        synchronizer = DataSynchronizer(tick_ms=1000, allowed_lateness_ms=1000)
+        for i in (0, 1):
+            timestamp = (self.now + timedelta(seconds=i, milliseconds=500)).isoformat()
+            synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+        self.assertEqual(list(synchronizer.synchronized_ticks()), [])
+
+        late = (self.now + timedelta(milliseconds=900)).isoformat()
+        synchronizer.add_data_stream('activity', {'keyboard_events': 42}, late)
+        synchronizer.add_data_stream('activity', {'keyboard_events': 2}, (self.now + timedelta(seconds=2)).isoformat())
+
+        ticks = list(synchronizer.synchronized_ticks())
+        self.assertEqual(len(ticks), 1)
+        self.assertEqual(ticks[0].data_streams['activity'], {'keyboard_events': 42})
+
+    def test_ingest_not_blocked_by_tick_collection(self):
+        """Test that producers, including cleanup and new streams, proceed while ticks are joined."""
+        for i in range(5):
+            timestamp = (self.now + timedelta(seconds=i)).isoformat()
+            self.synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+        started, release = threading.Event(), threading.Event()
+        calculate = self.synchronizer._calculate_correlations
+
+        def slow_correlations(windows):
+            started.set()
+            release.wait(5)
+            return calculate(windows)
+
+        self.synchronizer._calculate_correlations = slow_correlations
+        collector = threading.Thread(target=lambda: list(self.synchronizer.synchronized_ticks()))
+        collector.start()
+        try:
+            self.assertTrue(started.wait(5))
+            self.synchronizer.last_cleanup_time = 0
+            results = []
+            producer = threading.Thread(target=lambda: results.append(self.synchronizer.add_data_stream(
+                'webcam', {'posture_score': 0.5}, (self.now + timedelta(seconds=5)).isoformat()
+            )))
+            producer.start()
+            producer.join(2)
+            self.assertFalse(producer.is_alive())
+            self.assertEqual(results, [True])
+        finally:
+            release.set()
+            collector.join()
+
+    def test_cleanup_old_data(self):
+        """Test cleanup of points outside the synchronization window."""
+        old = (datetime.now() - timedelta(minutes=5)).isoformat()
+        recent = datetime.now().isoformat()
+        self.synchronizer.add_data_stream('activity', {'keyboard_events': 1}, old)
+        self.synchronizer.add_data_stream('activity', {'keyboard_events': 2}, recent)
+
+        self.synchronizer._cleanup_old_data()
+
+        buffer = self.synchronizer.data_buffer['activity']
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.timestamps[0], to_epoch_ns(recent))
+
+    def test_cleanup_keeps_correlation_window(self):
+        """Test that cleanup keeps the correlation window, so correlations still use it."""
+        start = datetime.now() - timedelta(seconds=40)
+        for i in range(30):
+            timestamp = (start + timedelta(seconds=i)).isoformat()
+            self.synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+            self.synchronizer.add_data_stream('webcam', {'posture_score': 1.0 - i / 30}, timestamp)
+
+        self.synchronizer._cleanup_old_data()
+
+        self.assertEqual(len(self.synchronizer.data_buffer['activity']), 30)
+        synced = self.synchronizer.synchronize_data()
+        self.assertAlmostEqual(synced.correlations['activity_webcam'], -1.0)
+
+    def test_add_data_batch(self):
+        """Test that a batch ingest matches ingesting the same points one by one."""
+        records = [
+            {'data': {'keyboard_events': i, 'window': 'editor'},
+             'timestamp': (self.now + timedelta(seconds=i)).isoformat()}
+            for i in range(10)
+        ]
+        # Out of order within the batch, plus a point without numeric values
+        records[3], records[4] = records[4], records[3]
+        records.append({'data': {'window': 'editor'}, 'timestamp': self.now.isoformat()})
+        reference = DataSynchronizer(max_buffer_size=100)
+        for record in sorted(records[:-1], key=lambda r: r['timestamp']):
+            reference.add_data_stream('activity', record['data'], record['timestamp'])
+
+        self.assertEqual(self.synchronizer.add_data_batch('activity', records), 10)
+        buffer = self.synchronizer.data_buffer['activity']
+        expected = reference.data_buffer['activity']
+        np.testing.assert_array_equal(buffer.timestamps, expected.timestamps)
+        np.testing.assert_array_equal(buffer.column('keyboard_events'), np.arange(10))
+        self.assertEqual(list(buffer.payloads), list(expected.payloads))
+        self.assertEqual(buffer.nbytes, expected.nbytes)
+
+    def test_add_data_batch_numpy_block(self):
+        """Test batch ingest from a NumPy block with named fields."""
+        timestamps = [self.now + timedelta(seconds=i) for i in range(4)]
+        block = np.array([[i, 2 * i] for i in range(4)], dtype=np.float64)
+        self.synchronizer.add_data_stream('activity', {'keyboard_events': 0}, timestamps[0].isoformat())
+
+        added = self.synchronizer.add_data_batch(
+            'activity', block[1:], timestamps=timestamps[1:], fields=['keyboard_events', 'mouse_clicks']
+        )
+
+        self.assertEqual(added, 3)
+        buffer = self.synchronizer.data_buffer['activity']
+        np.testing.assert_array_equal(buffer.column('keyboard_events'), [0.0, 1.0, 2.0, 3.0])
+        self.assertTrue(np.isnan(buffer.column('mouse_clicks')[0]))
+        self.assertEqual(buffer.latest()[1], {'keyboard_events': 3.0, 'mouse_clicks': 6.0})
+
+    def test_correlations_use_aligned_windows(self):
+        """Test that streams with different fields correlate over their windows."""
+        for i in range(30):
+            timestamp = (self.now + timedelta(seconds=i)).isoformat()
+            self.synchronizer.add_data_stream('activity', {'keyboard_events': i}, timestamp)
+            self.synchronizer.add_data_stream(
+                'webcam', {'posture_score': 1.0 - i / 30, 'face_count': 1}, timestamp
+            )
+            self.synchronizer.add_data_stream('system', {'cpu_percent': 50.0}, timestamp)
+
+        synced = self.synchronizer.synchronize_data()
+
+        self.assertAlmostEqual(synced.correlations['activity_webcam'], -1.0)
+        # A constant stream has no defined correlation
+        self.assertNotIn('activity_system', synced.correlations)
+
+    def test_concurrent_producers_and_synchronization(self):
+        """Test that producers on separate streams can ingest while synchronizing."""
+        synchronizer = DataSynchronizer(max_buffer_size=1000)
+        results = []
+        done = threading.Event()
+
+        def produce(stream):
+            for i in range(300):
+                timestamp = (self.now + timedelta(milliseconds=10 * i)).isoformat()
+                results.append(synchronizer.add_data_stream(stream, {'value': float(i)}, timestamp))
+
+        def synchronize():
+            while not done.is_set():
+                synchronizer.synchronize_data()
+
+        syncer = threading.Thread(target=synchronize)
+        syncer.start()
+        producers = [threading.Thread(target=produce, args=(f"stream{i}",)) for i in range(4)]
+        for thread in producers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+        done.set()
+        syncer.join()
+
+        self.assertTrue(all(results))
+        self.assertEqual(sorted(synchronizer.data_buffer), [f"stream{i}" for i in range(4)])
+        for buffer in synchronizer.data_buffer.values():
+            np.testing.assert_array_equal(buffer.column('value'), np.arange(300))
+        self.assertIsNotNone(synchronizer.synchronize_data())
+
+if __name__ == '__main__':
+    unittest.main()
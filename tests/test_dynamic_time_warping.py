@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from dynamic_time_warping import (
+    _dtw_loops, _dtw_numpy, band_bounds, dtw_batch, dtw_distance, dtw_nearest, lb_keogh,
+    lb_keogh_batch
+)
+
+def reference_dtw(x, y, window=None):
+    """Full-matrix symmetric2 DTW, restricted to the same band."""
+    lo, hi = band_bounds(len(x), len(y), window)
+    cost = np.full((len(x) + 1, len(y) + 1), np.inf)
+    for i in range(len(x)):
+        for j in range(lo[i], hi[i]):
+            d = abs(x[i] - y[j])
+            if i == j == 0:
+                cost[1, 1] = d
+            else:
+                cost[i + 1, j + 1] = min(cost[i, j] + 2 * d, cost[i, j + 1] + d, cost[i + 1, j] + d)
+    return cost[-1, -1]
+
+class TestDynamicTimeWarping(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = rng.normal(size=60).cumsum()
+        self.y = rng.normal(size=60).cumsum()
+        self.z = rng.normal(size=45).cumsum()
+
+    def test_matches_reference(self):
+        """Test that both DP cores match a full-matrix reference, with and without a band."""
+        for x, y in [(self.x, self.y), (self.x, self.z), (self.z, self.x)]:
+            for window in (None, 0, 3, 10):
+                lo, hi = band_bounds(len(x), len(y), window)
+                expected = reference_dtw(x, y, window)
+                self.assertAlmostEqual(_dtw_numpy(x, y, lo, hi, np.inf), expected, places=9)
+                self.assertAlmostEqual(_dtw_loops(x, y, lo, hi, np.inf), expected, places=9)
+                self.assertAlmostEqual(dtw_distance(x, y, window), expected, places=9)
+
+    def test_identical_and_wide_band(self):
+        """Test that identical series are 0 apart and a band wider than the series changes nothing."""
+        self.assertEqual(dtw_distance(self.x, self.x, window=2), 0.0)
+        self.assertAlmostEqual(
+            dtw_distance(self.x, self.y, window=len(self.x)), dtw_distance(self.x, self.y), places=9
+        )
+        self.assertGreaterEqual(dtw_distance(self.x, self.y, window=2), dtw_distance(self.x, self.y))
+
+    def test_lower_bound_and_abandoning(self):
+        """Test that LB_Keogh never exceeds DTW and max_dist abandons hopeless pairs."""
+        for window in (None, 1, 5, 20):
+            self.assertLessEqual(lb_keogh(self.x, self.y, window), dtw_distance(self.x, self.y, window) + 1e-9)
+
+        distance = dtw_distance(self.x, self.y, window=5)
+        self.assertEqual(dtw_distance(self.x, self.y, window=5, max_dist=distance / 2), np.inf)
+        self.assertAlmostEqual(dtw_distance(self.x, self.y, window=5, max_dist=distance + 1), distance, places=9)
+        self.assertEqual(dtw_distance(self.x, self.y, window=5, max_dist=0.0, use_numba=False), np.inf)
+        with self.assertRaises(ValueError):
+            dtw_distance([], self.y)
+
+    def test_batch_and_nearest(self):
+        """Test the batched API and the pruned nearest-neighbour search."""
+        pairs = [(self.x, self.y), (self.x, self.z), (self.y, self.y)]
+        distances = dtw_batch(pairs, window=5)
+        np.testing.assert_allclose(distances, [dtw_distance(a, b, 5) for a, b in pairs])
+
+        # Mixed lengths are grouped, and pairs beyond max_dist are pruned or abandoned
+        pairs = [(self.x, self.y), (self.x, self.x + 0.01), (self.z, self.x), (self.y, self.x + 5),
+                 (self.z, self.z[::-1]), (self.x, self.z)]
+        threshold = float(np.median([dtw_distance(a, b, 5) for a, b in pairs]))
+        expected = [dtw_distance(a, b, 5, max_dist=threshold, use_numba=False) for a, b in pairs]
+        distances = dtw_batch(pairs, window=5, max_dist=threshold, use_numba=False)
+        np.testing.assert_allclose(distances, expected)
+        self.assertTrue(np.isinf(distances).any() and np.isfinite(distances).any())
+
+        xs, ys = np.stack([self.x, self.y, self.x]), np.stack([self.y, self.x, self.x + 1])
+        for window in (None, 3):
+            np.testing.assert_allclose(
+                lb_keogh_batch(xs, ys, window), [lb_keogh(x, y, window) for x, y in zip(xs, ys)]
+            )
+
+        candidates = [self.y, self.x + 0.1, self.z, self.x + 3]
+        index, distance = dtw_nearest(self.x, candidates, window=5)
+        brute = [dtw_distance(self.x, candidate, 5) for candidate in candidates]
+        self.assertEqual(index, int(np.argmin(brute)))
+        self.assertAlmostEqual(distance, min(brute), places=9)
+
+if __name__ == '__main__':
+    unittest.main()
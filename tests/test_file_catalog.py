@@ -0,0 +1,172 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+from file_catalog import (
+    CATALOG_FILE, FileCatalog, columns_to_records, load_chunk, records_to_columns, save_chunk
+)
+
+class TestFileCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.start = datetime(2026, 10, 1, 9, 0)
+        self.catalog = FileCatalog(self.directory, 'metrics_*.json', compact_after=None, max_workers=2)
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.directory)
+
+    def write(self, timestamp, records=1):
+        """Write a metrics file holding one record per second from ``timestamp``."""
+        data = [
+            {
+                'timestamp': (timestamp + timedelta(seconds=i)).isoformat(),
+                'system': {'cpu_percent': float(i)},
+                'hid': {'active_window': 'Editor', 'tags': [i]}
+            }
+            for i in range(records)
+        ]
+        path = self.directory / f"metrics_{timestamp:%Y%m%d_%H%M%S}.json"
+        with open(path, 'w') as f:
+            json.dump(data if records > 1 else data[0], f)
+
+    def test_query_opens_only_overlapping_files(self):
+        """Test that a range query reads only the files it overlaps."""
+        for minute in range(0, 30, 5):
+            self.write(self.start + timedelta(minutes=minute), records=60)
+        self.catalog.refresh()
+
+        with patch.object(FileCatalog, '_read_records', wraps=FileCatalog._read_records) as read:
+            records = self.catalog.load(
+                self.start + timedelta(minutes=10, seconds=30),
+                self.start + timedelta(minutes=15, seconds=9)
+            )
+        self.assertEqual(read.call_count, 2)
+        self.assertEqual(len(records), 30 + 10)
+        timestamps = [record['timestamp'] for record in records]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_catalog_persists_and_tracks_changes(self):
+        """Test that the sidecar catalog is reused and follows new and removed files."""
+        self.write(self.start)
+        self.write(self.start + timedelta(hours=1))
+        self.catalog.refresh()
+        self.assertTrue((self.directory / CATALOG_FILE).exists())
+
+        reopened = FileCatalog(self.directory, 'metrics_*.json')
+        self.assertEqual(reopened.entries, self.catalog.entries)
+        (self.directory / f"metrics_{self.start:%Y%m%d_%H%M%S}.json").unlink()
+        self.assertTrue(reopened.refresh())
+        self.assertEqual(len(reopened.query(0, 2 ** 62)), 1)
+
+    def test_compaction_into_hourly_chunks(self):
+        """Test that closed hours become columnar chunks with identical records."""
+        for minute in (0, 20, 40, 60, 80):
+            self.write(self.start + timedelta(minutes=minute), records=3)
+        window = (self.start, self.start + timedelta(hours=3))
+        before = self.catalog.load(*window)
+        catalog = FileCatalog(self.directory, 'metrics_*.json', compact_after=timedelta(hours=1))
+        self.addCleanup(catalog.close)
+        now = self.start + timedelta(hours=2, minutes=30)
+
+        catalog.refresh()
+        self.assertEqual(catalog.compact(now=now), 3)
+        self.assertEqual(
+            sorted(path.name for path in self.directory.glob('*_*.*')),
+            ['chunk_metrics_20261001_09.npz', 'metrics_20261001_100000.json',
+             'metrics_20261001_102000.json']
+        )
+        self.assertEqual(catalog.load(*window), before)
+
+        # A late file for a compacted hour is merged into its chunk
+        self.write(self.start + timedelta(minutes=50))
+        catalog.refresh()
+        self.assertEqual(catalog.compact(now=now), 1)
+        self.assertEqual(len(catalog.load(*window)), 16)
+        self.assertEqual(len(list(self.directory.glob('*_*.*'))), 3)
+
+        # Without a time, every hour closed by the wall clock is compacted
+        self.assertEqual(catalog.compact(), 2)
+        self.assertEqual(
+            sorted(path.name for path in self.directory.glob('*_*.*')),
+            ['chunk_metrics_20261001_09.npz', 'chunk_metrics_20261001_10.npz']
+        )
+
+    def test_compaction_off_by_default(self):
+        """Test that loading never compacts, and compact() needs compact_after."""
+        self.write(self.start, records=2)
+        self.assertEqual(len(self.catalog.load(self.start, self.start + timedelta(hours=1))), 2)
+        self.assertEqual(self.catalog.compact(), 0)
+        self.assertTrue((self.directory / f"metrics_{self.start:%Y%m%d_%H%M%S}.json").exists())
+
+    def test_interrupted_compaction_is_finished(self):
+        """Test that raw files already held by a chunk are dropped on refresh."""
+        self.write(self.start, records=2)
+        path = self.directory / f"metrics_{self.start:%Y%m%d_%H%M%S}.json"
+        with open(path, 'r') as f:
+            records = json.load(f)
+        chunk = records_to_columns(records)
+        chunk['sources'] = [path.name]
+        with open(self.directory / 'chunk_metrics_20261001_09.npz', 'wb') as f:
+            save_chunk(f, chunk)
+
+        self.catalog.refresh()
+        self.assertFalse(path.exists())
+        self.assertEqual(self.catalog.load(self.start, self.start + timedelta(hours=1)), records)
+
+    def test_files_changed_in_place_are_reloaded(self):
+        """Test that files are rechecked even when the directory looks unchanged."""
+        self.write(self.start, records=2)
+        old = self.directory.stat().st_mtime_ns - 3600 * 10 ** 9
+        os.utime(self.directory, ns=(old, old))
+        window = (self.start, self.start + timedelta(hours=1))
+        self.assertEqual(len(self.catalog.load(*window)), 2)
+
+        # Rewriting a file in place leaves the directory's modification time alone
+        path = self.directory / f"metrics_{self.start:%Y%m%d_%H%M%S}.json"
+        os.utime(path, ns=(old - 10 ** 9, old - 10 ** 9))
+        self.write(self.start, records=3)
+        os.utime(self.directory, ns=(old, old))
+        self.assertEqual(len(self.catalog.load(*window)), 3)
+
+    def test_recent_directory_is_listed_again(self):
+        """Test that a file created in the same timestamp tick as the last listing is found."""
+        self.write(self.start)
+        self.catalog.refresh()
+        mtime_ns = self.directory.stat().st_mtime_ns
+
+        self.write(self.start + timedelta(minutes=1))
+        os.utime(self.directory, ns=(mtime_ns, mtime_ns))
+        self.assertEqual(len(self.catalog.load(self.start, self.start + timedelta(hours=1))), 2)
+
+    def test_chunk_range_reads(self):
+        """Test that chunks keep value types and are sliced to the requested range."""
+        records = [
+            {'timestamp': f'2026-10-01T09:00:0{i}', 'count': i, 'cpu': i / 2,
+             'window': 'Editor' if i % 2 else None, 'tags': [i], 'extra': {'x': 1.5} if i == 3 else {}}
+            for i in range(6)
+        ]
+        path = self.directory / 'chunk.npz'
+        with open(path, 'wb') as f:
+            save_chunk(f, records_to_columns(records))
+
+        self.assertEqual(columns_to_records(load_chunk(path)), records)
+        chunk = load_chunk(path, records_to_columns(records[2:3])['timestamps'][0],
+                           records_to_columns(records[4:5])['timestamps'][0])
+        self.assertEqual(len(chunk['timestamps']), 3)
+        self.assertEqual(columns_to_records(chunk), records[2:5])
+
+    def test_columnar_round_trip(self):
+        """Test that records with differing keys survive the columnar layout."""
+        records = [
+            {'timestamp': '2026-10-01T09:00:00', 'a': {'b': 1, 'c': None}},
+            {'timestamp': '2026-10-01T09:00:01', 'a': {'b': 2}, 'd': [1, 2], 'e': {}}
+        ]
+        self.assertEqual(columns_to_records(records_to_columns(records)), records)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import numpy as np
+from prometheus_client import REGISTRY
+from scipy import signal
+from correlation_engine import cross_correlation_batch
+from dynamic_time_warping import dtw_batch
+from preprocessing import clip_outliers, detrend_columns, preprocess_matrix
+
+class TestPreprocessing(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(11)
+        self.matrix = np.column_stack([
+            np.linspace(0, 50, 200) + rng.normal(0, 1, 200),
+            rng.normal(5, 3, 200),
+            np.sin(np.linspace(0, 10, 200)) * 40
+        ])
+        self.matrix[[20, 90], 1] = [500, -400]
+
+    def test_detrend_matches_scipy(self):
+        """Test the closed-form detrend against scipy."""
+        np.testing.assert_allclose(
+            detrend_columns(self.matrix), signal.detrend(self.matrix, axis=0), atol=1e-9
+        )
+        np.testing.assert_allclose(detrend_columns(self.matrix[:1]), np.zeros((1, 3)))
+
+    def test_columns_match_one_at_a_time(self):
+        """Test that preprocessing the block equals preprocessing each column on its own."""
+        block = preprocess_matrix(self.matrix)
+        for column in range(self.matrix.shape[1]):
+            np.testing.assert_allclose(block[:, column], preprocess_matrix(self.matrix[:, column]))
+        np.testing.assert_allclose(block.mean(axis=0), 0, atol=1e-12)
+        np.testing.assert_allclose(block.std(axis=0), 1)
+        self.assertLess(block[:, 1].max(), 4)
+
+    def test_stage_order_only_rescales(self):
+        """Test that standardising last only rescales the normalise-first result."""
+        reference = self.matrix - self.matrix.mean(axis=0)
+        reference = clip_outliers(signal.detrend(reference / self.matrix.std(axis=0), axis=0))
+        block = preprocess_matrix(self.matrix)
+        for column in range(self.matrix.shape[1]):
+            self.assertAlmostEqual(np.corrcoef(block[:, column], reference[:, column])[0, 1], 1.0)
+
+    def test_pairwise_metrics_against_previous_order(self):
+        """Pin DTW and cross-correlation against the normalise-detrend-clip pipeline.
+
+        Normalised cross-correlation is unchanged. DTW and the unnormalised
+        peak product depend on scale and offset, so they now equal the old
+        values computed on the old output standardised per column.
+        """
+        previous = (self.matrix - self.matrix.mean(axis=0)) / self.matrix.std(axis=0)
+        previous = clip_outliers(signal.detrend(previous, axis=0))
+        restandardized = (previous - previous.mean(axis=0)) / previous.std(axis=0)
+        block = preprocess_matrix(self.matrix)
+        scale = 1 / previous.std(axis=0)
+        pairs = [(0, 1), (0, 2), (1, 2)]
+
+        current = cross_correlation_batch(list(block.T), pairs, 20)
+        before = cross_correlation_batch(list(previous.T), pairs, 20)
+        for (i, j), now, then in zip(pairs, current, before):
+            np.testing.assert_allclose(now['curve'], then['curve'], atol=1e-12)
+            self.assertEqual(now['peak_lag'], then['peak_lag'])
+            self.assertAlmostEqual(now['peak_product'], then['peak_product'] * scale[i] * scale[j])
+
+        distances = dtw_batch([(block[:, i], block[:, j]) for i, j in pairs], window=20)
+        np.testing.assert_allclose(
+            distances, dtw_batch([(restandardized[:, i], restandardized[:, j]) for i, j in pairs], window=20)
+        )
+        self.assertFalse(np.allclose(
+            distances, dtw_batch([(previous[:, i], previous[:, j]) for i, j in pairs], window=20)
+        ))
+
+    def test_stage_timings_exported(self):
+        """Test that each enabled stage is timed under its own label."""
+        def count(stage):
+            return REGISTRY.get_sample_value('preprocessing_stage_seconds_count', {'stage': stage}) or 0.0
+
+        before = {stage: count(stage) for stage in ('detrend', 'remove_outliers', 'normalize')}
+        preprocess_matrix(self.matrix, remove_outliers=False)
+        self.assertEqual(count('detrend'), before['detrend'] + 1)
+        self.assertEqual(count('normalize'), before['normalize'] + 1)
+        self.assertEqual(count('remove_outliers'), before['remove_outliers'])
+
+if __name__ == '__main__':
+    unittest.main()
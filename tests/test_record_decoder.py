@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from record_decoder import HID_FIELDS, WEBCAM_FIELDS, RecordDecoder, minute_means, resample_minutes
+
+class TestRecordDecoder(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2026, 10, 1, 9, 0)
+
+    def hid_record(self, seconds, window='Editor', cpu=50.0):
+        return {
+            'timestamp': (self.start + timedelta(seconds=seconds)).isoformat(),
+            'system': {'cpu_percent': cpu, 'memory_percent': 60.0},
+            'hid': {
+                'keyboard_events': {'key_presses': seconds},
+                'mouse_events': {'clicks': 2},
+                'active_window': window
+            }
+        }
+
+    def test_decode_typed_columns(self):
+        """Test that records decode to sorted typed columns with encoded categories."""
+        decoder = RecordDecoder(HID_FIELDS)
+        records = [self.hid_record(30, 'Browser'), self.hid_record(0), self.hid_record(60, None, None)]
+        del records[1]['system']
+        decoded = decoder.decode(records)
+
+        self.assertEqual(decoded.timestamps[0], np.datetime64(self.start, 'ns'))
+        np.testing.assert_equal(decoded.columns['key_presses'], [0, 30, 60])
+        np.testing.assert_equal(decoded.columns['cpu_percent'], [np.nan, 50.0, np.nan])
+        np.testing.assert_equal(decoded.columns['active_window'], [1, 0, -1])
+        self.assertEqual(decoder.labels('active_window'), ['Browser', 'Editor'])
+
+        # Codes stay stable for later batches
+        later = decoder.decode([self.hid_record(90, 'Editor'), self.hid_record(120, 'Terminal')])
+        np.testing.assert_equal(later.columns['active_window'], [1, 2])
+
+    def test_webcam_frame(self):
+        """Test that records without posture are skipped and faces are counted."""
+        records = [
+            {'timestamp': self.start.isoformat(), 'posture': {'posture_quality': 0.8}, 'faces': [{}, {}]},
+            {'timestamp': self.start.isoformat(), 'faces': []}
+        ]
+        frame = RecordDecoder(WEBCAM_FIELDS, required='posture').frame(records)
+        self.assertEqual(len(frame), 1)
+        self.assertEqual(frame['face_count'].iloc[0], 2)
+        self.assertTrue(np.isnan(frame['head_position'].iloc[0]))
+
+    def test_minute_means_match_resample(self):
+        """Test reduceat minute means against pandas resampling, with gaps and NaNs."""
+        rng = np.random.default_rng(2)
+        seconds = np.sort(np.r_[rng.uniform(0, 600, 300), rng.uniform(1200, 1500, 100)])
+        records = [self.hid_record(s, rng.choice(['a', 'b'])) for s in seconds]
+        for record in records[::7]:
+            record['system']['cpu_percent'] = None
+        frame = RecordDecoder(HID_FIELDS).frame(records)
+
+        pd.testing.assert_frame_equal(resample_minutes(frame), frame.resample('1min').mean(numeric_only=True))
+        minutes, means = minute_means(np.array([], dtype='datetime64[ns]'), np.empty(0))
+        self.assertEqual((len(minutes), means.shape), (0, (0, 1)))
+
+if __name__ == '__main__':
+    unittest.main()
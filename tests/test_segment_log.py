@@ -0,0 +1,79 @@
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+from data_integration import DataIntegrationEngine
+from segment_log import SegmentLog
+
+class TestSegmentLog(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.start = datetime(2026, 10, 1, 23, 59, 58)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_daily_segments_rotate_by_size(self):
+        """Test that records split into daily segments no larger than the limit."""
+        log = SegmentLog(self.temp_dir, max_segment_bytes=100)
+        for i in range(10):
+            log.append({'index': i, 'payload': 'x' * 20}, self.start + timedelta(seconds=i))
+        log.close()
+
+        self.assertEqual(log.days(), ['2026-10-01', '2026-10-02'])
+        segments = sorted(Path(self.temp_dir).glob('*/segment_*.jsonl'))
+        self.assertGreater(len(segments), 2)
+        self.assertTrue(all(segment.stat().st_size <= 100 for segment in segments))
+        self.assertEqual([record['index'] for record in log.replay()], list(range(10)))
+        self.assertEqual(
+            [record['index'] for record in log.replay(start_day=date(2026, 10, 2))], list(range(2, 10))
+        )
+
+    def test_reopen_after_torn_write(self):
+        """Test that a torn last line is skipped and appends continue after it."""
+        log = SegmentLog(self.temp_dir)
+        log.append({'index': 0}, self.start)
+        log.close()
+        segment = next(Path(self.temp_dir).glob('*/segment_*.jsonl'))
+        with open(segment, 'ab') as f:
+            f.write(b'{"index": 1, "tor')
+
+        reopened = SegmentLog(self.temp_dir)
+        reopened.append({'index': 2}, self.start)
+        self.assertEqual([record['index'] for record in reopened.replay()], [0, 2])
+        reopened.close()
+        self.assertEqual(len(list(Path(self.temp_dir).glob('*/segment_*.jsonl'))), 1)
+
+    def test_idle_log_is_synced_by_timer(self):
+        """Test that the last records are fsynced within the interval even if appends stop."""
+        log = SegmentLog(self.temp_dir, fsync_interval=0.5)
+        self.addCleanup(log.close)
+        with patch('segment_log.os.fsync') as fsync:
+            log.append({'index': 0}, self.start)
+            log.append({'index': 1}, self.start)
+            self.assertEqual(fsync.call_count, 0)
+            deadline = time.monotonic() + 5
+            while fsync.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(fsync.call_count, 1)
+            self.assertIsNone(log._timer)
+            self.assertFalse(log._dirty)
+
+    def test_engine_replays_raw_data(self):
+        """Test that the integration engine logs raw data points without a file per point."""
+        engine = DataIntegrationEngine(self.temp_dir)
+        for i in range(5):
+            engine.add_data_point('hid', 'keyboard_event', {'key': i}, {'user_id': 'user123'})
+        engine.close()
+
+        raw_files = list((Path(self.temp_dir) / 'raw').glob('*/*'))
+        self.assertEqual(len(raw_files), 1)
+        replayed = list(engine.replay_raw_data())
+        self.assertEqual([point.data['key'] for point in replayed], list(range(5)))
+        self.assertEqual(replayed[0].metadata, {'user_id': 'user123'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import numpy as np
+from data_synchronizer import DataSynchronizer
+from segment_store import SegmentStore
+from stream_buffer import to_epoch_ns
+
+class TestSegmentStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_append_and_read_across_segments(self):
+        """Test range reads spanning several segments."""
+        store = SegmentStore(self.temp_dir, segment_capacity=4)
+        timestamps = np.arange(10, dtype=np.int64) * 1000
+        store.append(timestamps, {'cpu': np.arange(10, dtype=np.float64)})
+
+        self.assertEqual(len(store), 10)
+        ts, columns = store.read(2000, 6000)
+        np.testing.assert_array_equal(ts, timestamps[2:7])
+        np.testing.assert_array_equal(columns['cpu'], np.arange(2, 7))
+
+        ts, columns = store.read(1000, 2000)
+        self.assertIsInstance(ts, np.memmap)
+        store.close()
+
+    def test_new_field_is_backfilled(self):
+        """Test that fields first seen mid-segment read as NaN before they appear."""
+        store = SegmentStore(self.temp_dir)
+        store.append(np.array([1, 2]), {'cpu': np.array([1.0, 2.0])})
+        store.append(np.array([3]), {'cpu': np.array([3.0]), 'memory': np.array([30.0])})
+
+        _, columns = store.read()
+        np.testing.assert_array_equal(columns['cpu'], [1.0, 2.0, 3.0])
+        self.assertTrue(np.isnan(columns['memory'][:2]).all())
+        self.assertEqual(columns['memory'][2], 30.0)
+        store.close()
+
+    def test_history_survives_restart(self):
+        """Test that a reopened store sees and extends earlier segments."""
+        store = SegmentStore(self.temp_dir, segment_capacity=3)
+        store.append(np.array([1, 2]), {'cpu': np.array([1.0, 2.0])})
+        store.close()
+
+        store = SegmentStore(self.temp_dir, segment_capacity=3)
+        store.append(np.array([3, 4]), {'cpu': np.array([3.0, 4.0])})
+        ts, columns = store.read()
+        np.testing.assert_array_equal(ts, [1, 2, 3, 4])
+        np.testing.assert_array_equal(columns['cpu'], [1.0, 2.0, 3.0, 4.0])
+        store.close()
+
+    def test_torn_segment_truncated_on_open(self):
+        """Test that a crash mid-append leaves every file at the last complete point."""
+        store = SegmentStore(self.temp_dir)
+        store.append(np.array([1, 2, 3]), {'cpu': np.array([1.0, 2.0, 3.0]), 'memory': np.array([4.0, 5.0, 6.0])})
+        store.close()
+
+        # Columns of a fourth point reached disk, only partly, but its timestamp did not
+        segment = store._segments[-1]
+        with open(store._column_path(segment, 'cpu'), 'ab') as f:
+            f.write(np.array([4.0]).tobytes())
+        with open(store._column_path(segment, 'memory'), 'ab') as f:
+            f.write(np.array([7.0]).tobytes()[:5])
+
+        store = SegmentStore(self.temp_dir)
+        store.append(np.array([4]), {'cpu': np.array([40.0]), 'memory': np.array([70.0])})
+        ts, columns = store.read()
+        np.testing.assert_array_equal(ts, [1, 2, 3, 4])
+        np.testing.assert_array_equal(columns['cpu'], [1.0, 2.0, 3.0, 40.0])
+        np.testing.assert_array_equal(columns['memory'], [4.0, 5.0, 6.0, 70.0])
+        store.close()
+
+    def test_synchronizer_spills_evicted_points(self):
+        """Test that points evicted from the live buffer remain queryable."""
+        synchronizer = DataSynchronizer(max_buffer_size=5, history_dir=self.temp_dir)
+        start = datetime.now().replace(microsecond=0)
+        for i in range(12):
+            timestamp = (start + timedelta(seconds=i)).isoformat()
+            synchronizer.add_data_stream('system', {'cpu_percent': float(i)}, timestamp)
+
+        history = synchronizer.get_history('system')
+        np.testing.assert_array_equal(history.values['cpu_percent'], np.arange(7))
+        self.assertEqual(history.timestamps[0].astype('int64'), to_epoch_ns(start))
+
+        window = synchronizer.get_history(
+            'system',
+            (start + timedelta(seconds=2)).isoformat(),
+            (start + timedelta(seconds=3)).isoformat()
+        )
+        np.testing.assert_array_equal(window.values['cpu_percent'], [2.0, 3.0])
+
+        synchronizer.close()
+        history = DataSynchronizer(history_dir=self.temp_dir).get_history('system')
+        np.testing.assert_array_equal(history.values['cpu_percent'], np.arange(12))
+
+    def test_history_disabled_by_default(self):
+        """Test that no history is kept without a history directory."""
+        synchronizer = DataSynchronizer(max_buffer_size=2)
+        synchronizer.add_data_stream('system', {'cpu_percent': 1.0}, datetime.now().isoformat())
+        self.assertIsNone(synchronizer.get_history('system'))
+
+if __name__ == '__main__':
+    unittest.main()